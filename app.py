@@ -1,14 +1,21 @@
 # app.py
+import hmac
+import os
+
 import streamlit as st
 from importlib import import_module
 from utils.theme import inject_premium_ui
 from utils.ui import premium_sidebar_nav, premium_header
+from utils.load_models import preload_models
 
 # Inject CSS first
 inject_premium_ui()
 
 st.set_page_config(page_title="Airline Analytics Platform", page_icon="assets/plane.png", layout="wide")
 
+# start loading the ML models in the background (once per server process)
+preload_models()
+
 PAGES = {
     "Real-Time Flight Tracker": "app_pages.1_flight_tracker",
     "Delay Analyzer": "app_pages.2_delay_analyzer",
@@ -21,9 +28,30 @@ PAGES = {
     "Airline Comparison": "app_pages.9_airline_comparison"
 }
 
+# pages reachable only by URL (?admin=<key>&token=<ADMIN_TOKEN>), not
+# listed in the sidebar; disabled while ADMIN_TOKEN is unset
+HIDDEN_PAGES = {
+    "queries": "app_pages.10_query_admin",
+}
+
+
+def admin_allowed():
+    token = os.getenv("ADMIN_TOKEN", "")
+    given = st.query_params.get("token", "")
+    return bool(token) and hmac.compare_digest(given.encode(), token.encode())
+
+
 # render premium sidebar
 premium_sidebar_nav(PAGES)
 
+admin = st.query_params.get("admin")
+if admin in HIDDEN_PAGES:
+    if not admin_allowed():
+        st.error("Admin pages need ?token=<ADMIN_TOKEN> (set ADMIN_TOKEN in .env to enable them).")
+        st.stop()
+    import_module(HIDDEN_PAGES[admin]).app()
+    st.stop()
+
 # load selected page
 selected = st.session_state.get("current_page", list(PAGES.keys())[0])
 try:
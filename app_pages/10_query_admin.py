@@ -0,0 +1,58 @@
+# app_pages/10_query_admin.py
+# Hidden page: open the app with ?admin=queries&token=<ADMIN_TOKEN>
+import streamlit as st
+from utils.query_stats import (
+    get_query_records, query_summary, latency_percentiles, clear_query_stats,
+    SLOW_QUERY_MS, SLOW_QUERY_LOG
+)
+from utils.query_cache import get_cache_stats
+from utils.db_connection import get_pool_stats
+from utils.ui import kpi_row, glass_card_start, glass_card_end, download_df_button
+
+
+def app():
+    st.subheader("Query Admin")
+    st.write(f"Queries recorded by run_query in this process. Slow log (≥ {SLOW_QUERY_MS:.0f} ms): `{SLOW_QUERY_LOG}`")
+
+    records = get_query_records()
+    if records.empty:
+        st.info("No queries recorded yet — browse a few pages first.")
+        return
+
+    pct = latency_percentiles(records)
+    db = records[~records["cached"].astype(bool)]
+    fmt = lambda v: f"{v:.0f} ms" if v is not None else "-"
+    kpi_row([
+        {"label": "Queries", "value": f"{len(records):,}", "meta": f"{len(records) - len(db):,} cache hits"},
+        {"label": "p50 / p95", "value": f"{fmt(pct['p50'])} / {fmt(pct['p95'])}"},
+        {"label": "p99", "value": fmt(pct["p99"])},
+        {"label": "Slow queries", "value": f"{int((db['wall_ms'] >= SLOW_QUERY_MS).sum()):,}"},
+    ])
+
+    glass_card_start()
+    sort_by = st.selectbox("Rank by", ["total_ms", "p95_ms", "max_ms", "calls", "avg_bytes"])
+    summary = query_summary(records, sort_by=sort_by)
+    st.subheader("Top offenders")
+    st.dataframe(summary.head(25).round(1), width='stretch')
+    download_df_button(summary, filename="query_summary.csv", label="Download summary CSV")
+
+    st.subheader("Time by page")
+    by_page = db.groupby("page").agg(
+        queries=("sql", "size"), total_ms=("wall_ms", "sum"),
+        db_ms=("db_ms", "sum"), frame_ms=("frame_ms", "sum"), rows=("rows", "sum")
+    ).sort_values("total_ms", ascending=False)
+    st.bar_chart(by_page[["db_ms", "frame_ms"]])
+
+    st.subheader("Recent queries")
+    st.dataframe(records.sort_values("ts", ascending=False).head(200), width='stretch')
+    glass_card_end()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("Cache", get_cache_stats())
+    with col2:
+        st.write("Connection pool", get_pool_stats())
+
+    if st.button("Clear recorded queries"):
+        clear_query_stats()
+        st.rerun()
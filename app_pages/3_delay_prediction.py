@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
-import joblib
 from pathlib import Path
 import json
 from utils.theme import inject_premium_ui
+from utils.load_models import load_delay_model, load_compiled_model
+from utils.tree_export import predict_with_proba
 
 def app():
     inject_premium_ui()
@@ -47,7 +48,10 @@ def app():
         st.error("❌ Model not found. Train it first.")
         st.stop()
 
-    pipeline = joblib.load(MODEL_PATH)
+    # shared by every session; reloaded only when the file changes
+    pipeline = load_delay_model(MODEL_PATH)
+    # same probabilities from flat node arrays, when exported (utils/tree_export.py)
+    predictor = load_compiled_model("delay", MODEL_PATH) or pipeline
 
     # -------------------------------------------------
     # Model Metadata (Explainability / Audit)
@@ -137,8 +141,8 @@ def app():
     # -------------------------------------------------
     if st.button("Get Delay Prediction", type="secondary", width='stretch'):
         try:
-            prob = pipeline.predict_proba(X)[0][1]
-            pred = pipeline.predict(X)[0]
+            labels, proba = predict_with_proba(predictor, X)
+            prob, pred = proba[0][1], labels[0]
 
             # Result
             st.success(
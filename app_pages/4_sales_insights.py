@@ -1,21 +1,34 @@
 import streamlit as st
 from utils.run_query import run_query
+from utils.partitions import window_clause
+from utils.ui import date_window_picker
+from utils.snapshot import get_snapshot
 import plotly.express as px
 from utils.theme import inject_premium_ui
 
+# {where} is always a flight_date window (see utils/partitions.window_clause)
+SALES_QUERY = """
+SELECT flight_date, airline, route, seats_sold, revenue
+FROM sales_data
+{where}
+ORDER BY flight_date DESC
+LIMIT 20000;
+"""
+
 def app():
     inject_premium_ui()
     
     st.header("Sales Insights")
     st.write("Ticket sales & revenue breakdown")
 
-    q = """
-    SELECT flight_date, airline, route, seats_sold, revenue
-    FROM sales_data
-    ORDER BY flight_date DESC
-    LIMIT 20000;
-    """
-    df = run_query(q)
+    start, end = date_window_picker("sales_data", key="si_window")
+    snap = get_snapshot("sales_data")
+    if snap is not None:
+        # newest 20000 rows of the window, sliced from the shared mapping
+        df = snap.tail(20000, start, end, columns=["flight_date", "airline", "route", "seats_sold", "revenue"])
+    else:
+        where, params = window_clause(start, end, table="sales_data")
+        df = run_query(SALES_QUERY.format(where=where), params)
     if df.empty:
         st.warning("No sales_data found.")
         return
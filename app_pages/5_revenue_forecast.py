@@ -1,10 +1,17 @@
 import streamlit as st
 from utils.load_models import load_revenue_model
 from utils.run_query import run_query
+from utils.query_batch import run_concurrently
+from utils.snapshot import get_snapshot
 import pandas as pd
 import plotly.express as px
 from utils.theme import inject_premium_ui
 
+HISTORY_QUERY = """
+SELECT flight_date, revenue FROM sales_data
+WHERE flight_date IS NOT NULL
+"""
+
 def app():
     inject_premium_ui()
     st.header("Revenue Forecast")
@@ -15,25 +22,32 @@ def app():
         st.warning("Revenue forecast model not found in /models. Train and save 'revenue_forecast.pkl' first.")
         return
 
-    # get historical series
-    q = """
-    SELECT flight_date, revenue FROM sales_data
-    WHERE flight_date IS NOT NULL
-    """
-    hist = run_query(q)
+    # history query and forecast are independent: run them side by side
+    history_box = st.container()
+    periods = st.selectbox("Forecast horizon (months)", [1,3,6,12], index=1)
+    future = model.make_future_dataframe(periods=periods, freq='ME')
+    snap = get_snapshot("sales_data")
+    if snap is not None:
+        # two columns of the shared, memory-mapped snapshot instead of a query
+        load_history = lambda: snap.to_pandas(columns=["flight_date", "revenue"])
+    else:
+        load_history = lambda: run_query(HISTORY_QUERY)
+    results = run_concurrently({
+        "hist": load_history,
+        "forecast": lambda: model.predict(future),
+    })
+    hist, forecast = results["hist"], results["forecast"]
+
     if hist.empty:
-        st.warning("No sales_data present.")
+        history_box.warning("No sales_data present.")
         return
 
     hist['flight_date'] = pd.to_datetime(hist['flight_date'])
     ts = hist.groupby(pd.Grouper(key='flight_date', freq='ME')).revenue.sum().reset_index().rename(columns={'flight_date':'ds','revenue':'y'})
-    st.subheader("Historical monthly revenue")
-    st.line_chart(ts.set_index('ds')['y'])
+    history_box.subheader("Historical monthly revenue")
+    history_box.line_chart(ts.set_index('ds')['y'])
 
     # Forecast
-    periods = st.selectbox("Forecast horizon (months)", [1,3,6,12], index=1)
-    future = model.make_future_dataframe(periods=periods, freq='ME')
-    forecast = model.predict(future)
     forecast_display = forecast[['ds','yhat','yhat_lower','yhat_upper']].tail(periods)
     st.subheader("Forecasted revenue (next periods)")
     st.dataframe(forecast_display)
@@ -1,12 +1,30 @@
 import streamlit as st
-import pickle
 import numpy as np
 # Ensure this import path matches your project structure
 from utils.theme import inject_premium_ui
+from utils.load_models import load_cancellation_model, load_compiled_model
+from utils.tree_export import predict_with_proba
+from utils.dimensions import bundle_dimensions, get_airline_index, get_airport_index
 
 def load_model():
-    # Ensure this path to your model is correct
-    return pickle.load(open("models/cancellation_model.pkl", "rb"))
+    # loaded once per process (utils/model_registry.py)
+    bundle = load_cancellation_model()
+    if bundle is None:
+        raise FileNotFoundError("models/cancellation_model.pkl")
+    return bundle
+
+
+def code_label(get_index):
+    """Shows "CODE — name" from the shared dimension index when available."""
+    try:
+        index = get_index()
+    except FileNotFoundError:
+        return str
+
+    def label(code):
+        name = index.attribute_of(code, "name")
+        return f"{code} — {name}" if name else str(code)
+    return label
 
 def app():
     # Inject the base CSS (required for glass-card class etc.)
@@ -75,8 +93,10 @@ def app():
 
     try:
         bundle = load_model()
-        model = bundle["model"]
-        encoders = bundle["encoders"]
+        # the array-based export when it matches the bundle (utils/tree_export.py)
+        model = load_compiled_model("cancel") or bundle["model"]
+        # code → id vocabularies (LabelEncoders in older bundles)
+        dims = bundle_dimensions(bundle)
     except FileNotFoundError:
         st.error("Model file not found. Please ensure 'models/cancellation_model.pkl' exists.")
         return
@@ -86,12 +106,12 @@ def app():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        # Using .classes_ to get the list of categories the model knows
-        airline = st.selectbox("Airline", encoders["Airline"].classes_)
+        # the codes the model knows
+        airline = st.selectbox("Airline", dims["Airline"].codes, format_func=code_label(get_airline_index))
     with col2:
-        origin  = st.selectbox("Origin Airport", encoders["Origin"].classes_)
+        origin  = st.selectbox("Origin Airport", dims["Origin"].codes, format_func=code_label(get_airport_index))
     with col3:
-        dest    = st.selectbox("Destination Airport", encoders["Dest"].classes_)
+        dest    = st.selectbox("Destination Airport", dims["Dest"].codes, format_func=code_label(get_airport_index))
 
     col4, col5 = st.columns(2)
     with col4:
@@ -109,15 +129,15 @@ def app():
         
         # --- Preprocessing & Prediction ---
         try:
-            airline_enc = encoders["Airline"].transform([airline])[0]
-            origin_enc  = encoders["Origin"].transform([origin])[0]
-            dest_enc    = encoders["Dest"].transform([dest])[0]
+            airline_enc = dims["Airline"].id_of(airline)
+            origin_enc  = dims["Origin"].id_of(origin)
+            dest_enc    = dims["Dest"].id_of(dest)
 
             X = np.array([[airline_enc, origin_enc, dest_enc, 
                            dep_delay, distance, month, dow]])
 
-            pred = model.predict(X)[0]
-            prob = model.predict_proba(X)[0][1]
+            labels, proba = predict_with_proba(model, X)
+            pred, prob = labels[0], proba[0][1]
         except Exception as e:
             st.error(f"Error during prediction: {e}")
             st.stop()
@@ -1,20 +1,34 @@
 import streamlit as st
 import pandas as pd
-from utils.run_query import run_query
+from utils.query_batch import run_queries
+from utils.partitions import window_clause
+from utils.ui import date_window_picker
 from utils.theme import inject_premium_ui
 
+# {where} is always a flight_date window (see utils/partitions.window_clause)
+REVENUE_QUERY = "SELECT airline, SUM(revenue) as total_rev FROM sales_data {where} GROUP BY airline;"
+SEATS_QUERY = "SELECT airline, SUM(seats_sold) as seats FROM sales_data {where} GROUP BY airline;"
+PRICE_QUERY = "SELECT airline, AVG(ticket_price) as avg_price FROM sales_data {where} GROUP BY airline;"
+
 def app():
     inject_premium_ui()
     st.header("Airline Comparison Dashboard")
 
+    start, end = date_window_picker("sales_data", key="ac_window")
+    where, params = window_clause(start, end, table="sales_data")
+
+    # independent aggregates: merged into one scan and run on the shared pool
+    frames = run_queries({
+        "revenue": REVENUE_QUERY.format(where=where),
+        "seats": SEATS_QUERY.format(where=where),
+        "price": PRICE_QUERY.format(where=where),
+    }, params)
+
     st.subheader("Revenue by Airline")
-    df1 = run_query("SELECT airline, SUM(revenue) as total_rev FROM sales_data GROUP BY airline;")
-    st.bar_chart(df1.set_index("airline"))
+    st.bar_chart(frames["revenue"].set_index("airline"))
 
     st.subheader("Seats Sold by Airline")
-    df2 = run_query("SELECT airline, SUM(seats_sold) as seats FROM sales_data GROUP BY airline;")
-    st.line_chart(df2.set_index("airline"))
+    st.line_chart(frames["seats"].set_index("airline"))
 
     st.subheader("Average Ticket Price")
-    df3 = run_query("SELECT airline, AVG(ticket_price) as avg_price FROM sales_data GROUP BY airline;")
-    st.dataframe(df3)
+    st.dataframe(frames["price"])
@@ -0,0 +1,120 @@
+# scripts/benchmark_backends.py
+"""
+Runs the same analytical queries against MySQL and/or the embedded DuckDB
+backend and prints a timing comparison.
+
+    python -m scripts.benchmark_backends --backends mysql duckdb --runs 5
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from utils.run_query import run_query
+
+# Portable SQL only (no DATE_FORMAT / strftime), so both backends run it as-is
+BENCHMARK_QUERIES = {
+    "kpis_full_table": """
+        SELECT COUNT(*) AS flights, AVG(arr_delay) AS avg_arr, AVG(dep_delay) AS avg_dep,
+               AVG(cancelled) AS cancel_rate
+        FROM flight_delay
+    """,
+    "route_averages": """
+        SELECT origin, destination, COUNT(*) AS flights, AVG(arr_delay) AS avg_arr
+        FROM flight_delay
+        WHERE arr_delay IS NOT NULL
+        GROUP BY origin, destination
+        ORDER BY avg_arr DESC
+        LIMIT 20
+    """,
+    "airline_by_month": """
+        SELECT airline, EXTRACT(YEAR FROM flight_date) AS yr, EXTRACT(MONTH FROM flight_date) AS mon,
+               COUNT(*) AS flights,
+               SUM(CASE WHEN arr_delay > 15 THEN 1 ELSE 0 END) AS delayed
+        FROM flight_delay
+        GROUP BY airline, EXTRACT(YEAR FROM flight_date), EXTRACT(MONTH FROM flight_date)
+    """,
+    "delay_histogram": """
+        SELECT FLOOR(LEAST(GREATEST(arr_delay, -60), 300) / 5) * 5 AS bin_start, COUNT(*) AS flights
+        FROM flight_delay
+        WHERE arr_delay IS NOT NULL
+        GROUP BY bin_start
+    """,
+    "distinct_routes": """
+        SELECT COUNT(DISTINCT origin, destination) AS routes FROM flight_delay
+    """,
+    "recent_window": """
+        SELECT origin, AVG(dep_delay) AS avg_dep
+        FROM flight_delay
+        WHERE flight_date >= (SELECT MAX(flight_date) FROM flight_delay) - INTERVAL 90 DAY
+        GROUP BY origin
+    """,
+}
+
+# DuckDB has no multi-column COUNT(DISTINCT a, b)
+DUCKDB_OVERRIDES = {
+    "distinct_routes": """
+        SELECT COUNT(DISTINCT (origin, destination)) AS routes FROM flight_delay
+    """,
+}
+
+
+def run_benchmark(backend, runs=3):
+    """
+    Times every benchmark query on `backend` (cache bypassed).
+    Returns one row per query with min / median ms and result rows.
+    """
+    os.environ["DB_BACKEND"] = backend
+    rows = []
+    for name, sql in BENCHMARK_QUERIES.items():
+        if backend == "duckdb":
+            sql = DUCKDB_OVERRIDES.get(name, sql)
+        times = []
+        result_rows = None
+        try:
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                df = run_query(sql, use_cache=False)
+                times.append((time.perf_counter() - t0) * 1000)
+                result_rows = len(df)
+        except Exception as e:
+            print(f"⚠️ {backend}/{name} failed: {e}")
+            continue
+        rows.append({
+            "backend": backend, "query": name,
+            "min_ms": round(min(times), 1), "median_ms": round(statistics.median(times), 1),
+            "rows": result_rows,
+        })
+        print(f"  {backend:<7} {name:<18} {min(times):9.1f} ms")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytical queries per backend.")
+    parser.add_argument("--backends", nargs="+", default=["mysql", "duckdb"], choices=["mysql", "duckdb"])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        print(f"\n=== {backend} ===")
+        results += run_benchmark(backend, args.runs)
+
+    report = pd.DataFrame(results)
+    if report.empty:
+        return
+    table = report.pivot(index="query", columns="backend", values="min_ms")
+    print("\nBest-of-runs (ms):")
+    print(table.to_string())
+
+    os.makedirs("reports", exist_ok=True)
+    out = f"reports/backend_benchmark_{datetime.now().strftime('%Y_%m_%d_%H_%M')}.csv"
+    report.to_csv(out, index=False)
+    print(f"\n[SAVED] Benchmark → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# scripts/benchmark_etl_scaling.py
+"""
+Runs the sharded ETL with increasing worker counts and prints the scaling
+curve (time, rows/s, speedup, parallel efficiency) next to the raw read
+throughput of the input, which bounds what more cores can achieve.
+
+    python -m scripts.benchmark_etl_scaling                           # 1, 2, 4, ... all cores
+    python -m scripts.benchmark_etl_scaling --workers 1 4 8 16 32 --job sales
+    python -m scripts.benchmark_etl_scaling --workers 8 --job both     # vs --job ingest (single pass)
+    python -m scripts.benchmark_etl_scaling --workers 8 --no-profile   # cost of the data profile
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from scripts.prepare_flight_delay_from_raw import prepare_flight_delay, FLIGHT_CSV
+from scripts.prepare_sales_data_from_flightcsv import prepare_sales_data
+from scripts.ingest_raw_flights import ingest_raw_flights
+from utils.parallel_etl import plan_shards, open_shard, run_sharded
+
+
+def default_worker_counts():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def _drain(shard):
+    with open_shard(shard) as f:
+        while f.read(8 * 1024 * 1024):
+            pass
+    return shard.end - shard.start
+
+
+def read_throughput(paths, workers):
+    """
+    MB/s for just reading the input bytes on `workers` processes.
+    """
+    t0 = time.perf_counter()
+    total = sum(run_sharded(_drain, plan_shards(paths, n_shards=workers), workers))
+    return total / 1024 ** 2 / (time.perf_counter() - t0)
+
+
+def run_job(job, paths, workers, out_dir, chunksize, profile=True):
+    t0 = time.perf_counter()
+    opts = dict(out_root=out_dir, chunksize=chunksize, workers=workers, profile=profile)
+    if job == "flight_delay":
+        rows = prepare_flight_delay(paths, **opts)["rows"]
+    elif job == "sales":
+        rows = prepare_sales_data(paths, **opts)
+    elif job == "both":
+        # the two prepare scripts back to back (two parses of the raw file)
+        rows = prepare_flight_delay(paths, **opts)["rows"]
+        prepare_sales_data(paths, **opts)
+    else:
+        rows = ingest_raw_flights(paths, **opts)[1]["flight_delay"]
+    return rows, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL throughput by worker count.")
+    parser.add_argument("--input", nargs="+", default=[FLIGHT_CSV])
+    parser.add_argument("--job", choices=["flight_delay", "sales", "both", "ingest"], default="flight_delay")
+    parser.add_argument("--workers", nargs="+", type=int, default=default_worker_counts())
+    parser.add_argument("--chunksize", type=int, default=200000)
+    parser.add_argument("--no-profile", action="store_true", help="run without the data-quality profile")
+    args = parser.parse_args()
+
+    input_mb = sum(os.path.getsize(p) for p in args.input) / 1024 ** 2
+    results = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory(prefix="etl_bench_") as out_dir:
+            rows, seconds = run_job(args.job, args.input, workers, out_dir, args.chunksize,
+                                    profile=not args.no_profile)
+        results.append({
+            "workers": workers,
+            "seconds": seconds,
+            "rows_per_s": rows / seconds,
+            "mb_per_s": input_mb / seconds,
+            "read_only_mb_per_s": read_throughput(args.input, workers),
+        })
+
+    report = pd.DataFrame(results)
+    base = report.loc[report["workers"].idxmin(), "seconds"]
+    report["speedup"] = base / report["seconds"]
+    report["efficiency"] = report["speedup"] / (report["workers"] / report["workers"].min())
+
+    print(f"\n{args.job}: {input_mb:,.0f} MB input, {rows:,} rows\n")
+    print(report.round(2).to_string(index=False))
+
+    os.makedirs("reports", exist_ok=True)
+    out = f"reports/etl_scaling_{args.job}_{datetime.now().strftime('%Y_%m_%d_%H_%M')}.csv"
+    report.to_csv(out, index=False)
+    print(f"\n[SAVED] Scaling curve → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# scripts/benchmark_memory.py
+"""
+Compares reading a flight CSV as Python-object strings (the old readers)
+with the typed schema from utils/schemas.py: in-memory size, parse time
+and a typical group-by.
+
+    python -m scripts.benchmark_memory                                   # data/raw/flight_delay.csv
+    python -m scripts.benchmark_memory --csv data/raw/flight.csv --schema raw_flights --nrows 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from utils.schemas import get_schema, read_csv_options, csv_columns, CATEGORY, DATE
+
+GROUP_BY = {
+    "flight_delay": (["airline", "origin"], "arr_delay"),
+    "raw_flights": (["AIRLINE", "ORIGIN_AIRPORT"], "ARRIVAL_DELAY"),
+    "sales_data": (["airline", "route"], "revenue"),
+}
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def read_as_strings(path, schema, columns, nrows=None):
+    """
+    The old path: everything as str, then converted column by column.
+    """
+    df = pd.read_csv(path, dtype=str, usecols=columns, nrows=nrows, low_memory=False)
+    for col in columns:
+        dtype = schema[col]
+        if dtype == DATE:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif dtype not in (CATEGORY, "string", "boolean"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def read_typed(path, columns, schema_name, nrows=None):
+    return pd.read_csv(path, usecols=columns, nrows=nrows, **read_csv_options(schema_name, columns))
+
+
+def group_by(df, keys, value):
+    return df.groupby(keys, observed=True)[value].mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory / speed of typed vs string CSV reads.")
+    parser.add_argument("--csv", default="data/raw/flight_delay.csv")
+    parser.add_argument("--schema", default="flight_delay", choices=list(GROUP_BY))
+    parser.add_argument("--nrows", type=int, help="only read the first N rows")
+    args = parser.parse_args()
+
+    schema = get_schema(args.schema)
+    columns = [c for c in csv_columns(args.csv) if c in schema]
+    keys, value = GROUP_BY[args.schema]
+
+    old, old_read = _timed(lambda: read_as_strings(args.csv, schema, columns, args.nrows))
+    old_mb = old.memory_usage(deep=True).sum() / 1024 ** 2
+    _, old_group = _timed(lambda: group_by(old, keys, value))
+    del old
+
+    new, new_read = _timed(lambda: read_typed(args.csv, columns, args.schema, args.nrows))
+    new_mb = new.memory_usage(deep=True).sum() / 1024 ** 2
+    _, new_group = _timed(lambda: group_by(new, keys, value))
+
+    report = pd.DataFrame({
+        "strings": [old_mb, old_read, old_group],
+        "typed": [new_mb, new_read, new_group],
+    }, index=["memory_mb", "read_s", "groupby_s"])
+    report["ratio"] = report["strings"] / report["typed"]
+
+    print(f"{len(new):,} rows x {len(columns)} columns from {args.csv}\n")
+    print(report.round(3).to_string())
+    print("\nPer-column memory (typed, MB):")
+    print((new.memory_usage(deep=True, index=False) / 1024 ** 2).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
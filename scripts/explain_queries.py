@@ -0,0 +1,156 @@
+# scripts/explain_queries.py
+"""
+EXPLAIN every query the dashboard issues and flag full table scans.
+
+    python -m scripts.explain_queries                 # plan check only
+    python -m scripts.explain_queries --report        # time, migrate, time again
+
+--report times each query (cache disabled), applies pending migrations
+from sql/migrations, times them again and writes a before/after report
+to reports/.
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from importlib import import_module
+
+import pandas as pd
+from sqlalchemy import text
+
+from utils.db_connection import get_db_engine
+from utils.run_query import run_query, capture_queries
+from utils.delay_aggregates import (
+    flight_date_range, delay_kpis, route_delay_averages, delay_histogram, recent_flights
+)
+from utils.migrations import apply_migrations
+from utils.partitions import window_clause
+from utils.snapshot import snapshots_disabled
+
+# page module -> names of module-level SQL constants it runs
+PAGE_QUERIES = {
+    "app_pages.4_sales_insights": ["SALES_QUERY"],
+    "app_pages.5_revenue_forecast": ["HISTORY_QUERY"],
+    "app_pages.9_airline_comparison": ["REVENUE_QUERY", "SEATS_QUERY", "PRICE_QUERY"],
+}
+
+FULL_SCAN_TYPES = {"ALL", "index"}
+
+
+def collect_app_queries():
+    """
+    Returns [(name, sql, params)] for every query the pages issue.
+    Delay Analyzer queries are captured from delay_aggregates over its
+    default window, raw-table variants included, with snapshots off (they
+    would answer without SQL); page SQL templates get the same default
+    window the pages start with.
+    """
+    queries = []
+
+    with snapshots_disabled(), capture_queries() as captured:
+        flight_date_range()
+        delay_kpis(use_summaries=False)
+        delay_kpis()
+        route_delay_averages(use_summaries=False)
+        route_delay_averages()
+        delay_histogram()
+        recent_flights()
+    if not captured:
+        raise RuntimeError("No Delay Analyzer queries were captured; nothing to EXPLAIN.")
+    for i, (sql, params) in enumerate(captured):
+        queries.append((f"delay_analyzer[{i}]", sql, params))
+
+    for module_name, names in PAGE_QUERIES.items():
+        try:
+            module = import_module(module_name)
+        except Exception as e:
+            print(f"⚠️ Could not import {module_name}: {e}")
+            continue
+        for name in names:
+            sql, params = getattr(module, name), {}
+            if "{where}" in sql:
+                where, params = window_clause(table="sales_data")
+                sql = sql.format(where=where)
+            queries.append((f"{module_name.split('.')[-1]}.{name}", sql, params))
+
+    return queries
+
+
+def explain(engine, sql, params):
+    """
+    Returns (scan_flags, plan DataFrame). On MySQL a table access of type
+    ALL (full table scan) or index (full index scan) is flagged.
+    """
+    with engine.connect() as conn:
+        result = conn.execute(text("EXPLAIN " + sql.strip().rstrip(";")), params)
+        plan = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+    flags = []
+    if engine.dialect.name == "mysql" and "type" in plan.columns:
+        for _, row in plan.iterrows():
+            if row["type"] in FULL_SCAN_TYPES:
+                flags.append(f"{row['type']} scan on {row['table']} (~{row['rows']} rows)")
+    return flags, plan
+
+
+def time_query(sql, params, runs=3):
+    """
+    Best-of-`runs` wall time in ms with the result cache bypassed.
+    """
+    best = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        run_query(sql, params, use_cache=False)
+        elapsed = (time.perf_counter() - t0) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check_plans(engine, queries):
+    rows = []
+    for name, sql, params in queries:
+        try:
+            flags, _ = explain(engine, sql, params)
+            status = "FULL SCAN: " + "; ".join(flags) if flags else "ok"
+        except Exception as e:
+            status = f"EXPLAIN failed: {e}"
+        rows.append({"query": name, "plan": status})
+        print(f"{'⚠️ ' if status != 'ok' else '✅'} {name}: {status}")
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN / time the dashboard queries.")
+    parser.add_argument("--report", action="store_true", help="time before and after applying migrations")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = get_db_engine()
+    queries = collect_app_queries()
+    print(f"Collected {len(queries)} app queries.\n")
+
+    before = check_plans(engine, queries)
+    if not args.report:
+        return
+
+    before["before_ms"] = [time_query(sql, params, args.runs) for _, sql, params in queries]
+
+    applied = apply_migrations(engine)
+    print(f"\nApplied migrations: {applied or 'none pending'}\n")
+
+    after = check_plans(engine, queries)
+    report = before.rename(columns={"plan": "plan_before"})
+    report["plan_after"] = after["plan"]
+    report["after_ms"] = [time_query(sql, params, args.runs) for _, sql, params in queries]
+    report["speedup"] = (report["before_ms"] / report["after_ms"]).round(2)
+
+    os.makedirs("reports", exist_ok=True)
+    out = f"reports/query_timing_{datetime.now().strftime('%Y_%m_%d_%H_%M')}.csv"
+    report.to_csv(out, index=False)
+
+    print(report[["query", "before_ms", "after_ms", "speedup"]].round(1).to_string(index=False))
+    print(f"\n[SAVED] Timing report → {out}")
+
+
+if __name__ == "__main__":
+    main()
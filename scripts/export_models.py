@@ -0,0 +1,93 @@
+# scripts/export_models.py
+"""
+Exports the delay pipeline and the cancellation forest to the array-based
+form the pages and the prediction server use for single predictions
+(utils/tree_export.py). Training already does this; run it for models
+trained before the export existed.
+
+    python -m scripts.export_models                          # both, from models/
+    python -m scripts.export_models --models delay --check data/raw/flight_delay.csv
+
+--check compares the exported probabilities with the sklearn model on rows
+of a CSV and times both for 1, 10 and 100 rows.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import MODEL_FILES, cancellation_features
+from utils.dimensions import bundle_dimensions
+from utils.load_models import load_delay_model, load_cancellation_model
+from utils.ml_utils import CATEGORICAL, NUMERIC, prepare_delay_frame, delay_feature_matrix
+from utils.tree_export import export_model, save_compiled
+
+
+def _timed(fn, repeat=20):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def check(model, compiled, X):
+    """
+    Max abs difference of the probabilities, and ms per call by batch size.
+    """
+    diff = float(np.abs(model.predict_proba(X) - compiled.predict_proba(X)).max())
+    rows = []
+    for n in (1, 10, 100):
+        batch = X.iloc[:n]
+        sklearn_ms = _timed(lambda: model.predict_proba(batch))
+        compiled_ms = _timed(lambda: compiled.predict_proba(batch))
+        rows.append({"rows": n, "sklearn_ms": sklearn_ms, "compiled_ms": compiled_ms,
+                     "speedup": sklearn_ms / compiled_ms})
+    return diff, pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the forests to contiguous NumPy node arrays.")
+    parser.add_argument("--models", nargs="+", choices=sorted(MODEL_FILES), default=sorted(MODEL_FILES))
+    parser.add_argument("--check", help="CSV of flights to verify and time the export on")
+    parser.add_argument("--rows", type=int, default=2000, help="rows of --check to compare")
+    args = parser.parse_args()
+
+    sample = pd.read_csv(args.check, nrows=args.rows, low_memory=False) if args.check else None
+    for kind in args.models:
+        path = MODEL_FILES[kind]
+        if kind == "delay":
+            model = load_delay_model(path)
+            if model is None:
+                continue
+            columns = CATEGORICAL + NUMERIC
+        else:
+            bundle = load_cancellation_model(path)
+            if bundle is None:
+                continue
+            model = bundle["model"]
+            columns = None
+        try:
+            compiled = export_model(model, columns)
+        except ValueError as e:
+            # e.g. the hist / sgd delay learners: the pages use the sklearn model
+            print(f"⚠️ Skipping {kind}: {e}")
+            continue
+
+        out = save_compiled(compiled, path)
+        print(f"[SAVED] {kind}: {compiled.n_estimators} trees, {compiled.n_nodes:,} nodes, "
+              f"depth {compiled.max_depth} → {out}")
+
+        if sample is not None:
+            if kind == "delay":
+                X = delay_feature_matrix(prepare_delay_frame(sample))
+            else:
+                X = cancellation_features(sample, bundle_dimensions(bundle), bundle["features"])
+            diff, timings = check(model, compiled, X)
+            print(f"  max |Δ probability| over {len(X):,} rows: {diff:.3g}")
+            print(timings.round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
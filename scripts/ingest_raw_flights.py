@@ -0,0 +1,184 @@
+# scripts/ingest_raw_flights.py
+"""
+Single-pass ingestion of the raw BTS flight.csv into both flight_delay and
+sales_data.
+
+    python -m scripts.ingest_raw_flights                         # data/raw/flight.csv
+    python -m scripts.ingest_raw_flights --input data/raw/2015_*.csv --workers 16
+
+The two prepare scripts each parse the raw file and rebuild the airline
+mapping and flight dates. Here every chunk is parsed once, the shared
+columns (utils/raw_flights.py) are built once, and both transforms derive
+their output from them; each output goes to its own PartitionedWriter.
+Sharding, staging and the incremental manifest work as in the prepare
+scripts: an input is reprocessed when it changed for either output.
+"""
+import argparse
+import os
+import shutil
+import time
+from collections import Counter
+from functools import partial
+
+import pandas as pd
+
+from utils.schemas import read_csv_options, csv_columns
+from utils.raw_flights import RAW_COLUMNS, shared_columns
+from utils.dimensions import get_airline_index, get_airport_index
+from utils.partitions import PartitionedWriter, PARTITION_ROOT, staging_dir
+from utils.etl_manifest import EtlManifest, source_tag, select_inputs, publish_job
+from utils.parallel_etl import plan_shards, open_shard, run_sharded, ETL_WORKERS
+from utils.profiler import DataProfile, save_profiles, ETL_PROFILE
+from scripts.prepare_flight_delay_from_raw import (
+    transform_chunk, FLIGHT_CSV, AIRLINE_CSV, AIRPORT_CSV, DEFAULT_CHUNKSIZE,
+)
+from scripts.prepare_sales_data_from_flightcsv import transform_sales_chunk
+
+JOBS = ("flight_delay", "sales_data")
+
+_lookups = {}
+
+
+def _install_lookups(airlines, airports):
+    _lookups["airlines"] = airlines
+    _lookups["airports"] = airports
+
+
+# ============================================================
+# SHARD WORKER (runs in the ETL process pool)
+# ============================================================
+def process_shard(shard, chunksize, staging, out_root, profile=ETL_PROFILE):
+    """
+    Parses one shard once and writes both outputs to their staging
+    directories. Returns ({job: months}, {job: rows}, flight_delay Counter,
+    {job: DataProfile} or None).
+    """
+    t0 = time.perf_counter()
+    usecols = [c for c in csv_columns(shard.path) if c in RAW_COLUMNS]
+    prefix = f"{source_tag(shard.path)}-s{shard.index:05d}"
+    writers = {
+        job: PartitionedWriter(job, out_root, replace=True, staging=staging[job], prefix=prefix)
+        for job in JOBS
+    }
+    rows = Counter()
+    totals = Counter()
+    profiles = {job: DataProfile(job) for job in JOBS} if profile else None
+
+    with open_shard(shard) as f:
+        reader = pd.read_csv(f, usecols=usecols, chunksize=chunksize or None,
+                             **read_csv_options("raw_flights", usecols))
+        for chunk in (reader if chunksize else [reader]):
+            shared = shared_columns(chunk)
+            flights, counts = transform_chunk(chunk, _lookups["airlines"], _lookups["airports"], shared)
+            sales = transform_sales_chunk(chunk, _lookups["airlines"], shared)
+            if profiles:
+                profiles["flight_delay"].update(flights)
+                profiles["sales_data"].update(sales)
+            writers["flight_delay"].write(flights)
+            writers["sales_data"].write(sales)
+            rows["flight_delay"] += len(flights)
+            rows["sales_data"] += len(sales)
+            totals.update(counts)
+
+    months = {job: w.finish() for job, w in writers.items()}
+    if profiles:
+        profiles["flight_delay"].record_checks(totals)
+        for job, p in profiles.items():
+            p.drop("no flight_date (not in any month partition)", writers[job].rows_without_date)
+            # the shared parse is split evenly, so each job's overhead is against half the time
+            p.etl_seconds = (time.perf_counter() - t0) / len(JOBS)
+    return months, rows, totals, profiles
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+def ingest_raw_flights(flight_csv=FLIGHT_CSV, airline_csv=AIRLINE_CSV, airport_csv=AIRPORT_CSV,
+                       out_root=PARTITION_ROOT, chunksize=DEFAULT_CHUNKSIZE, workers=None, incremental=True,
+                       profile=ETL_PROFILE):
+    """
+    Builds flight_delay and sales_data under `out_root` from one read of
+    `flight_csv` (one path or a list), with one data profile per output
+    unless `profile` is off. Returns (flight_delay Counter, {job: rows written}).
+    """
+    paths = [flight_csv] if isinstance(flight_csv, (str, os.PathLike)) else list(flight_csv)
+    manifest = EtlManifest.load(out_root)
+    digests, full = select_inputs(manifest, JOBS, paths, incremental)
+    if not digests:
+        print("Nothing to do: every input is already processed.")
+        return Counter(), Counter()
+    paths = list(digests)
+
+    airlines = get_airline_index(airline_csv)
+    airports = get_airport_index(airport_csv)
+    print(f"Loaded lookups: {len(airlines)} airlines, {len(airports)} airports")
+
+    workers = workers or ETL_WORKERS
+    shards = plan_shards(paths, n_shards=workers)
+    print(f"Split input into {len(shards)} shard(s) for {min(workers, len(shards))} worker(s)")
+
+    staging = {job: str(staging_dir(job, out_root)) for job in JOBS}
+    for path in staging.values():
+        os.makedirs(path, exist_ok=True)
+    totals, written = Counter(), Counter()
+
+    def progress(shard, result):
+        written.update(result[1])
+        totals.update(result[2])
+        print(f"  shard {shard.index + 1}/{len(shards)}: "
+              f"{written['flight_delay']:,} flight_delay / {written['sales_data']:,} sales_data rows")
+
+    try:
+        results = run_sharded(
+            partial(process_shard, chunksize=chunksize, staging=staging, out_root=out_root, profile=profile),
+            shards, workers, initializer=_install_lookups,
+            initargs=(airlines, airports), on_result=progress,
+        )
+        if profile:
+            for job in JOBS:
+                save_profiles([r[3][job] for r in results], job)
+        # both outputs are published only after every shard succeeded
+        for job in JOBS:
+            months, rows = {p: set() for p in paths}, Counter()
+            for shard, (shard_months, shard_rows, _, _) in zip(shards, results):
+                months[shard.path].update(shard_months[job])
+                rows[shard.path] += shard_rows[job]
+            publish_job(manifest, job, staging[job], digests, months, rows, out_root, full)
+        manifest.save()
+    finally:
+        for path in staging.values():
+            shutil.rmtree(path, ignore_errors=True)
+    return totals, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build flight_delay and sales_data from one pass over the raw CSV.")
+    parser.add_argument("--input", nargs="+", default=[FLIGHT_CSV], help="one or more raw flight CSVs")
+    parser.add_argument("--output-root", default=str(PARTITION_ROOT), help="Parquet dataset root")
+    parser.add_argument("--airlines", default=AIRLINE_CSV)
+    parser.add_argument("--airports", default=AIRPORT_CSV)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="rows per chunk (0 = read each shard at once)")
+    parser.add_argument("--workers", type=int, default=ETL_WORKERS, help="ETL processes (default: all cores)")
+    parser.add_argument("--full", action="store_true",
+                        help="reprocess every input even if the manifest says it is unchanged")
+    parser.add_argument("--no-profile", action="store_true", help="skip the data-quality profiles")
+    args = parser.parse_args()
+
+    totals, written = ingest_raw_flights(
+        args.input, args.airlines, args.airports, args.output_root,
+        args.chunksize, args.workers, incremental=not args.full,
+        profile=ETL_PROFILE and not args.no_profile,
+    )
+
+    print(f"[SUCCESS] Wrote flight_delay and sales_data to: {args.output_root}")
+    print("Rows:", written["flight_delay"], "flight_delay /", written["sales_data"], "sales_data")
+    print("Missing dep_delay:", totals["missing_dep_delay"])
+    print("Missing arr_delay:", totals["missing_arr_delay"])
+    print("Missing flight_date:", totals["missing_flight_date"])
+    print("Unknown airline codes:", totals["unknown_airline"])
+    print("Unknown origin / destination airports:", totals["unknown_origin"], "/", totals["unknown_destination"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# scripts/load_test_model_server.py
+"""
+Load test for the prediction server (scripts/serve_models.py): concurrent
+keep-alive clients each send single-row requests, once per concurrency
+level, and the client-side latency percentiles and throughput are printed
+next to the server's batch sizes for that run.
+
+    python -m scripts.serve_models &
+    python -m scripts.load_test_model_server --concurrency 1 8 32 128 --requests 5000
+    python -m scripts.load_test_model_server --model cancel --input data/raw/flight.csv
+    python -m scripts.load_test_model_server --local --max-batch 64 --max-wait-ms 5   # in-process server
+
+Rows are sampled from --input (a flight_delay / raw BTS CSV) or a built-in
+example. The table is saved to reports/model_server_load_<model>_<date>.csv.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.model_server import ModelServer, SERVER_HOST, SERVER_PORT, MAX_BATCH, MAX_WAIT_MS
+
+EXAMPLE_ROWS = {
+    "delay": {"flight_date": "2015-06-01", "airline": "AA", "origin": "JFK", "destination": "LAX",
+              "dep_delay": 5, "distance": 2475, "taxi_out": 18},
+    "cancel": {"airline": "AA", "origin": "JFK", "destination": "LAX", "dep_delay": 5,
+               "distance": 2475, "flight_date": "2015-06-01"},
+}
+
+
+def sample_rows(path, model, n=1000):
+    """
+    Up to `n` request bodies from a CSV, or the example row.
+    """
+    if not path:
+        return [json.dumps(EXAMPLE_ROWS[model]).encode()]
+    df = pd.read_csv(path, nrows=max(n * 10, 10000), low_memory=False)
+    df = df.sample(min(n, len(df)), random_state=0)
+    return [json.dumps({k: v for k, v in row.items() if pd.notna(v)}, default=str).encode()
+            for row in df.to_dict("records")]
+
+
+class Client:
+    """
+    One keep-alive HTTP/1.1 connection.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=b""):
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def _metrics(host, port, model):
+    client = Client(host, port)
+    await client.connect()
+    try:
+        _, metrics = await client.request("GET", "/metrics")
+    finally:
+        client.close()
+    return metrics["models"][model]
+
+
+async def run_level(host, port, model, bodies, concurrency, requests):
+    """
+    `requests` single-row requests over `concurrency` connections; returns
+    one result row.
+    """
+    before = await _metrics(host, port, model)
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker(offset):
+        nonlocal errors
+        client = Client(host, port)
+        await client.connect()
+        try:
+            for i in counter:
+                body = bodies[(i + offset) % len(bodies)]
+                t0 = time.perf_counter()
+                status, _ = await client.request("POST", f"/predict/{model}", body)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                errors += status != 200
+        finally:
+            client.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    seconds = time.perf_counter() - t0
+    after = await _metrics(host, port, model)
+
+    batches = after["batches"] - before["batches"]
+    lat = np.array(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(lat),
+        "errors": errors,
+        "requests_per_sec": round(len(lat) / seconds, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p90_ms": round(float(np.percentile(lat, 90)), 2),
+        "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "mean_batch_size": round((after["rows"] - before["rows"]) / batches, 2) if batches else None,
+    }
+
+
+async def load_test(args):
+    server = None
+    host, port = args.host, args.port
+    if args.local:
+        server = ModelServer([args.model], "127.0.0.1", 0, args.max_batch, args.max_wait_ms)
+        await server.start()
+        host, port = server.host, server.port
+
+    bodies = sample_rows(args.input, args.model)
+    try:
+        results = []
+        for concurrency in args.concurrency:
+            result = await run_level(host, port, args.model, bodies, concurrency, args.requests)
+            print(f"  concurrency {concurrency}: {result['requests_per_sec']:,.0f} req/s, "
+                  f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, "
+                  f"mean batch {result['mean_batch_size']}")
+            results.append(result)
+        metrics = await _metrics(host, port, args.model)
+    finally:
+        if server is not None:
+            await server.close()
+    return pd.DataFrame(results), metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local prediction server.")
+    parser.add_argument("--model", choices=["delay", "cancel"], default="delay")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32, 128],
+                        help="concurrent connections, one run per value")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per run")
+    parser.add_argument("--input", help="CSV to sample request rows from")
+    parser.add_argument("--local", action="store_true", help="start a server in this process instead")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="(--local) max batch size")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS, help="(--local) max batch wait")
+    args = parser.parse_args()
+
+    report, metrics = asyncio.run(load_test(args))
+    print(f"\n{args.model} model server, {args.requests} requests per run\n")
+    print(report.to_string(index=False))
+    print("\nServer batch sizes (all runs):", metrics["batch_size_histogram"])
+    print("Server latency (ms):", metrics["latency_ms"], "inference (ms):", metrics["inference_ms"])
+
+    os.makedirs("reports", exist_ok=True)
+    out = f"reports/model_server_load_{args.model}_{datetime.now().strftime('%Y_%m_%d_%H_%M')}.csv"
+    report.to_csv(out, index=False)
+    print(f"\n[SAVED] Load test → {out}")
+
+
+if __name__ == "__main__":
+    main()
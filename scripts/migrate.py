@@ -0,0 +1,23 @@
+# scripts/migrate.py
+import argparse
+from utils.migrations import migration_status, apply_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned SQL migrations from sql/migrations.")
+    parser.add_argument("command", choices=["status", "up"], nargs="?", default="up")
+    parser.add_argument("--to", type=int, help="apply up to this version")
+    parser.add_argument("--dry-run", action="store_true", help="print statements without running them")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        for version, name, state in migration_status():
+            print(f"{version:03d}_{name}: {state}")
+        return
+
+    applied = apply_migrations(target=args.to, dry_run=args.dry_run)
+    print(f"[SUCCESS] Applied {len(applied)} migration(s).")
+
+
+if __name__ == "__main__":
+    main()
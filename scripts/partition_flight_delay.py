@@ -0,0 +1,89 @@
+# scripts/partition_flight_delay.py
+"""
+Manage monthly partitions of flight_delay.
+
+    python -m scripts.partition_flight_delay list
+    python -m scripts.partition_flight_delay apply            # one-time repartition
+    python -m scripts.partition_flight_delay extend --through 2016-12
+    python -m scripts.partition_flight_delay detach --month 2015-01
+    python -m scripts.partition_flight_delay export-files     # Parquet layout for the embedded backend
+    python -m scripts.partition_flight_delay export-files --table sales_data
+    python -m scripts.partition_flight_delay detach-files --month 2015-01
+"""
+import argparse
+import pandas as pd
+from sqlalchemy import text
+
+from utils.db_connection import get_db_engine
+from utils.run_query import stream_table
+from utils.partitions import (
+    partition_table_ddl, list_partitions, add_month_partitions, detach_partition,
+    write_partitioned, detach_file_partition, list_file_partitions
+)
+
+TABLE = "flight_delay"
+
+
+def apply_partitioning(engine, ahead_months=12):
+    """
+    Repartitions flight_delay by month from its first date through
+    `ahead_months` past its last date. This rewrites the table once.
+    """
+    with engine.connect() as conn:
+        start, end = conn.execute(text(f"SELECT MIN(flight_date), MAX(flight_date) FROM {TABLE}")).fetchone()
+    if start is None:
+        raise RuntimeError(f"{TABLE} is empty — load data first.")
+
+    end = pd.Timestamp(end) + pd.DateOffset(months=ahead_months)
+    ddl = partition_table_ddl(TABLE, start, end)
+    print(ddl.splitlines()[0], "...")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(ddl)
+
+
+def export_files(table=TABLE, chunksize=200000):
+    """
+    Writes `table` into the monthly Parquet layout (data/partitions).
+    """
+    total = 0
+    for chunk in stream_table(table, chunksize=chunksize):
+        write_partitioned(chunk, table)
+        total += len(chunk)
+        print(f"  exported {total:,} rows")
+    print(f"[SUCCESS] {len(list_file_partitions(table))} monthly file partitions for {table}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of flight_delay.")
+    parser.add_argument("command", choices=["list", "apply", "extend", "detach", "export-files", "detach-files"])
+    parser.add_argument("--month", help="YYYY-MM to detach")
+    parser.add_argument("--through", help="YYYY-MM to extend partitions through")
+    parser.add_argument("--archive-table", help="archive table name for detach")
+    parser.add_argument("--allow-copy", action="store_true",
+                        help="extend even when pmax holds rows (REORGANIZE copies them)")
+    parser.add_argument("--table", default=TABLE, choices=["flight_delay", "sales_data"],
+                        help="source table for export-files")
+    args = parser.parse_args()
+
+    engine = get_db_engine()
+
+    if args.command == "list":
+        print(list_partitions(TABLE, engine).to_string(index=False))
+    elif args.command == "apply":
+        apply_partitioning(engine)
+        print("[SUCCESS] flight_delay is partitioned by month.")
+    elif args.command == "extend":
+        added = add_month_partitions(TABLE, args.through, engine, allow_copy=args.allow_copy)
+        print(f"[SUCCESS] Added partitions: {added or 'none'}")
+    elif args.command == "detach":
+        archive = detach_partition(TABLE, args.month, args.archive_table, engine)
+        print(f"[SUCCESS] {args.month} moved to table {archive}")
+    elif args.command == "export-files":
+        export_files(args.table)
+    elif args.command == "detach-files":
+        path = detach_file_partition(TABLE, args.month)
+        print(f"[SUCCESS] {args.month} moved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,156 +1,275 @@
 # scripts/prepare_flight_delay_from_raw.py
+"""
+Builds the cleaned flight_delay data from the raw BTS flight.csv.
+
+    python -m scripts.prepare_flight_delay_from_raw                      # Parquet, 500k-row chunks
+    python -m scripts.prepare_flight_delay_from_raw --format csv         # data/raw/flight_delay.csv
+    python -m scripts.prepare_flight_delay_from_raw --chunksize 0        # whole shard in memory
+    python -m scripts.prepare_flight_delay_from_raw --workers 16 --input data/raw/2015_*.csv
+
+Parquet output goes to data/partitions/flight_delay/year=YYYY/month=MM/
+(see utils/partitions.py). Processed inputs are recorded in the ETL
+manifest; re-runs only transform new or changed input files and swap
+their months in atomically (--full rebuilds every month it produces).
+
+The raw input is split into shards (utils/parallel_etl.py) processed by a
+pool of worker processes; each worker gets the airline / airport
+dimension indexes (utils/dimensions.py) once and reads its shard in
+chunks, resolving each distinct code against them.
+Peak memory is one chunk per worker, whatever the input size. Shard
+outputs, missing-value counters and data profiles are merged in input order.
+"""
+import argparse
 import os
+import shutil
+import time
+from collections import Counter
+from functools import partial
+
 import pandas as pd
-from datetime import datetime
+
+from utils.schemas import read_csv_options, csv_columns
+from utils.raw_flights import RAW_COLUMNS, shared_columns
+from utils.dimensions import get_airline_index, get_airport_index
+from utils.partitions import PartitionedWriter, PARTITION_ROOT, staging_dir
+from utils.etl_manifest import EtlManifest, source_tag, select_inputs, publish_job
+from utils.parallel_etl import plan_shards, open_shard, run_sharded, concat_csv_parts, ETL_WORKERS
+from utils.profiler import DataProfile, save_profiles, ETL_PROFILE
 
 # CONFIG
 FLIGHT_CSV = "data/raw/flight.csv"
 AIRLINE_CSV = "data/raw/airline.csv"   # has IATA_CODE, AIRLINE
 AIRPORT_CSV = "data/raw/airport.csv"   # has IATA_CODE, AIRPORT, CITY, STATE, COUNTRY, LATITUDE, LONGITUDE
 OUT_PATH = "data/raw/flight_delay.csv"
+DEFAULT_CHUNKSIZE = 500000
+JOB = "flight_delay"
 
-# Read CSVs robustly (prevent dtype warnings / memory issues)
-print("Loading CSVs (this may take a while for large files)...")
-flights = pd.read_csv(FLIGHT_CSV, dtype=str, low_memory=False)
-airlines = pd.read_csv(AIRLINE_CSV, dtype=str, low_memory=False)
-airports = pd.read_csv(AIRPORT_CSV, dtype=str, low_memory=False)
-
-print(f"Loaded flights: {len(flights)} rows")
-print(f"Loaded airlines: {len(airlines)} rows")
-print(f"Loaded airports: {len(airports)} rows")
-
-# Standardize column names (strip)
-flights.columns = flights.columns.str.strip()
-airlines.columns = airlines.columns.str.strip()
-airports.columns = airports.columns.str.strip()
-
-# Convert YEAR/MONTH/DAY to numeric then to date
-for c in ["YEAR", "MONTH", "DAY"]:
-    if c in flights.columns:
-        flights[c] = pd.to_numeric(flights[c], errors="coerce").astype("Int64")
-
-def make_flight_date(df):
-    if {"YEAR", "MONTH", "DAY"}.issubset(df.columns):
-        # create date, coerce invalid to NaT
-        return pd.to_datetime(df.loc[:, ["YEAR", "MONTH", "DAY"]], errors="coerce")
-    # fallback to any date-like column
-    for col in ["FLIGHT_DATE", "DATE", "SCHEDULED_DEPARTURE_DATE"]:
-        if col in df.columns:
-            return pd.to_datetime(df[col], errors="coerce")
-    return pd.NaT
-
-flights["flight_date"] = make_flight_date(flights)
-
-# Numeric columns to convert (delays, distance, times)
-num_cols = [
-    "DEPARTURE_DELAY","ARRIVAL_DELAY","TAXI_OUT","TAXI_IN",
-    "DISTANCE","SCHEDULED_DEPARTURE","DEPARTURE_TIME","WHEELS_OFF",
-    "SCHEDULED_ARRIVAL","ARRIVAL_TIME","ELAPSED_TIME","AIR_TIME",
-    "AIR_SYSTEM_DELAY","SECURITY_DELAY","AIRLINE_DELAY","LATE_AIRCRAFT_DELAY","WEATHER_DELAY"
-]
-for col in num_cols:
+
+# ============================================================
+# PER-CHUNK TRANSFORM
+# ============================================================
+def _flag(flights, col):
     if col in flights.columns:
-        flights[col] = pd.to_numeric(flights[col], errors="coerce")
-
-# Standardize key columns (uppercase, strip)
-if "ORIGIN_AIRPORT" in flights.columns:
-    flights["origin"] = flights["ORIGIN_AIRPORT"].astype(str).str.strip()
-else:
-    flights["origin"] = None
-
-if "DESTINATION_AIRPORT" in flights.columns:
-    flights["destination"] = flights["DESTINATION_AIRPORT"].astype(str).str.strip()
-else:
-    flights["destination"] = None
-
-# Flight number
-if "FLIGHT_NUMBER" in flights.columns:
-    flights["flight_number"] = flights["FLIGHT_NUMBER"].astype(str).str.strip()
-else:
-    flights["flight_number"] = None
-
-# Cancelled / Diverted flags
-for f in ["CANCELLED", "DIVERTED"]:
-    if f in flights.columns:
-        flights[f] = pd.to_numeric(flights[f], errors="coerce").fillna(0).astype("Int64")
+        return flights[col].fillna(0)
+    return pd.Series(0, index=flights.index, dtype="Int8")
+
+
+def transform_chunk(flights, airlines, airports, shared=None):
+    """
+    Maps one raw chunk onto the flight_delay schema. `shared` is the
+    chunk's utils/raw_flights.shared_columns() when the caller already
+    built it. Returns (out DataFrame, Counter of missing / unmatched values).
+    """
+    shared = shared or shared_columns(flights)
+    airline_code = shared["airline_code"]
+    origin = shared["origin"]
+    destination = shared["destination"]
+    # dimension lookup on the categories: each distinct code is resolved once
+    airline = airlines.map(airline_code, "name", keep_unmapped=True)
+
+    out = pd.DataFrame(index=flights.index)
+    out["flight_date"] = shared["flight_date"]
+    # prefer airline name, fallback to code
+    out["airline"] = airline
+    out["flight_number"] = flights.get("FLIGHT_NUMBER")
+    out["origin"] = origin
+    out["destination"] = destination
+    out["dep_delay"] = flights.get("DEPARTURE_DELAY")
+    out["arr_delay"] = flights.get("ARRIVAL_DELAY")
+    out["distance"] = flights.get("DISTANCE")
+    out["cancelled"] = _flag(flights, "CANCELLED")
+    # optional additional columns for analysis
+    out["diverted"] = _flag(flights, "DIVERTED")
+    out["air_system_delay"] = flights.get("AIR_SYSTEM_DELAY")
+    out["security_delay"] = flights.get("SECURITY_DELAY")
+    out["airline_delay"] = flights.get("AIRLINE_DELAY")
+    out["late_aircraft_delay"] = flights.get("LATE_AIRCRAFT_DELAY")
+    out["weather_delay"] = flights.get("WEATHER_DELAY")
+
+    # Flag rows with missing essential values
+    out["_missing_dep_delay"] = out["dep_delay"].isna()
+    out["_missing_arr_delay"] = out["arr_delay"].isna()
+    out["_missing_date"] = out["flight_date"].isna()
+
+    counts = Counter({
+        "rows": len(out),
+        "missing_dep_delay": int(out["_missing_dep_delay"].sum()),
+        "missing_arr_delay": int(out["_missing_arr_delay"].sum()),
+        "missing_flight_date": int(out["_missing_date"].sum()),
+        "unknown_airline": int((~airlines.contains(airline_code)).sum()),
+        "unknown_origin": int((~airports.contains(origin)).sum()),
+        "unknown_destination": int((~airports.contains(destination)).sum()),
+    })
+
+    # Clean: convert flight_date to dateonly (no time)
+    out["flight_date"] = out["flight_date"].dt.date
+    return out, counts
+
+
+# ============================================================
+# SHARD WORKER (runs in the ETL process pool)
+# ============================================================
+_lookups = {}
+
+
+def _install_lookups(airlines, airports):
+    _lookups["airlines"] = airlines
+    _lookups["airports"] = airports
+
+
+def process_shard(shard, chunksize, output_format, staging, out_root, profile=ETL_PROFILE):
+    """
+    Transforms one shard of the raw file. Parquet output is staged under
+    `staging` (published by the caller); CSV output goes to a per-shard
+    file there. Returns (months or csv path, Counter, DataProfile or None).
+    """
+    t0 = time.perf_counter()
+    usecols = [c for c in csv_columns(shard.path) if c in RAW_COLUMNS]
+    totals = Counter()
+    profile = DataProfile(JOB) if profile else None
+    with open_shard(shard) as f:
+        reader = pd.read_csv(f, usecols=usecols, chunksize=chunksize or None,
+                             **read_csv_options("raw_flights", usecols))
+        chunks = reader if chunksize else [reader]
+
+        if output_format == "parquet":
+            writer = PartitionedWriter(JOB, out_root, replace=True,
+                                       staging=staging, prefix=f"{source_tag(shard.path)}-s{shard.index:05d}")
+            for chunk in chunks:
+                out, counts = transform_chunk(chunk, _lookups["airlines"], _lookups["airports"])
+                if profile:
+                    profile.update(out)
+                writer.write(out)
+                totals.update(counts)
+            result = writer.finish()
+            if profile:
+                profile.drop("no flight_date (not in any month partition)", writer.rows_without_date)
+        else:
+            result = os.path.join(staging, f"shard-{shard.index:05d}.csv")
+            for i, chunk in enumerate(chunks):
+                out, counts = transform_chunk(chunk, _lookups["airlines"], _lookups["airports"])
+                if profile:
+                    profile.update(out)
+                out.to_csv(result, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+                totals.update(counts)
+
+    if profile:
+        profile.record_checks(totals)
+        profile.etl_seconds = time.perf_counter() - t0
+    return result, totals, profile
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+def prepare_flight_delay(flight_csv=FLIGHT_CSV, out_path=OUT_PATH, airline_csv=AIRLINE_CSV,
+                         airport_csv=AIRPORT_CSV, chunksize=DEFAULT_CHUNKSIZE,
+                         output_format="parquet", out_root=PARTITION_ROOT, workers=None,
+                         incremental=True, profile=ETL_PROFILE):
+    """
+    Streams `flight_csv` (one path or a list) through transform_chunk()
+    into monthly Parquet files under `out_root` (output_format="parquet")
+    or `out_path` (csv). Inputs are split into shards processed by
+    `workers` processes (ETL_WORKERS); shard outputs are merged in input
+    order, so the result does not depend on the worker count.
+    chunksize=None (or 0) processes each shard at once.
+
+    Parquet runs are recorded in the ETL manifest (utils/etl_manifest.py).
+    With `incremental`, inputs whose content hash is unchanged are skipped
+    and only the files produced from changed inputs are replaced, month by
+    month. The CSV output is always rebuilt from all inputs.
+    With `profile`, a data-quality profile of the load is written to
+    reports/profiles (utils/profiler.py). Returns the aggregated Counter.
+    """
+    paths = [flight_csv] if isinstance(flight_csv, (str, os.PathLike)) else list(flight_csv)
+    manifest = None
+    if output_format == "parquet":
+        manifest = EtlManifest.load(out_root)
+        digests, full = select_inputs(manifest, JOB, paths, incremental)
+        if not digests:
+            print("Nothing to do: every input is already processed.")
+            return Counter()
+        paths = list(digests)
+
+    airlines = get_airline_index(airline_csv)
+    airports = get_airport_index(airport_csv)
+    print(f"Loaded lookups: {len(airlines)} airlines, {len(airports)} airports")
+
+    workers = workers or ETL_WORKERS
+    shards = plan_shards(paths, n_shards=workers)
+    print(f"Split input into {len(shards)} shard(s) for {min(workers, len(shards))} worker(s)")
+
+    # both outputs are staged and published only after the last shard,
+    # so a failed run never leaves a half-written output behind
+    if output_format == "parquet":
+        staging = staging_dir(JOB, out_root)
     else:
-        flights[f] = 0
-
-# Map airline code (IATA) to airline name using airlines CSV
-# flight file has column AIRLINE (IATA code) — ensure uppercase & stripped
-if "AIRLINE" in flights.columns:
-    flights["AIRLINE_CODE"] = flights["AIRLINE"].astype(str).str.strip()
-else:
-    flights["AIRLINE_CODE"] = None
-
-airlines = airlines.rename(columns={c: c.strip() for c in airlines.columns})
-# find likely airline name column (common names: AIRLINE, Name)
-airline_name_col = None
-for cand in ["AIRLINE","Airline","NAME","Name","airline"]:
-    if cand in airlines.columns:
-        airline_name_col = cand
-        break
-
-if airline_name_col is None and len(airlines.columns) >= 2:
-    # assume second column is name
-    airline_name_col = airlines.columns[1]
-
-airlines_lookup = airlines[["IATA_CODE", airline_name_col]].rename(
-    columns={"IATA_CODE":"AIRLINE_CODE", airline_name_col:"airline_name"}
-)
-
-flights = flights.merge(airlines_lookup, on="AIRLINE_CODE", how="left")
-
-# Enrich origin/destination with airport city names (if available)
-airports = airports.rename(columns={c: c.strip() for c in airports.columns})
-airport_lookup = airports[["IATA_CODE","AIRPORT","CITY","STATE","COUNTRY","LATITUDE","LONGITUDE"]].rename(
-    columns={"IATA_CODE":"iata","AIRPORT":"airport_name","CITY":"city","STATE":"state","COUNTRY":"country","LATITUDE":"lat","LONGITUDE":"lon"}
-)
-
-# left join to get origin city
-flights = flights.merge(airport_lookup, left_on="origin", right_on="iata", how="left", suffixes=("","_origin"))
-# rename origin fields
-if "airport_name" in flights.columns:
-    flights = flights.rename(columns={"airport_name":"origin_airport_name","city":"origin_city","state":"origin_state","country":"origin_country","lat":"origin_lat","lon":"origin_lon"})
-# merge destination (we must avoid overwriting columns from previous merge)
-airport_lookup_dest = airport_lookup.add_suffix("_dest")
-flights = flights.merge(airport_lookup_dest, left_on="destination", right_on="iata_dest", how="left")
-
-# Now build the columns matching flight_history schema:
-# target: flight_date, airline, flight_number, origin, destination, dep_delay, arr_delay, distance, cancelled
-
-out = pd.DataFrame()
-out["flight_date"] = flights["flight_date"]
-# prefer airline name, fallback to code
-out["airline"] = flights.get("airline_name").fillna(flights.get("AIRLINE_CODE"))
-out["flight_number"] = flights.get("flight_number")
-out["origin"] = flights.get("origin")
-out["destination"] = flights.get("destination")
-out["dep_delay"] = flights.get("DEPARTURE_DELAY")
-out["arr_delay"] = flights.get("ARRIVAL_DELAY")
-out["distance"] = flights.get("DISTANCE")
-out["cancelled"] = flights.get("CANCELLED").fillna(0).astype("Int64")
-# optional additional columns for analysis
-out["diverted"] = flights.get("DIVERTED").fillna(0).astype("Int64")
-out["air_system_delay"] = flights.get("AIR_SYSTEM_DELAY")
-out["security_delay"] = flights.get("SECURITY_DELAY")
-out["airline_delay"] = flights.get("AIRLINE_DELAY")
-out["late_aircraft_delay"] = flights.get("LATE_AIRCRAFT_DELAY")
-out["weather_delay"] = flights.get("WEATHER_DELAY")
-
-# Flag rows with missing essential values
-out["_missing_dep_delay"] = out["dep_delay"].isna()
-out["_missing_arr_delay"] = out["arr_delay"].isna()
-out["_missing_date"] = out["flight_date"].isna()
-
-# Clean: convert flight_date to dateonly (no time)
-out["flight_date"] = pd.to_datetime(out["flight_date"], errors="coerce").dt.date
-
-# Save file (CSV)
-os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
-out.to_csv(OUT_PATH, index=False)
-print(f"[SUCCESS] Wrote cleaned flight_delay file to: {OUT_PATH}")
-print("Rows:", len(out))
-print("Missing dep_delay:", out['_missing_dep_delay'].sum())
-print("Missing arr_delay:", out['_missing_arr_delay'].sum())
-print("Missing flight_date:", out['_missing_date'].sum())
+        staging = f"{out_path}.shards"
+    os.makedirs(staging, exist_ok=True)
+    totals = Counter()
+
+    def progress(shard, result):
+        totals.update(result[1])
+        print(f"  shard {shard.index + 1}/{len(shards)}: {totals['rows']:,} rows written")
+
+    try:
+        results = run_sharded(
+            partial(process_shard, chunksize=chunksize, output_format=output_format,
+                    staging=staging, out_root=out_root, profile=profile),
+            shards, workers, initializer=_install_lookups,
+            initargs=(airlines, airports), on_result=progress,
+        )
+        save_profiles([p for _, _, p in results], JOB)
+        if output_format == "csv":
+            concat_csv_parts([part for part, _, _ in results], out_path)
+            return totals
+
+        months = {p: set() for p in paths}
+        rows = Counter()
+        for shard, (shard_months, counts, _) in zip(shards, results):
+            months[shard.path].update(shard_months)
+            rows[shard.path] += counts["rows"]
+        publish_job(manifest, JOB, staging, digests, months, rows, out_root, full)
+        if not full:
+            print(f"Replaced the output of {len(paths)} changed input(s)")
+        manifest.save()
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare flight_delay data from the raw BTS flight.csv.")
+    parser.add_argument("--input", nargs="+", default=[FLIGHT_CSV], help="one or more raw flight CSVs")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--output", default=OUT_PATH, help="CSV output path (--format csv)")
+    parser.add_argument("--output-root", default=str(PARTITION_ROOT), help="Parquet dataset root (--format parquet)")
+    parser.add_argument("--airlines", default=AIRLINE_CSV)
+    parser.add_argument("--airports", default=AIRPORT_CSV)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="rows per chunk (0 = read each shard at once)")
+    parser.add_argument("--workers", type=int, default=ETL_WORKERS, help="ETL processes (default: all cores)")
+    parser.add_argument("--full", action="store_true",
+                        help="reprocess every input even if the manifest says it is unchanged")
+    parser.add_argument("--no-profile", action="store_true", help="skip the data-quality profile")
+    args = parser.parse_args()
+
+    print("Processing flights (streaming)..." if args.chunksize else "Loading flights...")
+    totals = prepare_flight_delay(
+        args.input, args.output, args.airlines, args.airports, args.chunksize,
+        output_format=args.format, out_root=args.output_root, workers=args.workers,
+        incremental=not args.full, profile=ETL_PROFILE and not args.no_profile,
+    )
+
+    target = f"{args.output_root}/flight_delay" if args.format == "parquet" else args.output
+    print(f"[SUCCESS] Wrote cleaned flight_delay data to: {target}")
+    print("Rows:", totals["rows"])
+    print("Missing dep_delay:", totals["missing_dep_delay"])
+    print("Missing arr_delay:", totals["missing_arr_delay"])
+    print("Missing flight_date:", totals["missing_flight_date"])
+    print("Unknown airline codes:", totals["unknown_airline"])
+    print("Unknown origin / destination airports:", totals["unknown_origin"], "/", totals["unknown_destination"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,192 @@
-import pandas as pd
+import argparse
 import os
+import shutil
+import time
+from collections import Counter
+from functools import partial
+
+import pandas as pd
+
+from utils.schemas import read_csv_options
+from utils.raw_flights import shared_columns
+from utils.dimensions import get_airline_index
+from utils.partitions import PartitionedWriter, PARTITION_ROOT, staging_dir
+from utils.etl_manifest import EtlManifest, source_tag, select_inputs, publish_job
+from utils.parallel_etl import plan_shards, open_shard, run_sharded, concat_csv_parts, ETL_WORKERS
+from utils.profiler import DataProfile, save_profiles, ETL_PROFILE
 
 # Configurable defaults
 DEFAULT_SEATS_SOLD = 100
 DEFAULT_TICKET_PRICE = 200
 DEFAULT_CLASS = "Economy"
+DEFAULT_CHUNKSIZE = 500000
+JOB = "sales_data"
 
 # Load CSVs with safe dtype handling
 flight_csv = "data/raw/flight.csv"
 airline_csv = "data/raw/airline.csv"
 airport_csv = "data/raw/airport.csv"
+out_csv = "data/raw/sales_data.csv"
+
+# Only the columns used below, typed at parse time (see utils/schemas.py)
+FLIGHT_COLUMNS = ["YEAR", "MONTH", "DAY", "AIRLINE", "FLIGHT_NUMBER", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT"]
+
+
+def transform_sales_chunk(flights, airlines, shared=None):
+    # stripped codes and flight_date, shared with the flight_delay transform
+    shared = shared or shared_columns(flights)
+    sales = pd.DataFrame(index=flights.index)
+
+    # Convert flight_date safely
+    sales["flight_date"] = shared["flight_date"]
+
+    # Map airline codes to names (one dimension lookup per distinct code)
+    sales["airline"] = airlines.map(shared["airline_code"], "name")
+
+    # Flight number clean
+    sales["flight_number"] = flights["FLIGHT_NUMBER"]
+
+    # origin & destination: ensure string
+    sales["origin"] = shared["origin"]
+    sales["destination"] = shared["destination"]
+
+    # Create route safely
+    sales["route"] = (
+        sales["origin"].astype("string").fillna("") + "-" + sales["destination"].astype("string").fillna("")
+    ).astype("category")
+
+    # Default values
+    sales["seats_sold"] = DEFAULT_SEATS_SOLD
+    sales["ticket_price"] = DEFAULT_TICKET_PRICE
+    sales["revenue"] = sales["seats_sold"] * sales["ticket_price"]
+    sales["class"] = DEFAULT_CLASS
+
+    # Final dataset
+    return sales
+
+
+# Shard worker (runs in the ETL process pool, see utils/parallel_etl.py)
+_lookups = {}
+
+
+def _install_lookups(airlines):
+    _lookups["airlines"] = airlines
+
+
+def process_shard(shard, chunksize, output_format, staging, out_root, profile=ETL_PROFILE):
+    t0 = time.perf_counter()
+    rows = 0
+    profile = DataProfile(JOB) if profile else None
+    with open_shard(shard) as f:
+        reader = pd.read_csv(f, usecols=FLIGHT_COLUMNS, chunksize=chunksize or None,
+                             **read_csv_options("raw_flights", FLIGHT_COLUMNS))
+        chunks = reader if chunksize else [reader]
+
+        if output_format == "parquet":
+            writer = PartitionedWriter(JOB, out_root, replace=True,
+                                       staging=staging, prefix=f"{source_tag(shard.path)}-s{shard.index:05d}")
+            for chunk in chunks:
+                sales = transform_sales_chunk(chunk, _lookups["airlines"])
+                if profile:
+                    profile.update(sales)
+                writer.write(sales)
+                rows += len(sales)
+            result = writer.finish()
+            if profile:
+                profile.drop("no flight_date (not in any month partition)", writer.rows_without_date)
+        else:
+            result = os.path.join(staging, f"shard-{shard.index:05d}.csv")
+            for i, chunk in enumerate(chunks):
+                sales = transform_sales_chunk(chunk, _lookups["airlines"])
+                if profile:
+                    profile.update(sales)
+                sales.to_csv(result, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+                rows += len(sales)
+
+    if profile:
+        profile.etl_seconds = time.perf_counter() - t0
+    return result, rows, profile
+
+
+def prepare_sales_data(flight_path=flight_csv, airline_path=airline_csv, output_format="parquet",
+                       out_path=out_csv, out_root=PARTITION_ROOT, chunksize=DEFAULT_CHUNKSIZE, workers=None,
+                       incremental=True, profile=ETL_PROFILE):
+    # Parquet runs skip inputs the ETL manifest already has (utils/etl_manifest.py);
+    # `profile` writes a data-quality profile of the load (utils/profiler.py)
+    paths = [flight_path] if isinstance(flight_path, (str, os.PathLike)) else list(flight_path)
+    if output_format == "parquet":
+        manifest = EtlManifest.load(out_root)
+        digests, full = select_inputs(manifest, JOB, paths, incremental)
+        if not digests:
+            print("Nothing to do: every input is already processed.")
+            return 0
+        paths = list(digests)
+
+    airlines = get_airline_index(airline_path)
+
+    workers = workers or ETL_WORKERS
+    shards = plan_shards(paths, n_shards=workers)
+    print(f"Split input into {len(shards)} shard(s) for {min(workers, len(shards))} worker(s)")
+
+    # staged and published only after every shard succeeded
+    if output_format == "parquet":
+        staging = staging_dir(JOB, out_root)
+    else:
+        staging = f"{out_path}.shards"
+    os.makedirs(staging, exist_ok=True)
+    totals = Counter()
+
+    def progress(shard, result):
+        totals["rows"] += result[1]
+        print(f"  shard {shard.index + 1}/{len(shards)}: {totals['rows']:,} rows written")
+
+    try:
+        results = run_sharded(
+            partial(process_shard, chunksize=chunksize, output_format=output_format,
+                    staging=staging, out_root=out_root, profile=profile),
+            shards, workers, initializer=_install_lookups, initargs=(airlines,), on_result=progress,
+        )
+        save_profiles([p for _, _, p in results], JOB)
+        if output_format == "parquet":
+            # each input's months replace what it produced before
+            months, rows = {p: set() for p in paths}, Counter()
+            for shard, (shard_months, n, _) in zip(shards, results):
+                months[shard.path].update(shard_months)
+                rows[shard.path] += n
+            publish_job(manifest, JOB, staging, digests, months, rows, out_root, full)
+            manifest.save()
+        else:
+            concat_csv_parts([part for part, _, _ in results], out_path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return totals["rows"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare sales_data from the raw BTS flight.csv.")
+    parser.add_argument("--input", nargs="+", default=[flight_csv], help="one or more raw flight CSVs")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet",
+                        help="monthly Parquet under data/partitions/sales_data, or data/raw/sales_data.csv")
+    parser.add_argument("--output", default=out_csv, help="CSV output path (--format csv)")
+    parser.add_argument("--output-root", default=str(PARTITION_ROOT), help="Parquet dataset root (--format parquet)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="rows per chunk (0 = read each shard at once)")
+    parser.add_argument("--workers", type=int, default=ETL_WORKERS, help="ETL processes (default: all cores)")
+    parser.add_argument("--full", action="store_true",
+                        help="reprocess every input even if the manifest says it is unchanged")
+    parser.add_argument("--no-profile", action="store_true", help="skip the data-quality profile")
+    args = parser.parse_args()
+
+    # Save result
+    rows = prepare_sales_data(
+        args.input, airline_csv, args.format, args.output, args.output_root, args.chunksize, args.workers,
+        incremental=not args.full, profile=ETL_PROFILE and not args.no_profile,
+    )
+    if args.format == "parquet":
+        print(f"[SUCCESS] Saved sales_data to {args.output_root}/sales_data with {rows} rows")
+    else:
+        print(f"[SUCCESS] Saved sales_data.csv with {rows} rows")
+
 
-# Force all columns to string to avoid mixed dtype issues
-flights = pd.read_csv(flight_csv, dtype=str, low_memory=False)
-airlines = pd.read_csv(airline_csv, dtype=str)
-airports = pd.read_csv(airport_csv, dtype=str)
-
-# Convert numeric columns where required
-numeric_cols = ["FLIGHT_NUMBER", "YEAR", "MONTH", "DAY"]
-for col in numeric_cols:
-    flights[col] = pd.to_numeric(flights[col], errors="coerce")
-
-# Merge airline names
-flights = flights.merge(
-    airlines,
-    left_on="AIRLINE",
-    right_on="IATA_CODE",
-    how="left"
-)
-
-# airline name column
-flights["airline"] = flights["AIRLINE_y"]
-
-# Convert flight_date safely
-flights["flight_date"] = pd.to_datetime(
-    flights[["YEAR", "MONTH", "DAY"]],
-    errors="coerce"
-)
-
-# origin & destination: ensure string
-flights["origin"] = flights["ORIGIN_AIRPORT"].astype(str).str.strip()
-flights["destination"] = flights["DESTINATION_AIRPORT"].astype(str).str.strip()
-
-# Create route safely
-flights["route"] = flights["origin"].fillna("") + "-" + flights["destination"].fillna("")
-
-# Flight number clean
-flights["flight_number"] = flights["FLIGHT_NUMBER"].astype("Int64")
-
-# Default values
-flights["seats_sold"] = DEFAULT_SEATS_SOLD
-flights["ticket_price"] = DEFAULT_TICKET_PRICE
-flights["class"] = DEFAULT_CLASS
-flights["revenue"] = flights["seats_sold"] * flights["ticket_price"]
-
-# Final dataset
-sales_data = flights[[
-    "flight_date",
-    "airline",
-    "flight_number",
-    "origin",
-    "destination",
-    "route",
-    "seats_sold",
-    "ticket_price",
-    "revenue",
-    "class"
-]]
-
-# Save result
-os.makedirs("data/raw", exist_ok=True)
-sales_data.to_csv("data/raw/sales_data.csv", index=False)
-
-print(f"[SUCCESS] Saved sales_data.csv with {len(sales_data)} rows")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# scripts/refresh_snapshots.py
+"""
+Rebuilds the memory-mapped snapshots the app reads (utils/snapshot.py).
+
+    python -m scripts.refresh_snapshots                     # flight_delay and sales_data
+    python -m scripts.refresh_snapshots --tables sales_data --source sql
+
+Run it after each ETL / upload; until then the pages read the database,
+since the snapshot is behind its source. Running app processes switch to
+the new version on their next page load; nothing has to be restarted.
+"""
+import argparse
+
+from utils.snapshot import build_snapshot, SNAPSHOT_ROOT, SNAPSHOT_TABLES
+from utils.partitions import PARTITION_ROOT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish new Arrow snapshots of the fact tables.")
+    parser.add_argument("--tables", nargs="+", choices=SNAPSHOT_TABLES, default=list(SNAPSHOT_TABLES))
+    parser.add_argument("--source", choices=["auto", "parquet", "sql"], default="auto",
+                        help="auto = the Parquet layout when present, else SQL")
+    parser.add_argument("--root", default=str(SNAPSHOT_ROOT), help="snapshot directory")
+    parser.add_argument("--partition-root", default=str(PARTITION_ROOT), help="Parquet dataset root")
+    args = parser.parse_args()
+
+    for table in args.tables:
+        build_snapshot(table, args.source, args.root, args.partition_root)
+
+
+if __name__ == "__main__":
+    main()
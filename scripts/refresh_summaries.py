@@ -0,0 +1,28 @@
+# scripts/refresh_summaries.py
+import argparse
+import pandas as pd
+from utils.summary_tables import ensure_summary_tables, refresh_summaries, rebuild_summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh flight_delay summary partials.")
+    parser.add_argument("--full", action="store_true", help="rebuild every date in flight_delay")
+    parser.add_argument("--start", help="first date to refresh (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last date to refresh (YYYY-MM-DD), defaults to --start")
+    args = parser.parse_args()
+
+    ensure_summary_tables()
+
+    if args.full:
+        ranges = rebuild_summaries()
+    elif args.start:
+        days = pd.date_range(args.start, args.end or args.start, freq="D")
+        ranges = refresh_summaries(days)
+    else:
+        parser.error("pass --full or --start/--end")
+
+    print(f"[SUCCESS] Refreshed {len(ranges)} date range(s).")
+
+
+if __name__ == "__main__":
+    main()
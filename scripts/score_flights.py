@@ -0,0 +1,76 @@
+# scripts/score_flights.py
+"""
+Batch risk scores for a whole flight table (e.g. the next-day schedule).
+
+    python -m scripts.score_flights --model delay --input flight_delay --start 2015-06-01 --end 2015-06-01 \\
+        --output reports/delay_scores.parquet
+    python -m scripts.score_flights --model cancel --input data/raw/schedule.csv --table flight_cancel_scores
+    python -m scripts.score_flights --model delay --input schedule.csv --scaling 1 2 4 8   # rows/sec by cores
+
+--input is a .csv / .parquet file, a table of the Parquet layout, or a SQL
+table. Scores go to --output (.csv / .parquet) and / or --table (bulk
+loaded); see utils/batch_scoring.py.
+"""
+import argparse
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from utils.batch_scoring import batch_score, MODEL_FILES, SCORING_WORKERS, SCORING_CHUNKSIZE
+
+
+def scaling_curve(args):
+    """
+    Scores the input once per worker count without writing and saves the
+    throughput curve to reports/.
+    """
+    results = []
+    for workers in args.scaling:
+        stats = batch_score(args.model, args.input, model_path=args.model_path, workers=workers,
+                            chunksize=args.chunksize, start=args.start, end=args.end)
+        results.append({"workers": workers, "rows": stats["rows"], "seconds": stats["seconds"],
+                        "rows_per_sec": stats["rows_per_sec"]})
+
+    report = pd.DataFrame(results)
+    base = report.loc[report["workers"].idxmin(), "rows_per_sec"]
+    report["speedup"] = report["rows_per_sec"] / base
+    report["efficiency"] = report["speedup"] / (report["workers"] / report["workers"].min())
+    print(f"\n{args.model} scoring of {args.input}\n")
+    print(report.round(2).to_string(index=False))
+
+    os.makedirs("reports", exist_ok=True)
+    out = f"reports/scoring_scaling_{args.model}_{datetime.now().strftime('%Y_%m_%d_%H_%M')}.csv"
+    report.to_csv(out, index=False)
+    print(f"\n[SAVED] Scaling curve → {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a flight table with the delay or cancellation model.")
+    parser.add_argument("--model", choices=sorted(MODEL_FILES), default="delay")
+    parser.add_argument("--model-path", help="model file (default: the one in models/)")
+    parser.add_argument("--input", default="flight_delay", help="CSV / Parquet file, Parquet-layout table or SQL table")
+    parser.add_argument("--start", help="first flight_date to score (tables only)")
+    parser.add_argument("--end", help="last flight_date to score (tables only)")
+    parser.add_argument("--output", help="write scores to this .csv / .parquet file")
+    parser.add_argument("--table", help="bulk load scores into this SQL table")
+    parser.add_argument("--workers", type=int, default=SCORING_WORKERS, help="scoring processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=SCORING_CHUNKSIZE, help="rows per predict_proba call")
+    parser.add_argument("--scaling", nargs="+", type=int, help="only measure rows/sec for these worker counts")
+    args = parser.parse_args()
+
+    if args.scaling:
+        scaling_curve(args)
+        return
+    if not args.output and not args.table:
+        parser.error("pass --output and / or --table (or --scaling)")
+
+    batch_score(args.model, args.input, args.output, args.table, args.model_path, args.workers,
+                args.chunksize, args.start, args.end)
+    for target in (args.output, args.table):
+        if target:
+            print(f"[SAVED] Scores → {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# scripts/serve_models.py
+"""
+Serves delay and cancellation probabilities over local HTTP for tools
+that do not go through Streamlit (utils/model_server.py).
+
+    python -m scripts.serve_models                                  # both models on 127.0.0.1:8600
+    python -m scripts.serve_models --models delay --max-batch 128 --max-wait-ms 2
+
+    curl -s localhost:8600/predict/delay -d '{"flight_date": "2015-06-01", "airline": "AA",
+        "origin": "JFK", "destination": "LAX", "dep_delay": 5, "distance": 2475}'
+    curl -s localhost:8600/metrics
+"""
+import argparse
+
+from utils.model_server import serve, SERVER_HOST, SERVER_PORT, MAX_BATCH, MAX_WAIT_MS, INFERENCE_THREADS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local prediction server with micro-batching.")
+    parser.add_argument("--models", nargs="+", choices=["delay", "cancel"], default=["delay", "cancel"])
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="rows per predict_proba call")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="how long a batch waits to fill after its first row")
+    parser.add_argument("--threads", type=int, default=INFERENCE_THREADS, help="inference threads")
+    args = parser.parse_args()
+
+    serve(args.models, args.host, args.port, args.max_batch, args.max_wait_ms, args.threads)
+
+
+if __name__ == "__main__":
+    main()
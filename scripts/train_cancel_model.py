@@ -1,7 +1,8 @@
 import pandas as pd
-import pickle
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
+from utils.dimensions import DimensionIndex, get_airline_index, get_airport_index
+from utils.model_registry import save_model
+from utils.tree_export import export_model, save_compiled
 from sklearn.ensemble import RandomForestClassifier
 
 print("⚡ Starting script...")
@@ -30,12 +31,30 @@ except Exception as e:
 df = df.dropna()
 print("🧹 Missing rows dropped. Remaining rows:", len(df))
 
-encoders = {}
-for col in ["Airline", "Origin", "Dest"]:
-    print(f"🔠 Encoding column: {col}")
-    le = LabelEncoder()
-    df[col] = le.fit_transform(df[col])
-    encoders[col] = le
+def training_index(get_index, codes):
+    """
+    Dense ids for the codes of one training column, in the order of the
+    shared dimension index (utils/dimensions.py); without airline.csv /
+    airport.csv, sorted like a LabelEncoder.
+    """
+    try:
+        base = get_index()
+    except FileNotFoundError as e:
+        print(f"⚠️ {e.filename} not found — encoding from the training codes only")
+        base = DimensionIndex.from_codes([])
+    return base.subset(codes)
+
+
+# Only codes present in the training frame, so the page lists exactly
+# the airlines / airports the forest has seen
+print("🔠 Encoding Airline / Origin / Dest")
+dimensions = {
+    "Airline": training_index(get_airline_index, df["Airline"]),
+    "Origin": training_index(get_airport_index, df["Origin"]),
+    "Dest": training_index(get_airport_index, df["Dest"]),
+}
+for col, index in dimensions.items():
+    df[col] = index.ids(df[col])
 
 X = df.drop("Cancelled", axis=1)
 y = df["Cancelled"]
@@ -56,12 +75,13 @@ model.fit(X_train, y_train)
 print("💾 Saving model bundle...")
 bundle = {
     "model": model,
-    "encoders": encoders,
+    "dimensions": {col: index.codes.tolist() for col, index in dimensions.items()},
     "features": list(X.columns)
 }
 
 try:
-    pickle.dump(bundle, open("models/cancellation_model.pkl", "wb"))
+    save_model(bundle, "models/cancellation_model.pkl")
+    save_compiled(export_model(model), "models/cancellation_model.pkl")
     print("🎉 MODEL SAVED SUCCESSFULLY!")
 except Exception as e:
     print("❌ Saving error:", e)
@@ -1,28 +1,108 @@
-from utils.run_query import run_query
+import argparse
+import os
+from datetime import datetime
+import pandas as pd
+from utils.run_query import stream_table
+from utils.partitions import iter_partitioned, has_dataset
 from utils.ml_utils import train_delay_model, train_revenue_prophet
+from utils.incremental_training import DELAY_COLUMNS, iter_delay_chunks, train_delay_incremental
 
-def main():
-    print("📥 Loading data from MySQL...")
+SALES_COLUMNS = ["flight_date", "revenue"]
+
+CHUNK_SIZE = 100000
+SAMPLE_FRAC = 0.10
+RANDOM_STATE = 42
+
+
+def load_delay_training_sample(sample_frac=SAMPLE_FRAC, chunksize=CHUNK_SIZE, source="sql"):
+    """
+    Streams flight_delay chunk by chunk and keeps a `sample_frac` sample
+    of each, so memory is bounded by the sample instead of the full table.
+    source="parquet" reads the ETL's Parquet files instead of MySQL.
+    """
+    total = 0
+    parts = []
+    for i, chunk in enumerate(iter_delay_chunks(source, chunksize)):
+        total += len(chunk)
+        if 0 < sample_frac < 1:
+            chunk = chunk.sample(frac=sample_frac, random_state=RANDOM_STATE + i)
+        parts.append(chunk)
+
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=DELAY_COLUMNS)
+    return df, total
+
+
+def load_daily_revenue(chunksize=CHUNK_SIZE, source="sql"):
+    """
+    Streams sales_data and reduces each chunk to daily revenue totals.
+    """
+    if source == "parquet":
+        chunks = iter_partitioned("sales_data", SALES_COLUMNS, batch_size=chunksize)
+    else:
+        chunks = stream_table("sales_data", columns=SALES_COLUMNS, chunksize=chunksize)
 
-    flight_df = run_query("SELECT * FROM flight_delay")
-    sales_df  = run_query("SELECT * FROM sales_data")
+    total = 0
+    daily = []
+    for chunk in chunks:
+        total += len(chunk)
+        daily.append(chunk.groupby("flight_date", as_index=False)["revenue"].sum())
 
-    print("Flight rows:", len(flight_df))
-    print("Sales rows:", len(sales_df))
+    if not daily:
+        return pd.DataFrame(columns=SALES_COLUMNS), total
+    df = pd.concat(daily, ignore_index=True).groupby("flight_date", as_index=False)["revenue"].sum()
+    return df, total
+
+
+def _source(table, requested):
+    if requested != "auto":
+        return requested
+    return "parquet" if has_dataset(table) else "sql"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the delay and revenue models.")
+    parser.add_argument("--source", choices=["auto", "parquet", "sql"], default="auto",
+                        help="auto: Parquet files from the ETL when present, else MySQL")
+    parser.add_argument("--learner", choices=["rf", "hist", "sgd"], default="rf",
+                        help="rf: random forest on a 10%% sample; hist / sgd: all rows, streamed")
+    parser.add_argument("--compare", action="store_true",
+                        help="(hist / sgd) also fit the sampled random forest and report both")
+    parser.add_argument("--chunksize", type=int, default=None, help="rows per streamed chunk")
+    args = parser.parse_args()
+
+    flight_source = _source("flight_delay", args.source)
+    sales_source = _source("sales_data", args.source)
 
     # -------------------------------
     # Train Delay Model
     # -------------------------------
-    train_delay_model(
-        flight_df,
-        save_path="models/flight_delay_model.pkl",
-        sample_frac=0.10
-    )
+    if args.learner == "rf":
+        print(f"📥 Streaming data (flight_delay: {flight_source}, sales_data: {sales_source})...")
+        flight_df, flight_rows = load_delay_training_sample(chunksize=args.chunksize or CHUNK_SIZE,
+                                                            source=flight_source)
+        print("Flight rows:", flight_rows, f"(sampled {len(flight_df)})")
+        # sampling already happened per chunk while streaming
+        train_delay_model(
+            flight_df,
+            save_path="models/flight_delay_model.pkl",
+            sample_frac=1.0
+        )
+    else:
+        options = {"chunksize": args.chunksize} if args.chunksize else {}
+        result = train_delay_incremental(args.learner, source=flight_source, compare=args.compare, **options)
+        print(result["report"].round(4).to_string(index=False))
+        os.makedirs("reports", exist_ok=True)
+        out = f"reports/delay_training_{args.learner}_{datetime.now().strftime('%Y_%m_%d_%H_%M')}.csv"
+        result["report"].to_csv(out, index=False)
+        print(f"[SAVED] Training report → {out}")
+
+    sales_df, sales_rows = load_daily_revenue(source=sales_source)
+    print("Sales rows:", sales_rows)
 
     # -------------------------------
     # Train Revenue Prophet (optional)
     # -------------------------------
-    if len(sales_df) > 0:
+    if sales_rows > 0:
         try:
             train_revenue_prophet(
                 sales_df,
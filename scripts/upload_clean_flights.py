@@ -1,24 +1,121 @@
+import argparse
+import os
+
 import pandas as pd
-from utils.upload_to_sql import get_engine, upload_dataframe
+
+from utils.upload_to_sql import get_engine
+from utils.bulk_load import (
+    bulk_replace_months, loaded_partitions, month_fingerprints, month_bounds, iter_parquet_months,
+    make_load_id, make_files_load_id,
+)
+from utils.summary_tables import refresh_summaries
+from utils.schemas import read_csv_options, csv_columns
+from utils.partitions import has_dataset, partition_dir, PARTITION_ROOT
+from utils.etl_manifest import file_sha256
 
 # Path to cleaned CSV
 csv_path = "data/raw/flight_delay.csv"
+TABLE = "flight_delay"
+
+
+def month_days(months):
+    """
+    Every day of the replaced months, so summaries also drop days that
+    no longer have flights.
+    """
+    days = []
+    for label in months:
+        lo, hi = month_bounds(label)
+        days += list(pd.date_range(lo, hi, freq="D", inclusive="left"))
+    return days
+
+
+def upload_parquet(engine, root, full, options):
+    """
+    Loads only the months whose Parquet files changed since the last upload.
+    """
+    current = month_fingerprints(TABLE, root)
+    loaded = {} if full else loaded_partitions(engine, TABLE)
+    changed = sorted(m for m, fp in current.items() if loaded.get(m) != fp)
+    print(f"{len(changed)} of {len(current)} month(s) changed since the last upload")
+    if not changed:
+        return []
+
+    files = [f for m in changed for f in partition_dir(TABLE, pd.Timestamp(f"{m}-01"), root).glob("*.parquet")]
+    # columnar input: no text parsing, dtypes come from the files
+    stats = bulk_replace_months(
+        iter_parquet_months(TABLE, changed, root, options["chunksize"]), TABLE,
+        make_files_load_id(files, TABLE), engine, months=changed,
+        record={m: current[m] for m in changed}, source=f"{root}/{TABLE}",
+        **{k: v for k, v in options.items() if k != "chunksize"},
+    )
+    return stats["months"]
+
+
+def upload_csv(engine, path, full, options):
+    """
+    Loads the CSV if its content changed. It is a full export, so it
+    replaces the whole table, including months it no longer contains.
+    """
+    key = f"file:{os.path.abspath(path)}"
+    digest = file_sha256(path)
+    if not full and loaded_partitions(engine, TABLE).get(key) == digest:
+        print(f"{path} is unchanged since the last upload")
+        return []
+
+    # typed at parse time: categorical codes, Int16 delays, dates
+    reader = pd.read_csv(path, chunksize=options["chunksize"],
+                         **read_csv_options(TABLE, csv_columns(path)))
+    stats = bulk_replace_months(
+        reader, TABLE, make_load_id(path, TABLE), engine, record={key: digest},
+        replace_all=True, source=path,
+        **{k: v for k, v in options.items() if k != "chunksize"},
+    )
+    return stats["months"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load the cleaned flight_delay data into MySQL.")
+    parser.add_argument("--source", choices=["auto", "parquet", "csv"], default="auto",
+                        help="auto: the Parquet dataset if present, else the CSV")
+    parser.add_argument("--csv", default=csv_path)
+    parser.add_argument("--root", default=str(PARTITION_ROOT), help="Parquet dataset root")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=4, help="parallel chunk writers")
+    parser.add_argument("--method", choices=["auto", "infile", "multi"], default="auto")
+    parser.add_argument("--no-resume", action="store_true", help="ignore checkpoints from earlier runs")
+    parser.add_argument("--full", action="store_true", help="reload every month, not only changed ones")
+    args = parser.parse_args()
+
+    # Create SQL engine
+    engine = get_engine()
+
+    source = args.source
+    if source == "auto":
+        source = "parquet" if has_dataset(TABLE, args.root) else "csv"
 
-print("Loading cleaned dataset...")
-df = pd.read_csv(csv_path, low_memory=False)
-print(f"Rows loaded: {len(df)}")
+    options = dict(
+        chunksize=args.chunksize, workers=args.workers,
+        method=args.method, resume=not args.no_resume,
+    )
+    if source == "parquet":
+        print(f"Streaming changed months of {args.root}/{TABLE} to MySQL in chunks of {args.chunksize} rows "
+              f"with {args.workers} writers...")
+        months = upload_parquet(engine, args.root, args.full, options)
+    else:
+        print(f"Streaming {args.csv} to MySQL in chunks of {args.chunksize} rows "
+              f"with {args.workers} writers...")
+        months = upload_csv(engine, args.csv, args.full, options)
 
-# Create SQL engine
-engine = get_engine()
+    if not months:
+        print("\n[SUCCESS] flight_delay is already up to date")
+        return
+    print(f"\n[SUCCESS] Replaced {len(months)} month(s) of MySQL table: {TABLE}")
 
-# Upload in chunks
-chunk_size = 50000
-total_rows = len(df)
-print(f"Uploading to MySQL in chunks of {chunk_size} rows...")
+    # Re-aggregate only the months this load replaced
+    print("Refreshing summary tables...")
+    refresh_summaries(month_days(months), engine)
 
-for i in range(0, total_rows, chunk_size):
-    chunk = df.iloc[i:i+chunk_size]
-    print(f"Uploading rows {i} to {i + len(chunk)}...")
-    upload_dataframe(chunk, "flight_delay", engine, if_exists="append")
 
-print("\n[SUCCESS] Full dataset uploaded to MySQL table: flight_delay")
+if __name__ == "__main__":
+    main()
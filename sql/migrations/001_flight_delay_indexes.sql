@@ -0,0 +1,17 @@
+-- flight_delay is created by pandas.to_sql, so its key columns are TEXT
+-- and cannot be indexed. Give them real types first.
+ALTER TABLE flight_delay
+    MODIFY flight_date DATE,
+    MODIFY airline VARCHAR(100),
+    MODIFY flight_number VARCHAR(20),
+    MODIFY origin VARCHAR(10),
+    MODIFY destination VARCHAR(10);
+
+-- Date-window KPIs, histogram and "latest flights" (covering)
+CREATE INDEX idx_fd_date_delays ON flight_delay (flight_date, arr_delay, dep_delay, cancelled);
+
+-- Per-airline trends
+CREATE INDEX idx_fd_airline_date ON flight_delay (airline, flight_date);
+
+-- Per-route averages
+CREATE INDEX idx_fd_route_date ON flight_delay (origin, destination, flight_date, arr_delay);
@@ -0,0 +1,7 @@
+-- Sales pages filter / order by flight_date and group by airline or route
+CREATE INDEX idx_sales_date ON sales_data (flight_date);
+
+-- Covering index for the airline comparison group-bys
+CREATE INDEX idx_sales_airline_date ON sales_data (airline, flight_date, revenue, seats_sold, ticket_price);
+
+CREATE INDEX idx_sales_route_date ON sales_data (route, flight_date);
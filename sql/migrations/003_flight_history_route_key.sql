@@ -0,0 +1,19 @@
+-- revenue_vs_delay_view joined on CONCAT(origin_airport, '-', destination_airport),
+-- which can never use an index. Store the route key and join on it instead.
+ALTER TABLE flight_history
+    ADD COLUMN route_key VARCHAR(21)
+    AS (CONCAT(origin_airport, '-', destination_airport)) STORED;
+
+CREATE INDEX idx_fh_date_route ON flight_history (flight_date, route_key);
+
+CREATE OR REPLACE VIEW revenue_vs_delay_view AS
+SELECT
+    f.flight_date,
+    f.origin_airport AS origin,
+    f.destination_airport AS destination,
+    f.arr_delay,
+    s.revenue
+FROM flight_history f
+JOIN sales_data s
+    ON f.flight_date = s.flight_date
+    AND f.route_key = s.route;
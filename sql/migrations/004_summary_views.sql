@@ -0,0 +1,23 @@
+-- daily_delay_summary, monthly_airline_performance, airport_delay_rank and
+-- route_performance used to be tables; they are now views over the
+-- *_daily_partials tables (utils/summary_tables.py). Keep any old table as
+-- <name>_legacy so CREATE OR REPLACE VIEW can take the name.
+SET @legacy = (SELECT IF(COUNT(*) > 0, 'RENAME TABLE daily_delay_summary TO daily_delay_summary_legacy', 'DO 0') FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'daily_delay_summary' AND TABLE_TYPE = 'BASE TABLE');
+PREPARE rename_legacy FROM @legacy;
+EXECUTE rename_legacy;
+DEALLOCATE PREPARE rename_legacy;
+
+SET @legacy = (SELECT IF(COUNT(*) > 0, 'RENAME TABLE monthly_airline_performance TO monthly_airline_performance_legacy', 'DO 0') FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'monthly_airline_performance' AND TABLE_TYPE = 'BASE TABLE');
+PREPARE rename_legacy FROM @legacy;
+EXECUTE rename_legacy;
+DEALLOCATE PREPARE rename_legacy;
+
+SET @legacy = (SELECT IF(COUNT(*) > 0, 'RENAME TABLE airport_delay_rank TO airport_delay_rank_legacy', 'DO 0') FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'airport_delay_rank' AND TABLE_TYPE = 'BASE TABLE');
+PREPARE rename_legacy FROM @legacy;
+EXECUTE rename_legacy;
+DEALLOCATE PREPARE rename_legacy;
+
+SET @legacy = (SELECT IF(COUNT(*) > 0, 'RENAME TABLE route_performance TO route_performance_legacy', 'DO 0') FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'route_performance' AND TABLE_TYPE = 'BASE TABLE');
+PREPARE rename_legacy FROM @legacy;
+EXECUTE rename_legacy;
+DEALLOCATE PREPARE rename_legacy;
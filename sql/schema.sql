@@ -75,45 +75,105 @@ LEFT JOIN airlines a ON f.airline = a.iata_code
 LEFT JOIN airports ap1 ON f.origin = ap1.iata_code
 LEFT JOIN airports ap2 ON f.destination  = ap2.iata_code;
 
-CREATE TABLE IF NOT EXISTS daily_delay_summary AS
+-- Summary tables hold mergeable partial aggregates per flight_date so they
+-- can be refreshed one date range at a time after each load
+-- (utils/summary_tables.py, scripts/refresh_summaries.py).
+-- The reporting views below merge the partials on read. Databases created
+-- when these were tables: apply sql/migrations/004_summary_views.sql first.
+CREATE TABLE IF NOT EXISTS daily_delay_partials (
+    flight_date DATE NOT NULL,
+    total_flights BIGINT NOT NULL DEFAULT 0,
+    dep_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    dep_delay_count BIGINT NOT NULL DEFAULT 0,
+    arr_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    arr_delay_count BIGINT NOT NULL DEFAULT 0,
+    delayed_flights BIGINT NOT NULL DEFAULT 0,
+    cancelled_flights BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (flight_date)
+);
+
+CREATE TABLE IF NOT EXISTS airline_daily_partials (
+    flight_date DATE NOT NULL,
+    airline VARCHAR(100) NOT NULL,
+    total_flights BIGINT NOT NULL DEFAULT 0,
+    dep_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    dep_delay_count BIGINT NOT NULL DEFAULT 0,
+    arr_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    arr_delay_count BIGINT NOT NULL DEFAULT 0,
+    delayed_flights BIGINT NOT NULL DEFAULT 0,
+    cancelled_flights BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (flight_date, airline)
+);
+
+CREATE TABLE IF NOT EXISTS airport_daily_partials (
+    flight_date DATE NOT NULL,
+    origin VARCHAR(10) NOT NULL,
+    total_flights BIGINT NOT NULL DEFAULT 0,
+    dep_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    dep_delay_count BIGINT NOT NULL DEFAULT 0,
+    arr_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    arr_delay_count BIGINT NOT NULL DEFAULT 0,
+    delayed_flights BIGINT NOT NULL DEFAULT 0,
+    cancelled_flights BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (flight_date, origin)
+);
+
+CREATE TABLE IF NOT EXISTS route_daily_partials (
+    flight_date DATE NOT NULL,
+    origin VARCHAR(10) NOT NULL,
+    destination VARCHAR(10) NOT NULL,
+    total_flights BIGINT NOT NULL DEFAULT 0,
+    dep_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    dep_delay_count BIGINT NOT NULL DEFAULT 0,
+    arr_delay_sum DOUBLE NOT NULL DEFAULT 0,
+    arr_delay_count BIGINT NOT NULL DEFAULT 0,
+    delayed_flights BIGINT NOT NULL DEFAULT 0,
+    cancelled_flights BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (flight_date, origin, destination)
+);
+
+-- One row per summarized table once a full rebuild covered every date;
+-- the pages only read the partials after that.
+CREATE TABLE IF NOT EXISTS summary_state (
+    source VARCHAR(64) NOT NULL PRIMARY KEY,
+    built_at TIMESTAMP NOT NULL
+);
+
+CREATE OR REPLACE VIEW daily_delay_summary AS
 SELECT
     flight_date,
-    COUNT(*) AS total_flights,
-    AVG(dep_delay) AS avg_dep_delay,
-    AVG(arr_delay) AS avg_arr_delay
-FROM flight_delay
-GROUP BY flight_date
-ORDER BY flight_date;
+    total_flights,
+    dep_delay_sum / NULLIF(dep_delay_count, 0) AS avg_dep_delay,
+    arr_delay_sum / NULLIF(arr_delay_count, 0) AS avg_arr_delay
+FROM daily_delay_partials;
 
-CREATE TABLE IF NOT EXISTS monthly_airline_performance AS
-SELECT 
+CREATE OR REPLACE VIEW monthly_airline_performance AS
+SELECT
     airline,
     DATE_FORMAT(flight_date, '%Y-%m') AS month,
-    COUNT(*) AS total_flights,
-    AVG(arr_delay) AS avg_arr_delay,
-    SUM(CASE WHEN arr_delay > 15 THEN 1 ELSE 0 END) AS delayed_flights
-FROM flight_delay
-GROUP BY airline, month
-ORDER BY month;
+    SUM(total_flights) AS total_flights,
+    SUM(arr_delay_sum) / NULLIF(SUM(arr_delay_count), 0) AS avg_arr_delay,
+    SUM(delayed_flights) AS delayed_flights
+FROM airline_daily_partials
+GROUP BY airline, DATE_FORMAT(flight_date, '%Y-%m');
 
-CREATE TABLE IF NOT EXISTS airport_delay_rank AS
+CREATE OR REPLACE VIEW airport_delay_rank AS
 SELECT
     origin AS airport,
-    AVG(dep_delay) AS avg_dep_delay,
-    AVG(arr_delay) AS avg_arr_delay,
-    COUNT(*) AS total_flights
-FROM flight_delay
-GROUP BY origin
-ORDER BY avg_dep_delay DESC;
+    SUM(dep_delay_sum) / NULLIF(SUM(dep_delay_count), 0) AS avg_dep_delay,
+    SUM(arr_delay_sum) / NULLIF(SUM(arr_delay_count), 0) AS avg_arr_delay,
+    SUM(total_flights) AS total_flights
+FROM airport_daily_partials
+GROUP BY origin;
 
-CREATE TABLE IF NOT EXISTS route_performance AS
+CREATE OR REPLACE VIEW route_performance AS
 SELECT
     origin,
     destination,
-    COUNT(*) AS total_flights,
-    AVG(dep_delay) AS avg_dep_delay,
-    AVG(arr_delay) AS avg_arr_delay
-FROM flight_delay
+    SUM(total_flights) AS total_flights,
+    SUM(dep_delay_sum) / NULLIF(SUM(dep_delay_count), 0) AS avg_dep_delay,
+    SUM(arr_delay_sum) / NULLIF(SUM(arr_delay_count), 0) AS avg_arr_delay
+FROM route_daily_partials
 GROUP BY origin, destination;
 
 SHOW TABLES;
@@ -203,6 +263,9 @@ FROM sales_data
 GROUP BY flight_date, airline
 ORDER BY flight_date;
 
+-- NOTE: sql/migrations/003_flight_history_route_key.sql replaces this view
+-- with one that joins on the stored, indexed flight_history.route_key.
+-- Apply migrations with: python -m scripts.migrate
 CREATE OR REPLACE VIEW revenue_vs_delay_view AS
 SELECT 
     f.flight_date,
@@ -298,3 +361,10 @@ SELECT COUNT(*) FROM sales_data;
 
 SELECT * FROM sales_data;
 SELECT * FROM flight_delay;
+
+-- Write counter per table (utils/query_cache.py): loads, summary refreshes
+-- and migrations bump it, and cached query results are keyed on it.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL
+);
@@ -0,0 +1,181 @@
+"""
+Equivalence of the array-based model export (utils/tree_export.py) with
+sklearn, for models shaped like the delay pipeline and the cancellation
+forest, plus the trained models in models/ when they exist.
+
+    python -m pytest -q test_model_export.py
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from utils.ml_utils import CATEGORICAL, NUMERIC, prepare_delay_frame, delay_feature_matrix
+from utils.tree_export import export_model, save_compiled, load_compiled, predict_with_proba
+
+RNG = np.random.default_rng(7)
+AIRLINES = ["AA", "DL", "UA", "B6", "WN", "AS"]
+AIRPORTS = ["JFK", "LAX", "ORD", "ATL", "SFO", "SEA", "DEN", "BOS"]
+
+
+def delay_frame(n):
+    return pd.DataFrame({
+        "airline": RNG.choice(AIRLINES, n),
+        "origin": RNG.choice(AIRPORTS, n),
+        "destination": RNG.choice(AIRPORTS, n),
+        "crs_dep_hour": RNG.integers(0, 24, n).astype(str),
+        "distance": RNG.uniform(100, 3000, n),
+        "dep_delay": RNG.normal(10, 30, n).round(),
+        "taxi_out": RNG.uniform(5, 40, n),
+        "month": RNG.integers(1, 13, n),
+        "dayofweek": RNG.integers(0, 7, n),
+    })
+
+
+def delay_pipeline(X, y):
+    # as utils/ml_utils.train_delay_model, smaller
+    preprocessor = ColumnTransformer([
+        ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL),
+        ("num", StandardScaler(), NUMERIC),
+    ])
+    forest = RandomForestClassifier(n_estimators=40, max_depth=12, random_state=0, class_weight="balanced")
+    return Pipeline([("preprocessor", preprocessor), ("classifier", forest)]).fit(X, y)
+
+
+def cancellation_frame(n):
+    return pd.DataFrame({
+        "Airline": RNG.integers(0, 14, n),
+        "Origin": RNG.integers(0, 300, n),
+        "Dest": RNG.integers(0, 300, n),
+        "DepDelayMinutes": RNG.exponential(15, n).round(),
+        "Distance": RNG.uniform(50, 2500, n).round(),
+        "Month": RNG.integers(1, 13, n),
+        "DayOfWeek": RNG.integers(1, 8, n),
+    })
+
+
+@pytest.fixture(scope="module")
+def delay_model():
+    X = delay_frame(3000)
+    y = ((X["dep_delay"] > 15) ^ (RNG.random(len(X)) < 0.2)).astype(int)
+    return delay_pipeline(X, y)
+
+
+@pytest.fixture(scope="module")
+def cancellation_model():
+    X = cancellation_frame(3000)
+    y = ((X["DepDelayMinutes"] > 40) & (RNG.random(len(X)) < 0.5)).astype(int)
+    return RandomForestClassifier(n_estimators=30, max_depth=10, random_state=0).fit(X, y)
+
+
+def test_delay_pipeline_probabilities_identical(delay_model):
+    compiled = export_model(delay_model, CATEGORICAL + NUMERIC)
+    X = delay_frame(500)
+    np.testing.assert_array_equal(compiled.predict_proba(X), delay_model.predict_proba(X))
+    np.testing.assert_array_equal(compiled.predict(X), delay_model.predict(X))
+
+
+def test_delay_single_rows_and_unknown_categories(delay_model):
+    compiled = export_model(delay_model, CATEGORICAL + NUMERIC)
+    X = delay_frame(20)
+    X.loc[::3, "airline"] = "ZZ"            # not seen in training: all one-hot bits 0
+    X.loc[1::3, "crs_dep_hour"] = "UNK"
+    for i in range(len(X)):
+        row = X.iloc[[i]]
+        np.testing.assert_array_equal(compiled.predict_proba(row), delay_model.predict_proba(row))
+
+
+def test_delay_column_order_does_not_matter(delay_model):
+    compiled = export_model(delay_model, CATEGORICAL + NUMERIC)
+    X = delay_frame(50)
+    shuffled = X[list(reversed(X.columns))]
+    np.testing.assert_array_equal(compiled.predict_proba(shuffled), delay_model.predict_proba(X))
+
+
+def test_cancellation_forest_frame_and_array(cancellation_model):
+    compiled = export_model(cancellation_model)
+    X = cancellation_frame(500)
+    expected = cancellation_model.predict_proba(X)
+    np.testing.assert_array_equal(compiled.predict_proba(X), expected)
+    # the page passes a plain array in bundle["features"] order
+    np.testing.assert_array_equal(compiled.predict_proba(X.to_numpy()), expected)
+
+
+def test_predict_with_proba_matches_predict(cancellation_model):
+    compiled = export_model(cancellation_model)
+    X = cancellation_frame(200)
+    for model in (cancellation_model, compiled):
+        labels, proba = predict_with_proba(model, X)
+        np.testing.assert_array_equal(labels, cancellation_model.predict(X))
+        np.testing.assert_array_equal(proba, cancellation_model.predict_proba(X))
+
+
+def test_missing_values_follow_sklearn():
+    X = cancellation_frame(2000).astype(float)
+    X.loc[X.sample(frac=0.1, random_state=0).index, "DepDelayMinutes"] = np.nan
+    y = (X["Distance"] > 1200).astype(int)
+    forest = RandomForestClassifier(n_estimators=10, max_depth=8, random_state=0).fit(X, y)
+    test = cancellation_frame(300).astype(float)
+    test.loc[::4, "DepDelayMinutes"] = np.nan
+    np.testing.assert_array_equal(export_model(forest).predict_proba(test), forest.predict_proba(test))
+
+
+def test_leaf_counts_are_normalized():
+    X = cancellation_frame(1000)
+    y = (X["DepDelayMinutes"] > 20).astype(int)
+    forest = RandomForestClassifier(n_estimators=10, max_depth=8, random_state=0).fit(X, y)
+    test = cancellation_frame(200)
+    expected = forest.predict_proba(test)
+    # scikit-learn < 1.4 stores weighted class counts in the leaves
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        tree.value[:] = tree.value * tree.weighted_n_node_samples[:, None, None]
+    np.testing.assert_allclose(export_model(forest).predict_proba(test), expected, rtol=1e-12)
+
+
+def test_stale_export_is_ignored(tmp_path, cancellation_model):
+    import joblib, os
+
+    path = tmp_path / "cancellation_model.pkl"
+    joblib.dump(cancellation_model, path)
+    save_compiled(export_model(cancellation_model), path)
+    assert load_compiled(path) is not None
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))   # model retrained
+    assert load_compiled(path) is None
+
+
+@pytest.mark.parametrize("kind", ["delay", "cancel"])
+def test_trained_models(kind):
+    from utils.batch_scoring import MODEL_FILES, cancellation_features
+    from utils.dimensions import bundle_dimensions
+    from utils.load_models import load_delay_model, load_cancellation_model
+
+    path = Path(MODEL_FILES[kind])
+    if not path.exists():
+        pytest.skip(f"{path} not trained")
+    if kind == "delay":
+        model = load_delay_model(path)
+        X = delay_feature_matrix(prepare_delay_frame(delay_frame(300).assign(flight_date="2015-06-01")))
+        compiled = export_model(model, CATEGORICAL + NUMERIC)
+    else:
+        bundle = load_cancellation_model(path)
+        model = bundle["model"]
+        sample = cancellation_frame(300).rename(columns={"Dest": "destination"})
+        dims = bundle_dimensions(bundle)
+        sample["Airline"] = RNG.choice(dims["Airline"].codes, len(sample))
+        sample["Origin"] = RNG.choice(dims["Origin"].codes, len(sample))
+        sample["destination"] = RNG.choice(dims["Dest"].codes, len(sample))
+        X = cancellation_features(sample, dims, bundle["features"])
+        compiled = export_model(model)
+    np.testing.assert_array_equal(compiled.predict_proba(X), model.predict_proba(X))
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main(["-q", __file__]))
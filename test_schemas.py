@@ -0,0 +1,25 @@
+"""
+The column dtype registry (utils/schemas.py) against the repo's own data.
+
+    python -m pytest -q test_schemas.py
+"""
+import pandas as pd
+
+from utils.schemas import apply_schema
+
+DEMO_CSV = "data/demo_flight_data.csv"
+
+
+def test_sales_schema_on_demo_csv():
+    df = apply_schema(pd.read_csv(DEMO_CSV), "sales_data")
+    # flight numbers are alphanumeric ("6E101")
+    assert df["flight_number"].dtype == "string"
+    assert df["flight_number"].iloc[0] == "6E101"
+    assert pd.api.types.is_datetime64_any_dtype(df["flight_date"])
+    assert df["seats_sold"].dtype == "Int32"
+    assert df["revenue"].notna().all()
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main(["-q", __file__]))
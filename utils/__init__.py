@@ -1,4 +1,9 @@
-from .db_connection import get_db_engine
+from .db_connection import get_db_engine, get_pool_stats
 from .run_query import run_query
+from .query_batch import run_queries
+from .query_cache import get_cache_stats, clear_query_cache
+from .query_stats import get_query_records, query_summary, latency_percentiles
+from .dimensions import get_airport_index, get_airline_index
 from .fetch_flight_api import get_live_flights
-from .load_models import load_delay_model, load_revenue_model
+from .load_models import load_delay_model, load_revenue_model, load_cancellation_model, load_compiled_model, preload_models
+from .model_registry import get_registry_stats
@@ -0,0 +1,521 @@
+# utils/bulk_load.py
+"""
+High-throughput, resumable CSV / Parquet → SQL loader.
+
+The input is streamed in chunks; each chunk is written by one of several
+worker threads on its own pooled connection, either with LOAD DATA LOCAL
+INFILE (MySQL with DB_LOCAL_INFILE enabled) or batched multi-row INSERTs.
+Every chunk commits together with a row in `etl_load_checkpoints`, so a
+crashed load restarts after the last committed chunk without duplicates.
+
+bulk_replace_months() is the incremental variant: rows are loaded into a
+staging table, then the affected months of the target are replaced in one
+transaction and recorded in `etl_loaded_partitions`, so re-running an
+upload never duplicates rows and only changed months are reloaded.
+"""
+import hashlib
+import itertools
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text, inspect
+
+from utils.db_connection import get_db_engine, LOCAL_INFILE
+from utils.query_cache import mark_tables_changed
+from utils.partitions import (
+    dataset_files, iter_partitioned, list_file_partitions, partition_dir, month_label, PARTITION_ROOT,
+)
+
+CHECKPOINT_TABLE = "etl_load_checkpoints"
+
+CHECKPOINT_DDL = f"""
+CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+    load_id VARCHAR(64) NOT NULL,
+    table_name VARCHAR(64) NOT NULL,
+    chunk_index INT NOT NULL,
+    row_count INT NOT NULL,
+    committed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (load_id, chunk_index)
+)
+"""
+
+# load that filled each staging table (a stage is only resumed by that load)
+STAGE_OWNER_TABLE = "etl_load_stages"
+
+STAGE_OWNER_DDL = f"""
+CREATE TABLE IF NOT EXISTS {STAGE_OWNER_TABLE} (
+    stage_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    load_id VARCHAR(64) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+LOADED_TABLE = "etl_loaded_partitions"
+
+LOADED_DDL = f"""
+CREATE TABLE IF NOT EXISTS {LOADED_TABLE} (
+    table_name VARCHAR(64) NOT NULL,
+    partition_key VARCHAR(255) NOT NULL,
+    fingerprint VARCHAR(64) NOT NULL,
+    row_count INT NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, partition_key)
+)
+"""
+
+
+# ============================================================
+# CHECKPOINTS
+# ============================================================
+def make_load_id(csv_path, table):
+    """
+    Identifies one load of one file version into one table.
+    """
+    st = os.stat(csv_path)
+    raw = f"{os.path.abspath(csv_path)}|{st.st_size}|{int(st.st_mtime)}|{table}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def make_files_load_id(paths, table):
+    """
+    make_load_id for a set of files (e.g. a Parquet dataset).
+    """
+    parts = []
+    for path in sorted(str(p) for p in paths):
+        st = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}|{st.st_size}|{int(st.st_mtime)}")
+    raw = "\n".join(parts) + f"|{table}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def committed_chunks(engine, load_id):
+    with engine.begin() as conn:
+        conn.execute(text(CHECKPOINT_DDL))
+        rows = conn.execute(
+            text(f"SELECT chunk_index FROM {CHECKPOINT_TABLE} WHERE load_id = :load_id"),
+            {"load_id": load_id},
+        ).fetchall()
+    return {r[0] for r in rows}
+
+
+def reset_checkpoints(engine, load_id):
+    """
+    Forgets earlier checkpoints of `load_id` (a non-resumed reload).
+    """
+    with engine.begin() as conn:
+        conn.execute(text(CHECKPOINT_DDL))
+        conn.execute(text(f"DELETE FROM {CHECKPOINT_TABLE} WHERE load_id = :load_id"), {"load_id": load_id})
+    return set()
+
+
+def _checkpoint(conn, load_id, table, chunk_index, row_count):
+    conn.execute(
+        text(
+            f"INSERT INTO {CHECKPOINT_TABLE} (load_id, table_name, chunk_index, row_count) "
+            "VALUES (:load_id, :table_name, :chunk_index, :row_count)"
+        ),
+        {"load_id": load_id, "table_name": table, "chunk_index": chunk_index, "row_count": row_count},
+    )
+
+
+# ============================================================
+# CHUNK WRITERS
+# ============================================================
+def _placeholders(engine, n):
+    style = engine.dialect.paramstyle
+    if style == "qmark":
+        return ["?"] * n
+    if style in ("numeric", "numeric_dollar"):
+        prefix = "$" if style == "numeric_dollar" else ":"
+        return [f"{prefix}{i + 1}" for i in range(n)]
+    return ["%s"] * n
+
+
+def _driver_values(chunk):
+    """
+    DB-API drivers do not accept pandas Timestamps: parsed date columns
+    are passed as datetime.date (or datetime when they carry a time).
+    """
+    dates = chunk.select_dtypes(include=["datetime", "datetimetz"]).columns
+    if len(dates) == 0:
+        return chunk
+    chunk = chunk.copy()
+    for col in dates:
+        s = chunk[col]
+        if (s.dropna() == s.dropna().dt.normalize()).all():
+            chunk[col] = pd.Series(s.dt.date, index=s.index, dtype=object)
+        else:
+            chunk[col] = pd.Series(s.dt.to_pydatetime(), index=s.index, dtype=object)
+    return chunk
+
+
+def _insert_multi(conn, engine, table, chunk):
+    """
+    Batched executemany; the MySQL drivers rewrite it into multi-row
+    INSERT ... VALUES (...), (...) statements.
+    """
+    cols = ", ".join(chunk.columns)
+    marks = ", ".join(_placeholders(engine, len(chunk.columns)))
+    chunk = _driver_values(chunk)
+    rows = list(chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None))
+    conn.exec_driver_sql(f"INSERT INTO {table} ({cols}) VALUES ({marks})", rows)
+
+
+def _infile_text(value):
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    return str(value).replace("\\", "\\\\")
+
+
+def _infile_values(chunk):
+    """
+    The chunk as LOAD DATA reads it with its default ESCAPED BY: every
+    backslash in text is doubled, since MySQL would read a single one as
+    the start of an escape (a literal backslash-N would become NULL), and
+    booleans become 0 / 1. NULLs stay NaN and are written as the NULL
+    escape.
+    """
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        s = chunk[col]
+        if pd.api.types.is_bool_dtype(s):
+            chunk[col] = s.astype("Int8")
+        elif not (pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s)):
+            chunk[col] = s.astype(object).map(_infile_text, na_action="ignore")
+    return chunk
+
+
+def _insert_infile(conn, table, chunk):
+    """
+    Writes the chunk to a temp file and loads it with LOAD DATA LOCAL INFILE.
+    """
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        _infile_values(chunk).to_csv(path, index=False, header=False, na_rep="\\N", lineterminator="\n")
+        cols = ", ".join(chunk.columns)
+        conn.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{path.replace(os.sep, '/')}' INTO TABLE {table} "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\n' ({cols})"
+        )
+    finally:
+        os.remove(path)
+
+
+def _ensure_table(engine, table, sample):
+    if not inspect(engine).has_table(table):
+        sample.head(0).to_sql(table, engine, index=False)
+
+
+# ============================================================
+# LOADER
+# ============================================================
+def bulk_load_csv(csv_path, table, engine=None, chunksize=50000, workers=4,
+                  method="auto", resume=True, read_csv_kwargs=None, on_chunk=None):
+    """
+    Streams `csv_path` into `table` with `workers` parallel chunk writers.
+
+    method: "infile" (MySQL LOAD DATA LOCAL INFILE), "multi" (batched
+    INSERTs) or "auto" (infile when the engine allows it).
+    resume: skip chunks already committed by an earlier run of this file.
+    on_chunk(chunk): called for every chunk read, including skipped ones
+    (e.g. to collect the dates a load touches).
+
+    Returns a dict with rows loaded / skipped, elapsed seconds and rows/sec.
+    """
+    reader = pd.read_csv(csv_path, chunksize=chunksize, **(read_csv_kwargs or {}))
+    load_id = make_load_id(csv_path, table)
+    return bulk_load_frames(reader, table, load_id, engine, workers, method, resume, on_chunk, source=csv_path)
+
+
+def bulk_load_parquet(table, root=None, engine=None, chunksize=50000, workers=4,
+                      method="auto", resume=True, start=None, end=None, on_chunk=None):
+    """
+    Loads the monthly Parquet layout of `table` (utils/partitions.py),
+    optionally only months in [start, end], like bulk_load_csv. The load
+    id covers every file, so a changed file restarts the load.
+    """
+    files = dataset_files(table, root or PARTITION_ROOT)
+    if not files:
+        raise FileNotFoundError(f"No Parquet files for {table} under {root or PARTITION_ROOT}")
+    load_id = make_files_load_id(files, table)
+    batches = iter_partitioned(table, start=start, end=end, root=root or PARTITION_ROOT, batch_size=chunksize)
+    return bulk_load_frames(batches, table, load_id, engine, workers, method, resume, on_chunk,
+                            source=f"{root or PARTITION_ROOT}/{table}")
+
+
+def bulk_load_frames(chunks, table, load_id, engine=None, workers=4, method="auto",
+                     resume=True, on_chunk=None, source=None):
+    """
+    Writes an iterable of DataFrames (in a stable order, so chunk indexes
+    match across runs) into `table`, checkpointed under `load_id`.
+    """
+    engine = engine or get_db_engine()
+    if method == "auto":
+        method = "infile" if engine.dialect.name == "mysql" and LOCAL_INFILE else "multi"
+
+    done = committed_chunks(engine, load_id) if resume else reset_checkpoints(engine, load_id)
+    if done:
+        print(f"[RESUME] {len(done)} chunk(s) already committed for {source or load_id}")
+
+    stats = {"rows_loaded": 0, "rows_skipped": 0, "chunks_loaded": 0, "chunks_skipped": 0}
+    lock = threading.Lock()
+    # chunks held in memory (queued or being written) while workers are busy
+    max_pending = workers * 2
+
+    def write(index, chunk):
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            if method == "infile":
+                _insert_infile(conn, table, chunk)
+            else:
+                _insert_multi(conn, engine, table, chunk)
+            _checkpoint(conn, load_id, table, index, len(chunk))
+        elapsed = time.perf_counter() - t0
+        with lock:
+            stats["rows_loaded"] += len(chunk)
+            stats["chunks_loaded"] += 1
+        print(f"  chunk {index}: {len(chunk)} rows in {elapsed:.2f}s "
+              f"({len(chunk) / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+    def collect(pending, block):
+        """
+        Drops finished writes from `pending` (waiting for one if `block`)
+        and re-raises the first failure, so a bad chunk stops the read.
+        """
+        if block:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        else:
+            finished = {f for f in pending if f.done()}
+        pending -= finished
+        for f in finished:
+            f.result()
+
+    start = time.perf_counter()
+    pending = set()
+    created = False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for index, chunk in enumerate(chunks):
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                if index in done:
+                    stats["rows_skipped"] += len(chunk)
+                    stats["chunks_skipped"] += 1
+                    continue
+                if not created:
+                    _ensure_table(engine, table, chunk)
+                    created = True
+                collect(pending, block=len(pending) >= max_pending)
+                pending.add(pool.submit(write, index, chunk))
+
+            while pending:
+                collect(pending, block=True)
+        except BaseException:
+            # stop on the first failure; committed chunks stay checkpointed
+            for f in pending:
+                f.cancel()
+            raise
+        finally:
+            if stats["chunks_loaded"]:
+                mark_tables_changed(engine, [table])
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 2)
+    stats["rows_per_sec"] = round(stats["rows_loaded"] / elapsed, 1) if elapsed > 0 else 0.0
+    stats["method"] = method
+
+    print(f"[SUCCESS] Loaded {stats['rows_loaded']:,} rows into '{table}' "
+          f"({stats['rows_skipped']:,} already committed) in {stats['seconds']}s "
+          f"— {stats['rows_per_sec']:,.0f} rows/sec via {method}")
+    return stats
+
+
+# ============================================================
+# INCREMENTAL (MONTH-REPLACING) LOADS
+# ============================================================
+def loaded_partitions(engine, table):
+    """
+    {partition_key: fingerprint} of what is currently loaded in `table`.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(LOADED_DDL))
+        rows = conn.execute(
+            text(f"SELECT partition_key, fingerprint FROM {LOADED_TABLE} WHERE table_name = :table"),
+            {"table": table},
+        ).fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+def month_fingerprints(table, root=PARTITION_ROOT):
+    """
+    {"YYYY-MM": fingerprint} for the Parquet layout of `table`. Part files
+    are never rewritten in place (new content gets a new name), so names
+    and sizes identify a month's content.
+    """
+    prints = {}
+    for month in list_file_partitions(table, root):
+        files = sorted(partition_dir(table, month, root).glob("*.parquet"))
+        raw = "\n".join(f"{f.name}|{f.stat().st_size}" for f in files)
+        prints[month_label(month)] = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return prints
+
+
+def month_bounds(label):
+    """
+    [start, next month start) of a "YYYY-MM" label, as dates.
+    """
+    start = pd.Timestamp(f"{label}-01")
+    return start.date(), (start + pd.offsets.MonthBegin(1)).date()
+
+
+def iter_parquet_months(table, months, root=PARTITION_ROOT, chunksize=50000):
+    """
+    Chunks of the given "YYYY-MM" months of the Parquet layout, in order.
+    """
+    return itertools.chain.from_iterable(
+        iter_partitioned(table, start=month_bounds(m)[0], end=month_bounds(m)[1] - pd.Timedelta(days=1),
+                         root=root, batch_size=chunksize)
+        for m in sorted(months)
+    )
+
+
+def stage_owner(engine, stage):
+    """
+    load_id that created `stage`, or None.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(STAGE_OWNER_DDL))
+        row = conn.execute(
+            text(f"SELECT load_id FROM {STAGE_OWNER_TABLE} WHERE stage_name = :stage"), {"stage": stage},
+        ).fetchone()
+    return row[0] if row else None
+
+
+def _drop_stage(engine, stage):
+    with engine.begin() as conn:
+        conn.execute(text(STAGE_OWNER_DDL))
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {stage}")
+        conn.execute(text(f"DELETE FROM {STAGE_OWNER_TABLE} WHERE stage_name = :stage"), {"stage": stage})
+
+
+def _create_stage(engine, table, stage, load_id, resume):
+    """
+    Keeps an existing stage when resuming the load that filled it (same
+    load_id, with committed chunks); otherwise starts a fresh one (with
+    the target's columns when the target exists). A stage left by a crashed
+    load of another file version is dropped, not appended to.
+    """
+    insp = inspect(engine)
+    owner = stage_owner(engine, stage)
+    if resume and insp.has_table(stage) and owner == load_id and committed_chunks(engine, load_id):
+        return
+    if owner is not None and owner != load_id:
+        print(f"⚠️ Dropping {stage} left by an unfinished load of another input")
+        reset_checkpoints(engine, owner)
+    _drop_stage(engine, stage)
+    has_target = insp.has_table(table)
+    with engine.begin() as conn:
+        if has_target:
+            conn.exec_driver_sql(f"CREATE TABLE {stage} AS SELECT * FROM {table} WHERE 1 = 0")
+        conn.execute(text(f"INSERT INTO {STAGE_OWNER_TABLE} (stage_name, load_id) VALUES (:stage, :load_id)"),
+                     {"stage": stage, "load_id": load_id})
+    reset_checkpoints(engine, load_id)
+
+
+def table_months(engine, table, column="flight_date"):
+    """
+    Every "YYYY-MM" between the first and last `column` of `table` (two
+    index lookups, no scan).
+    """
+    with engine.connect() as conn:
+        lo, hi = conn.execute(text(f"SELECT MIN({column}), MAX({column}) FROM {table}")).fetchone()
+    if lo is None:
+        return []
+    return [p.strftime("%Y-%m") for p in pd.period_range(pd.Timestamp(lo), pd.Timestamp(hi), freq="M")]
+
+
+def bulk_replace_months(chunks, table, load_id, engine=None, months=None, record=None,
+                        replace_undated=False, replace_all=False, column="flight_date", workers=4,
+                        method="auto", resume=True, on_chunk=None, source=None):
+    """
+    Loads `chunks` into <table>_stage (resumable, like bulk_load_frames),
+    then in one transaction deletes `months` ("YYYY-MM"; default: every
+    month present in the chunks) from `table`, inserts the staged rows and
+    upserts `record` ({partition_key: fingerprint}) into
+    etl_loaded_partitions. Readers see the old or the new months, never a
+    mix. replace_undated also replaces rows whose `column` is NULL (use it
+    when the input is the only source of the table). replace_all treats
+    the input as the whole table: months of `table` it does not contain are
+    emptied too (and undated rows replaced).
+
+    Returns bulk_load_frames' stats plus "months" replaced.
+    """
+    engine = engine or get_db_engine()
+    stage = f"{table}_stage"
+    _create_stage(engine, table, stage, load_id, resume)
+
+    seen = set()
+    month_rows = {}
+
+    def track(chunk):
+        labels = pd.to_datetime(chunk[column], errors="coerce").dt.strftime("%Y-%m").dropna()
+        for label, n in labels.value_counts().items():
+            month_rows[label] = month_rows.get(label, 0) + int(n)
+        seen.update(month_rows)
+        if on_chunk is not None:
+            on_chunk(chunk)
+
+    stats = bulk_load_frames(chunks, stage, load_id, engine, workers, method, resume, track, source)
+    months = sorted(set(months) if months is not None else seen)
+    total = stats["rows_loaded"] + stats["rows_skipped"]
+
+    if not inspect(engine).has_table(stage):
+        # nothing was staged (empty input): months are replaced with nothing
+        _create_stage(engine, table, stage, load_id, resume=False)
+    if not inspect(engine).has_table(table):
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"CREATE TABLE {table} AS SELECT * FROM {stage} WHERE 1 = 0")
+    elif replace_all:
+        # months the previous load had and this one does not
+        months = sorted(set(months) | set(table_months(engine, table, column)))
+        replace_undated = True
+
+    cols = ", ".join(c["name"] for c in inspect(engine).get_columns(stage))
+    with engine.begin() as conn:
+        conn.execute(text(LOADED_DDL))
+    with engine.begin() as conn:
+        for label in months:
+            lo, hi = month_bounds(label)
+            conn.execute(
+                text(f"DELETE FROM {table} WHERE {column} >= :lo AND {column} < :hi"),
+                {"lo": str(lo), "hi": str(hi)},
+            )
+        if replace_undated:
+            conn.execute(text(f"DELETE FROM {table} WHERE {column} IS NULL"))
+        conn.exec_driver_sql(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage}")
+        for key, fingerprint in (record or {}).items():
+            conn.execute(
+                text(f"DELETE FROM {LOADED_TABLE} WHERE table_name = :table AND partition_key = :key"),
+                {"table": table, "key": key},
+            )
+            conn.execute(
+                text(f"INSERT INTO {LOADED_TABLE} (table_name, partition_key, fingerprint, row_count) "
+                     "VALUES (:table, :key, :fingerprint, :rows)"),
+                {"table": table, "key": key, "fingerprint": fingerprint, "rows": month_rows.get(key, total)},
+            )
+
+    _drop_stage(engine, stage)
+    reset_checkpoints(engine, load_id)
+    mark_tables_changed(engine, [table])
+
+    stats["months"] = months
+    print(f"[SUCCESS] Replaced {len(months)} month(s) of '{table}' with {total:,} staged rows")
+    return stats
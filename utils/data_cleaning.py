@@ -1,17 +1,30 @@
 import pandas as pd
 import numpy as np
 
+from utils.schemas import apply_schema
+
+
+def _keep(df, mask, reason, profile=None):
+    """
+    Filters `df` to `mask`; the rows removed are recorded on `profile`
+    (utils/profiler.DataProfile) under `reason`.
+    """
+    if profile is not None:
+        profile.drop(reason, int((~mask).sum()))
+    return df[mask]
+
 
 # ============================================================
 # 1) CLEAN FLIGHT DELAY DATA
 # ============================================================
-def clean_flight_delay_data(df: pd.DataFrame) -> pd.DataFrame:
+def clean_flight_delay_data(df: pd.DataFrame, profile=None) -> pd.DataFrame:
     """
     Cleans the merged flight delay dataset.
     - Ensures correct datetime formats
     - Handles missing delays
-    - Converts identifier columns to string
-    - Drops rows with impossible values
+    - Types columns from utils/schemas.py (categorical identifiers,
+      Int16 delays)
+    - Drops rows with impossible values (counted per reason on `profile`)
     """
 
     df = df.copy()
@@ -19,20 +32,11 @@ def clean_flight_delay_data(df: pd.DataFrame) -> pd.DataFrame:
     # ----------------------------
     # Ensure correct data types
     # ----------------------------
-    string_cols = [
-        "airline", "origin", "destination", "airport_name",
-        "origin_city", "origin_state", "country", "dest_city", "dest_state"
-    ]
-
-    for col in string_cols:
-        if col in df.columns:
-            df[col] = df[col].astype(str)
-
-    # Date column already exists from step 3 script
-    df["flight_date"] = pd.to_datetime(df["flight_date"], errors="coerce")
+    # identifiers -> category, delays -> Int16, flight_date -> datetime
+    df = apply_schema(df, "flight_delay")
 
     # Remove rows with invalid dates
-    df = df[df["flight_date"].notna()]
+    df = _keep(df, df["flight_date"].notna(), "invalid flight_date", profile)
 
     # -------------------------------------------------
     # Handle missing delays — replace NA with zero
@@ -44,7 +48,7 @@ def clean_flight_delay_data(df: pd.DataFrame) -> pd.DataFrame:
 
     for col in delay_columns:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+            df[col] = df[col].fillna(0)
 
     # -------------------------------------------------
     # Ensure numeric columns are numeric
@@ -56,12 +60,12 @@ def clean_flight_delay_data(df: pd.DataFrame) -> pd.DataFrame:
 
     for col in numeric_cols:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+            df[col] = df[col].fillna(0)
 
     # -------------------------------------------------
     # Remove rows with impossible distances (< 10 miles)
     # -------------------------------------------------
-    df = df[df["distance"] >= 10]
+    df = _keep(df, df["distance"] >= 10, "distance < 10 miles", profile)
 
     return df
 
@@ -69,39 +73,35 @@ def clean_flight_delay_data(df: pd.DataFrame) -> pd.DataFrame:
 # ============================================================
 # 2) CLEAN SALES DATA
 # ============================================================
-def clean_sales_data(df: pd.DataFrame) -> pd.DataFrame:
+def clean_sales_data(df: pd.DataFrame, profile=None) -> pd.DataFrame:
     """
     Cleans sales dataset:
     - Ensures date format
     - Converts revenue, passengers to numeric
-    - Removes rows with missing route or airline
+    - Removes rows with missing route or airline (counted on `profile`)
     """
 
     df = df.copy()
 
-    # Ensure date format
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    # date -> datetime, numeric fields, airline / route -> category
+    df = apply_schema(df, "sales_data")
 
     # Drop rows with invalid dates
-    df = df[df["date"].notna()]
+    df = _keep(df, df["date"].notna(), "invalid date", profile)
 
-    # Convert numeric fields
+    # Fill missing numeric fields
     numeric_cols = ["tickets_sold", "avg_ticket_price", "revenue"]
 
     for col in numeric_cols:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-    # Ensure airline and route are string
-    df["airline"] = df["airline"].astype(str)
-    df["route"] = df["route"].astype(str)
+            df[col] = df[col].fillna(0)
 
     # Remove rows where airline or route is missing
-    df = df[(df["airline"] != "nan") & (df["route"] != "nan")]
+    df = _keep(df, df["airline"].notna() & df["route"].notna(), "missing airline or route", profile)
 
     # Filter out negative values (bad data)
-    df = df[df["revenue"] >= 0]
-    df = df[df["tickets_sold"] >= 0]
+    df = _keep(df, df["revenue"] >= 0, "negative revenue", profile)
+    df = _keep(df, df["tickets_sold"] >= 0, "negative tickets_sold", profile)
 
     return df
 
@@ -1,15 +1,235 @@
+import glob
 import os
+import threading
+import time
+
 import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_db_engine():
-    DB_USER = os.getenv("DB_USER")
-    DB_PASSWORD = os.getenv("DB_PASSWORD")
-    DB_HOST = os.getenv("DB_HOST")
-    DB_NAME = os.getenv("DB_NAME")
 
-    connection_string = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
-    engine = sqlalchemy.create_engine(connection_string)
+# ============================================================
+# BACKEND CONFIG
+# ============================================================
+# "mysql" (default) or "duckdb" — an embedded, in-process columnar engine
+# that reads the Parquet partitions written by the ETL scripts
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+DUCKDB_PATH = os.getenv("DUCKDB_PATH", "data/warehouse.duckdb")
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", str(os.cpu_count() or 4)))
+PARQUET_ROOT = os.getenv("PARTITION_ROOT", "data/partitions")
+PARQUET_TABLES = ("flight_delay", "sales_data")
+
+
+# ============================================================
+# POOL CONFIG (override through .env)
+# ============================================================
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# allow LOAD DATA LOCAL INFILE for bulk loads (server must enable local_infile too)
+LOCAL_INFILE = os.getenv("DB_LOCAL_INFILE", "false").lower() in ("1", "true", "yes")
+
+# one engine (and pool) per connection URL, shared by the whole process
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+# process that created the engines; a forked child inherits them
+_ENGINES_PID = os.getpid()
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers waited for a connection,
+    so the pool can be sized from real Streamlit traffic.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+
+def get_backend():
+    return os.getenv("DB_BACKEND", DB_BACKEND).lower()
+
+
+def get_db_url():
+    """
+    Builds the default connection URL from the DB_* environment variables
+    (DB_PASSWORD or DB_PASS; user / host / database default to root /
+    localhost / airline_analytics). DB_BACKEND=duckdb switches to the embedded
+    DUCKDB_PATH database.
+    """
+    if get_backend() == "duckdb":
+        return f"duckdb:///{os.getenv('DUCKDB_PATH', DUCKDB_PATH)}"
+
+    # DB_PASS and the defaults are what utils/db_utils.get_engine used to read
+    DB_USER = os.getenv("DB_USER", "root")
+    DB_PASSWORD = os.getenv("DB_PASSWORD", os.getenv("DB_PASS", ""))
+    DB_HOST = os.getenv("DB_HOST", "localhost")
+    DB_NAME = os.getenv("DB_NAME", "airline_analytics")
+
+    return f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+
+
+def get_db_engine(url=None, **pool_options):
+    """
+    Returns the process-wide engine for `url` (default: the DB_* env config).
+
+    The engine is created on first use and reused afterwards, so every
+    query shares one connection pool instead of reconnecting to MySQL.
+    `pool_options` (pool_size, max_overflow, pool_timeout, pool_recycle,
+    pool_pre_ping) only apply when the engine is first created.
+    """
+    if url is None:
+        url = get_db_url()
+
+    engine = _ENGINES.get(url)
+    if engine is not None:
+        return engine
+
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(url)
+        if engine is None:
+            options = {
+                "poolclass": TimedQueuePool,
+                "pool_size": POOL_SIZE,
+                "max_overflow": POOL_MAX_OVERFLOW,
+                "pool_timeout": POOL_TIMEOUT,
+                "pool_recycle": POOL_RECYCLE,
+                "pool_pre_ping": POOL_PRE_PING,
+            }
+            if LOCAL_INFILE and url.startswith("mysql"):
+                options["connect_args"] = {"local_infile": True}
+            options.update(pool_options)
+            if url.startswith("duckdb"):
+                path = url.split(":///", 1)[-1]
+                if path and path != ":memory:":
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            engine = sqlalchemy.create_engine(url, **options)
+            if engine.dialect.name == "duckdb":
+                _setup_duckdb(engine)
+            _ENGINES[url] = engine
     return engine
+
+
+# ============================================================
+# EMBEDDED DUCKDB BACKEND
+# ============================================================
+def _setup_duckdb(engine):
+    """
+    Uses every core for scans and exposes the Parquet partitions
+    (PARTITION_ROOT/<table>/year=*/month=*/*.parquet) as views named like
+    the MySQL tables, so pages run the same SQL against either backend.
+    """
+    @event.listens_for(engine, "connect")
+    def _set_threads(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        cur.execute(f"SET threads TO {DUCKDB_THREADS}")
+        cur.close()
+
+    attach_parquet_views(engine)
+
+
+def attach_parquet_views(engine, root=None):
+    """
+    (Re)creates one view per Parquet table found under `root`.
+    Base tables of the same name are left alone.
+    """
+    root = root or os.getenv("PARTITION_ROOT", PARQUET_ROOT)
+    with engine.begin() as conn:
+        tables = {
+            r[0] for r in conn.exec_driver_sql(
+                "SELECT table_name FROM information_schema.tables WHERE table_type = 'BASE TABLE'"
+            )
+        }
+        for table in PARQUET_TABLES:
+            pattern = os.path.join(root, table, "*", "*", "*.parquet").replace(os.sep, "/")
+            if table in tables or not _glob_has_files(pattern):
+                continue
+            conn.exec_driver_sql(
+                f"CREATE OR REPLACE VIEW {table} AS "
+                f"SELECT * FROM read_parquet('{pattern}', union_by_name = true)"
+            )
+
+
+def reattach_missing_views(engine, error):
+    """
+    True when `error` is DuckDB reporting a missing table and the Parquet
+    views were re-attached, so the caller can retry once: a table the ETL
+    publishes after the engine was built (e.g. the first sales_data run)
+    shows up without a restart.
+    """
+    if engine.dialect.name != "duckdb" or "Table with name" not in str(error):
+        return False
+    attach_parquet_views(engine)
+    return True
+
+
+def get_pool_stats(url=None):
+    """
+    Returns a dict of pool usage for the engine behind `url`
+    (checked out / idle connections, overflow and checkout wait times).
+    """
+    if url is None:
+        url = get_db_url()
+
+    engine = _ENGINES.get(url)
+    if engine is None:
+        return {"created": False}
+
+    pool = engine.pool
+    stats = {
+        "created": True,
+        "pool_size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            checkouts = pool.checkouts
+            stats["checkouts"] = checkouts
+            stats["total_wait_s"] = round(pool.total_wait, 4)
+            stats["avg_wait_ms"] = round(pool.total_wait / checkouts * 1000, 3) if checkouts else 0.0
+            stats["max_wait_ms"] = round(pool.max_wait * 1000, 3)
+    return stats
+
+
+def _glob_has_files(pattern):
+    return bool(glob.glob(pattern))
+
+
+def dispose_engines():
+    """
+    Drops every engine. At shutdown the pooled connections are closed; in
+    a forked child they are only forgotten (close=False), since the
+    parent still uses the same sockets. The next get_db_engine() call
+    creates a fresh pool.
+    """
+    global _ENGINES_PID
+    with _ENGINES_LOCK:
+        forked = os.getpid() != _ENGINES_PID
+        for engine in _ENGINES.values():
+            engine.dispose(close=not forked)
+        _ENGINES.clear()
+        _ENGINES_PID = os.getpid()
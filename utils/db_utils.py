@@ -1,20 +1,34 @@
 import pandas as pd
-import sqlalchemy
-from sqlalchemy import create_engine
-import os
+from sqlalchemy import text
+from utils.db_connection import get_db_engine
+from utils.run_query import build_select, stream_table
+from utils.schemas import apply_schema
 
 def get_engine():
-    DB_USER = os.getenv("DB_USER", "root")
-    DB_PASS = os.getenv("DB_PASS", "")
-    DB_HOST = os.getenv("DB_HOST", "localhost")
-    DB_NAME = os.getenv("DB_NAME", "airline_db")
+    # same pooled engine as run_query (see utils/db_connection.py)
+    return get_db_engine()
 
-    return create_engine(f"mysql+mysqlconnector://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}")
-
-def load_flight_history():
+def load_flight_history(columns=None, where=None, params=None, chunksize=None):
+    """
+    Loads `flight_delay`, optionally projected to `columns` and filtered by
+    `where`, typed per utils/schemas.py. With `chunksize`, returns an
+    iterator of chunks instead.
+    """
+    if chunksize:
+        chunks = stream_table("flight_delay", columns, where, params, chunksize=chunksize)
+        return (apply_schema(chunk, "flight_delay") for chunk in chunks)
     engine = get_engine()
-    return pd.read_sql("SELECT * FROM flight_delay", engine)
+    df = pd.read_sql(text(build_select("flight_delay", columns, where)), engine, params=params)
+    return apply_schema(df, "flight_delay")
 
-def load_sales_data():
+def load_sales_data(columns=None, where=None, params=None, chunksize=None):
+    """
+    Loads `sales_data`, optionally projected / filtered / chunked
+    like load_flight_history.
+    """
+    if chunksize:
+        chunks = stream_table("sales_data", columns, where, params, chunksize=chunksize)
+        return (apply_schema(chunk, "sales_data") for chunk in chunks)
     engine = get_engine()
-    return pd.read_sql("SELECT * FROM sales_data", engine)
+    df = pd.read_sql(text(build_select("sales_data", columns, where)), engine, params=params)
+    return apply_schema(df, "sales_data")
@@ -0,0 +1,220 @@
+# utils/delay_aggregates.py
+"""
+Aggregate queries for the Delay Analyzer.
+
+Everything is computed inside the database over a flight_date window
+(default: the most recent DEFAULT_WINDOW_DAYS, see utils/partitions.py),
+so MySQL prunes partitions and pages only ever receive small result sets:
+one KPI row, at most `limit` routes and a fixed number of histogram bins.
+KPIs and route averages read the pre-aggregated summary partials once
+they have been built.
+
+When a flight_delay snapshot is published (utils/snapshot.py) every
+aggregate is computed from the memory-mapped window instead, with no
+database round trip and no per-session copy of the rows.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.run_query import run_query
+from utils.summary_tables import summaries_available
+from utils.partitions import window_clause, DEFAULT_WINDOW_DAYS
+from utils.snapshot import get_snapshot
+
+try:
+    import pyarrow.compute as pc
+except Exception:
+    pc = None
+
+
+def _window(start=None, end=None, extra=None):
+    """
+    Returns (WHERE clause, params) for an inclusive date window; without
+    start/end the most recent DEFAULT_WINDOW_DAYS are used, so queries
+    always prune flight_delay partitions.
+    """
+    return window_clause(start, end, table="flight_delay", extra=extra)
+
+
+def _snapshot_window(start=None, end=None, columns=None):
+    """
+    Zero-copy Arrow slice of the flight_delay snapshot for the window
+    (default: its most recent DEFAULT_WINDOW_DAYS), or None without one.
+    """
+    snap = get_snapshot("flight_delay")
+    if snap is None:
+        return None
+    if start is None and end is None:
+        end = snap.date_range()[1]
+        start = end and (pd.Timestamp(end) - pd.Timedelta(days=DEFAULT_WINDOW_DAYS - 1)).date()
+    return snap.slice(start, end, columns)
+
+
+def flight_date_range():
+    """
+    Returns (min_date, max_date) of flight_delay, or (None, None) if empty.
+    """
+    snap = get_snapshot("flight_delay")
+    if snap is not None:
+        return snap.date_range()
+    df = run_query("SELECT MIN(flight_date) AS min_date, MAX(flight_date) AS max_date FROM flight_delay")
+    if df.empty or df.loc[0, "min_date"] is None:
+        return None, None
+    return df.loc[0, "min_date"], df.loc[0, "max_date"]
+
+
+def delay_kpis(start=None, end=None, use_summaries=True):
+    """
+    One-row frame: total_flights, avg_arr_delay, avg_dep_delay, cancel_rate (%).
+    Read from daily_delay_partials when available (see utils/summary_tables.py).
+    """
+    window = _snapshot_window(start, end, ["arr_delay", "dep_delay", "cancelled"])
+    if window is not None:
+        cancel_rate = pc.mean(window["cancelled"]).as_py()
+        return pd.DataFrame([{
+            "total_flights": window.num_rows,
+            "avg_arr_delay": pc.mean(window["arr_delay"]).as_py(),
+            "avg_dep_delay": pc.mean(window["dep_delay"]).as_py(),
+            "cancel_rate": None if cancel_rate is None else cancel_rate * 100,
+        }])
+
+    where, params = _window(start, end)
+    if use_summaries and summaries_available():
+        q = f"""
+        SELECT
+            SUM(total_flights) AS total_flights,
+            SUM(arr_delay_sum) / NULLIF(SUM(arr_delay_count), 0) AS avg_arr_delay,
+            SUM(dep_delay_sum) / NULLIF(SUM(dep_delay_count), 0) AS avg_dep_delay,
+            SUM(cancelled_flights) * 100.0 / NULLIF(SUM(total_flights), 0) AS cancel_rate
+        FROM daily_delay_partials
+        {where}
+        """
+        return run_query(q, params)
+
+    q = f"""
+    SELECT
+        COUNT(*) AS total_flights,
+        AVG(arr_delay) AS avg_arr_delay,
+        AVG(dep_delay) AS avg_dep_delay,
+        AVG(cancelled) * 100 AS cancel_rate
+    FROM flight_delay
+    {where}
+    """
+    return run_query(q, params)
+
+
+def route_delay_averages(start=None, end=None, limit=20, min_flights=1, use_summaries=True):
+    """
+    Top `limit` routes by average arrival delay (routes with at least
+    `min_flights` flights in the window).
+    """
+    window = _snapshot_window(start, end, ["origin", "destination", "arr_delay"])
+    if window is not None:
+        window = window.filter(pc.is_valid(window["arr_delay"]))
+        df = (window.group_by(["origin", "destination"])
+              .aggregate([("arr_delay", "count"), ("arr_delay", "mean")])
+              .to_pandas()
+              .rename(columns={"arr_delay_count": "flights", "arr_delay_mean": "arr_delay"}))
+        df = df[df["flights"] >= min_flights].sort_values("arr_delay", ascending=False).head(int(limit))
+        df = df.reset_index(drop=True)
+        df["route"] = df["origin"].astype(str) + "-" + df["destination"].astype(str)
+        return df
+
+    if use_summaries and summaries_available():
+        where, params = _window(start, end)
+        params.update({"limit": int(limit), "min_flights": int(min_flights)})
+        q = f"""
+        SELECT
+            origin,
+            destination,
+            SUM(arr_delay_count) AS flights,
+            SUM(arr_delay_sum) / SUM(arr_delay_count) AS arr_delay
+        FROM route_daily_partials
+        {where}
+        GROUP BY origin, destination
+        HAVING SUM(arr_delay_count) >= :min_flights AND SUM(arr_delay_count) > 0
+        ORDER BY arr_delay DESC
+        LIMIT :limit
+        """
+        df = run_query(q, params)
+        df["route"] = df["origin"].astype(str) + "-" + df["destination"].astype(str)
+        return df
+
+    where, params = _window(start, end, ["arr_delay IS NOT NULL"])
+    params.update({"limit": int(limit), "min_flights": int(min_flights)})
+    q = f"""
+    SELECT
+        origin,
+        destination,
+        COUNT(*) AS flights,
+        AVG(arr_delay) AS arr_delay
+    FROM flight_delay
+    {where}
+    GROUP BY origin, destination
+    HAVING COUNT(*) >= :min_flights
+    ORDER BY arr_delay DESC
+    LIMIT :limit
+    """
+    df = run_query(q, params)
+    df["route"] = df["origin"].astype(str) + "-" + df["destination"].astype(str)
+    return df
+
+
+def delay_histogram(start=None, end=None, bin_width=5, lower=-60, upper=300):
+    """
+    Pre-binned arrival delay distribution.
+
+    Delays are clamped to [lower, upper] so the tails land in the edge
+    bins; returns columns bin_start, flights (at most
+    (upper - lower) / bin_width + 1 rows).
+    """
+    window = _snapshot_window(start, end, ["arr_delay"])
+    if window is not None:
+        delays = window["arr_delay"].to_numpy().astype(float)
+        delays = delays[~np.isnan(delays)]
+        bins, flights = np.unique(np.floor(np.clip(delays, lower, upper) / bin_width) * bin_width,
+                                  return_counts=True)
+        return pd.DataFrame({"bin_start": bins, "flights": flights})
+
+    where, params = _window(start, end, ["arr_delay IS NOT NULL"])
+    params.update({"w": bin_width, "lo": lower, "hi": upper})
+    q = f"""
+    SELECT
+        FLOOR(LEAST(GREATEST(arr_delay, :lo), :hi) / :w) * :w AS bin_start,
+        COUNT(*) AS flights
+    FROM flight_delay
+    {where}
+    GROUP BY bin_start
+    ORDER BY bin_start
+    """
+    return run_query(q, params)
+
+
+def recent_flights(start=None, end=None, limit=200):
+    """
+    The latest `limit` flights in the window, for the sample table.
+    """
+    columns = ["flight_date", "origin", "destination", "arr_delay", "dep_delay", "cancelled"]
+    window = _snapshot_window(start, end, columns)
+    if window is not None:
+        # scan back from the newest rows until `limit` have an arr_delay
+        take = int(limit)
+        while True:
+            tail = window.slice(max(0, window.num_rows - take))
+            tail = tail.filter(pc.is_valid(tail["arr_delay"]))
+            if tail.num_rows >= limit or take >= window.num_rows:
+                break
+            take *= 4
+        df = tail.slice(max(0, tail.num_rows - int(limit))).to_pandas()
+        return df.iloc[::-1].reset_index(drop=True)
+
+    where, params = _window(start, end, ["arr_delay IS NOT NULL"])
+    params["limit"] = int(limit)
+    q = f"""
+    SELECT flight_date, origin, destination, arr_delay, dep_delay, cancelled
+    FROM flight_delay
+    {where}
+    ORDER BY flight_date DESC
+    LIMIT :limit
+    """
+    return run_query(q, params)
@@ -0,0 +1,233 @@
+# utils/dimensions.py
+"""
+In-memory dimension index for airports and airlines.
+
+Built once from data/raw/airport.csv / airline.csv: every IATA code gets a
+dense integer id (0..n-1) and attributes live in NumPy arrays indexed by
+id, so lookups are array operations instead of DataFrame merges or dicts.
+
+    airports = get_airport_index()
+    ids = airports.ids(df["origin"])               # vectorized code → id (-1 = unknown)
+    cities = airports.take("city", ids)            # vectorized id → attribute
+    df["origin_city"] = airports.map(df["origin"], "city")
+
+The same index is used by the ETL (airline names, unknown-airport counts),
+the weather lookup (IATA → city) and model encoding (code → feature id).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+AIRPORT_CSV = os.getenv("AIRPORT_CSV", "data/raw/airport.csv")
+AIRLINE_CSV = os.getenv("AIRLINE_CSV", "data/raw/airline.csv")
+
+MISSING = -1
+
+_AIRPORT_ATTRIBUTES = {
+    "AIRPORT": "name", "CITY": "city", "STATE": "state", "COUNTRY": "country",
+    "LATITUDE": "lat", "LONGITUDE": "lon",
+}
+
+_cache = {}
+
+
+# ============================================================
+# INDEX
+# ============================================================
+class DimensionIndex:
+    """
+    Codes → dense ids, with attribute columns as arrays aligned to ids.
+    Codes keep the order they were given in, so an index rebuilt from a
+    saved code list (or a LabelEncoder's classes_) assigns the same ids.
+    """
+
+    def __init__(self, codes, attributes=None):
+        codes = pd.Index(pd.Series(list(codes), dtype="string").str.strip().str.upper(), dtype=object)
+        if not codes.is_unique:
+            raise ValueError("Dimension codes must be unique.")
+        self._index = codes
+        self.attributes = {name: np.asarray(values) for name, values in (attributes or {}).items()}
+        for name, values in self.attributes.items():
+            if len(values) != len(codes):
+                raise ValueError(f"Attribute '{name}' has {len(values)} values for {len(codes)} codes.")
+
+    @classmethod
+    def from_codes(cls, codes):
+        return cls(codes)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, code):
+        return self.id_of(code) != MISSING
+
+    @property
+    def codes(self):
+        return self._index.to_numpy()
+
+    # ---------- code → id ----------
+    def ids(self, codes):
+        """
+        int32 ids for an array / Series of codes (MISSING for unknown).
+        Categoricals are resolved once per category, not once per row.
+        """
+        if isinstance(codes, pd.Series) and isinstance(codes.dtype, pd.CategoricalDtype):
+            cat_ids = self.ids(codes.cat.categories.astype(str))
+            cat_ids = np.append(cat_ids, MISSING).astype(np.int32)
+            return cat_ids[codes.cat.codes.to_numpy()]       # code -1 (NaN) → the appended MISSING
+        keys = pd.Series(np.asarray(codes, dtype=object)).astype("string").str.strip().str.upper()
+        return self._index.get_indexer(keys.fillna("").to_numpy(dtype=object)).astype(np.int32)
+
+    def id_of(self, code):
+        if code is None or pd.isna(code):
+            return MISSING
+        return int(self.ids([code])[0])
+
+    def contains(self, codes):
+        return self.ids(codes) != MISSING
+
+    # ---------- id → attribute ----------
+    def take(self, attribute, ids, fill=None):
+        """
+        Attribute values for `ids`; MISSING ids get `fill`.
+        """
+        values = self.attributes[attribute]
+        ids = np.asarray(ids)
+        known = ids != MISSING
+        out = np.empty(len(ids), dtype=values.dtype if fill is None and known.all() else object)
+        out[known] = values[ids[known]]
+        out[~known] = fill
+        return out
+
+    def take_codes(self, ids, fill=None):
+        ids = np.asarray(ids)
+        out = np.full(len(ids), fill, dtype=object)
+        known = ids != MISSING
+        out[known] = self.codes[ids[known]]
+        return out
+
+    def attribute_of(self, code, attribute, default=None):
+        i = self.id_of(code)
+        return default if i == MISSING else self.attributes[attribute][i]
+
+    def map(self, codes, attribute, keep_unmapped=False):
+        """
+        Categorical of `attribute` for a Series of codes. Unknown codes
+        become NaN, or stay as the code with keep_unmapped.
+        """
+        if not isinstance(codes.dtype, pd.CategoricalDtype):
+            codes = codes.astype("category")
+        cats = codes.cat.categories.astype(str)
+        ids = self.ids(cats)
+        values = self.take(attribute, ids).astype(object)
+        if keep_unmapped:
+            unknown = ids == MISSING
+            values[unknown] = cats.to_numpy(dtype=object)[unknown]
+        new = pd.Index(values)
+        if new.is_unique and not new.isna().any():
+            return codes.cat.rename_categories(new)
+        return codes.map(dict(zip(cats, values))).astype("category")
+
+    # ---------- growing / persisting ----------
+    def extend(self, codes):
+        """
+        New index with codes not yet known appended (sorted) after the
+        existing ids; their attributes are empty. Existing ids do not move.
+        """
+        seen = pd.Series(np.asarray(codes, dtype=object)).dropna().astype(str).str.strip().str.upper().unique()
+        extra = sorted(set(seen) - set(self._index))
+        if not extra:
+            return self
+        attributes = {
+            name: np.concatenate([values.astype(object), np.full(len(extra), None, dtype=object)])
+            for name, values in self.attributes.items()
+        }
+        return DimensionIndex(list(self._index) + extra, attributes)
+
+    def subset(self, codes):
+        """
+        New index holding only `codes` (e.g. those a model was trained
+        on): known codes keep this index's order and attributes, unknown
+        ones are appended sorted.
+        """
+        full = self.extend(codes)
+        ids = np.unique(full.ids(pd.Series(np.asarray(codes, dtype=object)).dropna()))
+        ids = ids[ids != MISSING]
+        return DimensionIndex(full.codes[ids], {name: values[ids] for name, values in full.attributes.items()})
+
+    def to_frame(self):
+        df = pd.DataFrame(self.attributes)
+        df.insert(0, "code", self.codes)
+        df.index.name = "id"
+        return df
+
+
+# ============================================================
+# BUILDERS (cached per file version)
+# ============================================================
+def _cached(kind, path, build):
+    path = os.path.abspath(path)
+    key = (kind, path, os.path.getmtime(path))
+    if key not in _cache:
+        _cache[key] = build(path)
+    return _cache[key]
+
+
+def build_airport_index(path=AIRPORT_CSV):
+    airports = pd.read_csv(path, dtype="string")
+    airports.columns = airports.columns.str.strip()
+    airports = airports.dropna(subset=["IATA_CODE"]).drop_duplicates("IATA_CODE")
+    attributes = {}
+    for col, name in _AIRPORT_ATTRIBUTES.items():
+        if col in airports.columns:
+            values = airports[col].str.strip()
+            if name in ("lat", "lon"):
+                attributes[name] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+            else:
+                attributes[name] = values.to_numpy(dtype=object, na_value=None)
+    return DimensionIndex(airports["IATA_CODE"].str.strip(), attributes)
+
+
+def build_airline_index(path=AIRLINE_CSV):
+    airlines = pd.read_csv(path, dtype="string")
+    airlines.columns = airlines.columns.str.strip()
+
+    # find likely airline name column (common names: AIRLINE, Name)
+    airline_name_col = None
+    for cand in ["AIRLINE", "Airline", "NAME", "Name", "airline"]:
+        if cand in airlines.columns:
+            airline_name_col = cand
+            break
+    if airline_name_col is None and len(airlines.columns) >= 2:
+        # assume second column is name
+        airline_name_col = airlines.columns[1]
+
+    airlines = airlines.dropna(subset=["IATA_CODE"]).drop_duplicates("IATA_CODE")
+    names = airlines[airline_name_col].to_numpy(dtype=object, na_value=None)
+    return DimensionIndex(airlines["IATA_CODE"].str.strip(), {"name": names})
+
+
+def get_airport_index(path=AIRPORT_CSV):
+    """
+    Shared airport index (rebuilt only when the file changes).
+    """
+    return _cached("airports", path, build_airport_index)
+
+
+def get_airline_index(path=AIRLINE_CSV):
+    return _cached("airlines", path, build_airline_index)
+
+
+# ============================================================
+# MODEL ENCODING
+# ============================================================
+def bundle_dimensions(bundle):
+    """
+    {feature: DimensionIndex} for a model bundle: the saved code lists
+    ("dimensions"), or the LabelEncoders of bundles trained before them
+    (same ids, since classes_ order is kept).
+    """
+    if "dimensions" in bundle:
+        return {col: DimensionIndex.from_codes(codes) for col, codes in bundle["dimensions"].items()}
+    return {col: DimensionIndex.from_codes(enc.classes_) for col, enc in bundle.get("encoders", {}).items()}
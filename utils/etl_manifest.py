@@ -0,0 +1,187 @@
+# utils/etl_manifest.py
+"""
+Manifest of raw files already processed by the ETL.
+
+Every processed input is recorded per job (output table) with its content
+hash (SHA-256), size, mtime, row count and the monthly partitions it
+produced. Re-runs compare inputs against it and only transform new or
+changed files; select_inputs() / publish_job() implement that for the
+ETL scripts.
+
+The manifest is a JSON file stored with the dataset
+(<PARTITION_ROOT>/_etl_manifest.json by default, ETL_MANIFEST to override)
+and is rewritten atomically.
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from utils.partitions import (
+    PARTITION_ROOT, publish_staged, replace_source_files, month_label, list_file_partitions, drop_file_partition,
+)
+
+MANIFEST_NAME = "_etl_manifest.json"
+MANIFEST_VERSION = 1
+_HASH_BLOCK = 8 * 1024 * 1024
+
+
+def manifest_path(root=PARTITION_ROOT):
+    return Path(os.getenv("ETL_MANIFEST") or Path(root) / MANIFEST_NAME)
+
+
+# ============================================================
+# FILE IDENTITY
+# ============================================================
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_tag(path):
+    """
+    Stable, file-name-safe tag for one input: its stem plus a short hash
+    of its absolute path. Output files written from the input start with
+    it, so they can be replaced without touching other inputs' files.
+    """
+    path = os.path.abspath(path)
+    stem = re.sub(r"[^A-Za-z0-9]+", "_", Path(path).stem)[:40]
+    return f"{stem}-{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+
+
+# ============================================================
+# MANIFEST
+# ============================================================
+class EtlManifest:
+    """
+        manifest = EtlManifest.load(root)
+        changed = manifest.changed_files("flight_delay", paths)
+        ... process ...
+        manifest.record("flight_delay", path, sha256=..., rows=..., partitions=[...])
+        manifest.save()
+    """
+
+    def __init__(self, path, jobs=None):
+        self.path = Path(path)
+        self.jobs = jobs or {}
+
+    @classmethod
+    def load(cls, root=PARTITION_ROOT):
+        path = manifest_path(root)
+        if not path.exists():
+            return cls(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path, data.get("jobs", {}))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".partial")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "jobs": self.jobs}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def entries(self, job):
+        return self.jobs.get(job, {})
+
+    def get(self, job, path):
+        return self.entries(job).get(os.path.abspath(path))
+
+    def digest(self, job, path):
+        """
+        SHA-256 of `path`; the recorded hash is reused when size and
+        mtime are unchanged, so unchanged inputs are not re-read.
+        """
+        st = os.stat(path)
+        entry = self.get(job, path)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime:
+            return entry["sha256"]
+        return file_sha256(path)
+
+    def changed_files(self, job, paths):
+        """
+        {path: sha256} for the `paths` that are new or whose content
+        differs from the recorded version.
+        """
+        changed = {}
+        for path in paths:
+            digest = self.digest(job, path)
+            entry = self.get(job, path)
+            if entry is None or entry.get("sha256") != digest:
+                changed[path] = digest
+        return changed
+
+    def record(self, job, path, sha256, rows, partitions, **extra):
+        st = os.stat(path)
+        self.jobs.setdefault(job, {})[os.path.abspath(path)] = {
+            "sha256": sha256,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "rows": int(rows),
+            "partitions": sorted(partitions),
+            "source_tag": source_tag(path),
+            "processed_at": datetime.now().isoformat(timespec="seconds"),
+            **extra,
+        }
+
+    def reset(self, job):
+        self.jobs.pop(job, None)
+
+
+# ============================================================
+# INCREMENTAL RUNS
+# ============================================================
+def select_inputs(manifest, jobs, paths, incremental=True):
+    """
+    Returns ({path: sha256} to process, full rebuild?) for the output(s)
+    `jobs` built from `paths`. A first run of any job, or
+    incremental=False, rebuilds from every input; otherwise inputs that
+    are unchanged for every job are dropped.
+    """
+    jobs = [jobs] if isinstance(jobs, str) else list(jobs)
+    digests = {p: manifest.digest(jobs[0], p) for p in paths}
+    if not incremental or not all(manifest.entries(j) for j in jobs):
+        return digests, True
+
+    changed = {
+        p: d for p, d in digests.items()
+        if any((manifest.get(j, p) or {}).get("sha256") != d for j in jobs)
+    }
+    if len(changed) < len(paths):
+        print(f"Skipping {len(paths) - len(changed)} unchanged input(s) recorded in {manifest.path}")
+    return changed, False
+
+
+def publish_job(manifest, job, staging, digests, months, rows, root=PARTITION_ROOT, full=False):
+    """
+    Publishes `job`'s output staged from the inputs in `digests` and
+    records them (call manifest.save() afterwards). months / rows map each
+    input to the months / rows it produced. A full run replaces whole
+    months, removes published months it did not produce and forgets
+    earlier inputs; otherwise only files written from these inputs are
+    replaced, month by month.
+    """
+    written = [m for ms in months.values() for m in ms]
+    if full:
+        publish_staged(job, staging, written, root, replace=True)
+        produced = {pd.Timestamp(m) for m in written}
+        # a run that produced nothing (e.g. no inputs found) keeps the dataset
+        for month in list_file_partitions(job, root) if produced else ():
+            if month not in produced:
+                drop_file_partition(job, month, root)
+                print(f"  removed {job} {month_label(month)} (not in the inputs any more)")
+        manifest.reset(job)
+    else:
+        # months the inputs used to feed may shrink or vanish
+        previous = [pd.Timestamp(m) for p in digests for m in (manifest.get(job, p) or {}).get("partitions", [])]
+        replace_source_files(job, staging, written + previous, [f"{source_tag(p)}-" for p in digests], root)
+
+    for path, digest in digests.items():
+        manifest.record(job, path, digest, rows.get(path, 0), [month_label(m) for m in months.get(path, ())])
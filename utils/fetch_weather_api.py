@@ -2,11 +2,13 @@ import os
 import requests
 from dotenv import load_dotenv
 
+from utils.dimensions import get_airport_index
+
 load_dotenv()
 
 API_KEY = os.getenv("WEATHERSTACK_API_KEY")
 
-# IATA → City mapping (extend anytime)
+# Airports outside airport.csv (the BTS list is US-only) → City
 AIRPORT_CITY_MAP = {
     "JFK": "New York",
     "LAX": "Los Angeles",
@@ -20,16 +22,24 @@ AIRPORT_CITY_MAP = {
 }
 
 
+def airport_city(iata_code: str):
+    """City for an IATA code: the shared airport index, then the fallback map."""
+    try:
+        city = get_airport_index().attribute_of(iata_code, "city")
+    except (FileNotFoundError, KeyError):
+        city = None
+    return city or AIRPORT_CITY_MAP.get(iata_code)
+
+
 def fetch_weather(iata_code: str):
     """Fetch live weather data from Weatherstack API."""
 
-    iata_code = iata_code.upper()
+    iata_code = iata_code.strip().upper()
 
-    if iata_code not in AIRPORT_CITY_MAP:
+    city = airport_city(iata_code)
+    if city is None:
         return None, f"❌ Airport code '{iata_code}' not found in mapping."
 
-    city = AIRPORT_CITY_MAP[iata_code]
-
     url = (
         f"http://api.weatherstack.com/current?"
         f"access_key={API_KEY}&query={city}"
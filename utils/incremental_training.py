@@ -0,0 +1,417 @@
+# utils/incremental_training.py
+"""
+Out-of-core training of the delay model on all of flight_delay.
+
+The table is streamed chunk by chunk from MySQL or the Parquet layout;
+only the held-out evaluation rows are kept as DataFrames. Two learners:
+
+    "hist"  HistGradientBoostingClassifier (all cores). Rows are reduced
+            to category codes plus the five numeric features while
+            streaming (36 bytes / row, 72 in the float64 matrix the fit
+            takes), so the whole table fits where the raw DataFrame would not.
+    "sgd"   logistic regression trained with SGDClassifier.partial_fit,
+            one chunk at a time: memory is bounded by the chunk size.
+            Takes one pass to learn categories / scaling, then `epochs`
+            passes of partial_fit.
+
+Both return a fitted Pipeline with the same inputs as the random forest
+(ml_utils.CATEGORICAL + NUMERIC), so the Delay Prediction page, batch
+scoring and the model server use it unchanged.
+
+    result = train_delay_incremental("hist", source="parquet", compare=True)
+    result["report"]    # accuracy / ROC AUC / wall time vs the sampled RF
+
+A fraction TEST_FRAC of rows (fixed per chunk by RANDOM_STATE) is held
+out; up to EVAL_ROWS of them are kept to evaluate on.
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, balanced_accuracy_score, f1_score, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from utils.ml_utils import CATEGORICAL, NUMERIC, prepare_delay_frame, delay_feature_matrix, delay_rf_pipeline
+from utils.model_registry import save_model
+from utils.partitions import iter_partitioned, dataset_files
+from utils.run_query import stream_table, table_columns
+from utils.schemas import apply_schema
+
+TRAIN_CHUNKSIZE = int(os.getenv("TRAIN_CHUNKSIZE", "200000"))
+TEST_FRAC = 0.2
+EVAL_ROWS = int(os.getenv("TRAIN_EVAL_ROWS", "500000"))
+RANDOM_STATE = 42
+# HistGradientBoosting handles at most 255 categories per feature (one bin
+# stays for missing); rarer values are treated as missing
+MAX_CATEGORIES = 254
+# one-hot width cap for the SGD learner
+SGD_MAX_CATEGORIES = 1000
+META_PATH = Path("models/model_info.json")
+
+# Only the columns the models use are read (MySQL or Parquet)
+DELAY_COLUMNS = [
+    "flight_date", "airline", "origin", "destination",
+    "arr_delay", "dep_delay", "distance", "taxi_out", "crs_dep_hour", "CRSDepTime"
+]
+
+
+# ============================================================
+# STREAMING
+# ============================================================
+def _parquet_columns(table):
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(dataset_files(table)[0]).schema_arrow.names
+
+
+def iter_delay_chunks(source="sql", chunksize=TRAIN_CHUNKSIZE):
+    """
+    flight_delay rows with an arr_delay, DELAY_COLUMNS only, typed with
+    the registry schema; from MySQL or (source="parquet") the ETL files.
+    """
+    if source == "parquet":
+        available = set(_parquet_columns("flight_delay"))
+        columns = [c for c in DELAY_COLUMNS if c in available]
+        chunks = iter_partitioned("flight_delay", columns, not_null=["arr_delay"], batch_size=chunksize)
+    else:
+        available = set(table_columns("flight_delay"))
+        columns = [c for c in DELAY_COLUMNS if c in available]
+        chunks = stream_table("flight_delay", columns=columns, where="arr_delay IS NOT NULL", chunksize=chunksize)
+    for chunk in chunks:
+        yield apply_schema(chunk, "flight_delay")
+
+
+def _labelled_chunks(source, chunksize, test_frac=TEST_FRAC, random_state=RANDOM_STATE):
+    """
+    (model inputs, is_delayed, uniform draw per row) per chunk; rows with
+    a draw below `test_frac` are held out. The draws of a chunk only
+    depend on its position, so every pass sees the same split.
+    """
+    for i, chunk in enumerate(iter_delay_chunks(source, chunksize)):
+        df = prepare_delay_frame(chunk)
+        df["arr_delay"] = pd.to_numeric(df["arr_delay"], errors="coerce")
+        df = df[df["arr_delay"].notna()]
+        if df.empty:
+            continue
+        y = (df["arr_delay"] > 15).to_numpy(dtype=np.int8)
+        draw = np.random.default_rng([random_state, i]).random(len(df))
+        yield delay_feature_matrix(df).reset_index(drop=True), y, draw
+
+
+def category_strings(X):
+    """
+    Categorical inputs as strings, integral numbers without ".0", so the
+    hour 9 reads the same from the page ("9") and from the tables (9.0).
+    """
+    X = pd.DataFrame(X).copy()
+    for col in X.columns:
+        values = X[col]
+        numbers = pd.to_numeric(values, errors="coerce")
+        integral = (numbers.notna() & (numbers == np.floor(numbers))).to_numpy()
+        text = values.astype(str).to_numpy(dtype=object)
+        text[integral] = numbers[integral].astype("int64").astype(str).to_numpy(dtype=object)
+        X[col] = text
+    return X
+
+
+class _Vocabulary:
+    """
+    Streaming code assignment and counts for the categorical columns.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.index = {col: pd.Index([], dtype=object) for col in columns}
+        self.counts = {col: np.zeros(0, dtype=np.int64) for col in columns}
+
+    def encode(self, X):
+        """
+        int32 codes (first-seen order) of CATEGORICAL, counting train rows.
+        """
+        X = category_strings(X[self.columns])
+        codes = np.empty((len(X), len(self.columns)), dtype=np.int32)
+        for j, col in enumerate(self.columns):
+            values = X[col].to_numpy(dtype=object)
+            unseen = pd.Index(values).unique().difference(self.index[col])
+            if len(unseen):
+                self.index[col] = self.index[col].append(unseen)
+            codes[:, j] = self.index[col].get_indexer(values)
+        return codes
+
+    def count(self, codes):
+        for j, col in enumerate(self.columns):
+            counts = np.bincount(codes[:, j], minlength=len(self.index[col]))
+            grown = np.zeros(len(counts), dtype=np.int64)
+            grown[:len(self.counts[col])] = self.counts[col]
+            self.counts[col] = grown + counts
+
+    def keep(self, limit):
+        """
+        {column: sorted most frequent `limit` values} and, per column, the
+        map from first-seen code to the position in that list (-1 = dropped).
+        """
+        categories, remap = {}, {}
+        for col in self.columns:
+            counts = np.zeros(len(self.index[col]), dtype=np.int64)
+            counts[:len(self.counts[col])] = self.counts[col]
+            top = np.argsort(-counts, kind="stable")[:limit]
+            top = top[counts[top] > 0]
+            kept = sorted(self.index[col][top].tolist())
+            categories[col] = kept
+            remap[col] = pd.Index(kept).get_indexer(self.index[col])
+        return categories, remap
+
+
+def _peak_rss_mb():
+    """
+    Peak resident memory of this process in MB, or None where the
+    resource module is missing (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class _Holdout:
+    """
+    Held-out rows kept for evaluation (at most EVAL_ROWS) and an optional
+    `sample_frac` sample of training rows for the sampled-RF baseline.
+    """
+
+    def __init__(self, eval_rows=EVAL_ROWS, sample_frac=0.0, test_frac=TEST_FRAC):
+        self.eval_rows = eval_rows
+        self.sample_frac = sample_frac
+        self.test_frac = test_frac
+        self.test_X, self.test_y, self.kept = [], [], 0
+        self.sample_X, self.sample_y = [], []
+
+    def add(self, X, y, draw):
+        """
+        Returns the training-row mask of the chunk.
+        """
+        test = draw < self.test_frac
+        if self.kept < self.eval_rows and test.any():
+            take = np.flatnonzero(test)[:self.eval_rows - self.kept]
+            self.test_X.append(X.iloc[take])
+            self.test_y.append(y[take])
+            self.kept += len(take)
+        if self.sample_frac:
+            # the same draw, rescaled over the training rows
+            pick = ~test & ((draw - self.test_frac) / (1 - self.test_frac) < self.sample_frac)
+            self.sample_X.append(X[pick])
+            self.sample_y.append(y[pick])
+        return ~test
+
+    def test(self):
+        return pd.concat(self.test_X, ignore_index=True), np.concatenate(self.test_y)
+
+    def sample(self):
+        return pd.concat(self.sample_X, ignore_index=True), np.concatenate(self.sample_y)
+
+
+# ============================================================
+# LEARNERS
+# ============================================================
+def _fit_hist(source, chunksize, holdout, max_iter=300, learning_rate=0.1, max_leaf_nodes=63):
+    vocabulary = _Vocabulary(CATEGORICAL)
+    codes, numeric, labels, first = [], [], [], None
+    rows = 0
+    for X, y, draw in _labelled_chunks(source, chunksize):
+        train = holdout.add(X, y, draw)
+        chunk_codes = vocabulary.encode(X[train])
+        vocabulary.count(chunk_codes)
+        codes.append(chunk_codes)
+        numeric.append(X.loc[train, NUMERIC].to_numpy(dtype=np.float32))
+        labels.append(y[train])
+        first = X.head(100) if first is None else first
+        rows += int(train.sum())
+        print(f"  {rows:,} training rows encoded")
+    if not rows:
+        raise ValueError("No flight_delay rows with an arr_delay to train on.")
+
+    categories, remap = vocabulary.keep(MAX_CATEGORIES)
+    X_train = np.empty((rows, len(CATEGORICAL) + len(NUMERIC)), dtype=np.float64)
+    start = 0
+    for chunk_codes, chunk_numeric in zip(codes, numeric):
+        end = start + len(chunk_codes)
+        for j, col in enumerate(CATEGORICAL):
+            kept = remap[col][chunk_codes[:, j]].astype(np.float64)
+            kept[kept < 0] = np.nan                     # rare value → missing
+            X_train[start:end, j] = kept
+        X_train[start:end, len(CATEGORICAL):] = chunk_numeric
+        start = end
+    y_train = np.concatenate(labels)
+    del codes, numeric, labels
+
+    encoder = Pipeline([
+        ("text", FunctionTransformer(category_strings)),
+        ("ordinal", OrdinalEncoder(categories=[categories[c] for c in CATEGORICAL],
+                                   handle_unknown="use_encoded_value", unknown_value=np.nan)),
+    ])
+    preprocessor = ColumnTransformer([
+        ("cat", encoder, CATEGORICAL),
+        ("num", "passthrough", NUMERIC),
+    ]).fit(first)
+
+    classifier = HistGradientBoostingClassifier(
+        categorical_features=list(range(len(CATEGORICAL))),
+        max_iter=max_iter,
+        learning_rate=learning_rate,
+        max_leaf_nodes=max_leaf_nodes,
+        class_weight="balanced",
+        early_stopping=True,
+        random_state=RANDOM_STATE,
+    )
+    t0 = time.perf_counter()
+    classifier.fit(X_train, y_train)
+    print(f"  fitted {classifier.n_iter_} boosting iterations on {rows:,} rows "
+          f"in {time.perf_counter() - t0:.1f}s")
+    return Pipeline([("preprocessor", preprocessor), ("classifier", classifier)]), rows
+
+
+def _fit_sgd(source, chunksize, holdout, epochs=1, alpha=1e-5):
+    # pass 1: categories, scaling and class balance
+    vocabulary = _Vocabulary(CATEGORICAL)
+    scaler = StandardScaler()
+    classes = np.zeros(2, dtype=np.int64)
+    first = None
+    for X, y, draw in _labelled_chunks(source, chunksize):
+        train = holdout.add(X, y, draw)
+        if not train.any():
+            continue
+        vocabulary.count(vocabulary.encode(X[train]))
+        scaler.partial_fit(X.loc[train, NUMERIC].astype(np.float64))
+        classes += np.bincount(y[train], minlength=2)
+        first = X.head(100) if first is None else first
+    rows = int(classes.sum())
+    if not rows:
+        raise ValueError("No flight_delay rows with an arr_delay to train on.")
+
+    categories, _ = vocabulary.keep(SGD_MAX_CATEGORIES)
+    encoder = Pipeline([
+        ("text", FunctionTransformer(category_strings)),
+        ("onehot", OneHotEncoder(categories=[categories[c] for c in CATEGORICAL], handle_unknown="ignore")),
+    ])
+    preprocessor = ColumnTransformer([
+        ("cat", encoder, CATEGORICAL),
+        ("num", StandardScaler(), NUMERIC),
+    ]).fit(first)
+    # keep the scaling learned over every row, not the first chunk's
+    preprocessor.transformers_ = [(name, scaler if name == "num" else t, cols)
+                                  for name, t, cols in preprocessor.transformers_]
+
+    # "balanced" weights from the pass-1 class counts (partial_fit needs a dict)
+    weights = {c: rows / (2 * n) for c, n in enumerate(classes) if n}
+    classifier = SGDClassifier(loss="log_loss", alpha=alpha, class_weight=weights, random_state=RANDOM_STATE)
+
+    # passes 2..: partial_fit chunk by chunk
+    rng = np.random.default_rng(RANDOM_STATE)
+    for epoch in range(epochs):
+        seen = 0
+        for X, y, draw in _labelled_chunks(source, chunksize):
+            train = draw >= TEST_FRAC
+            if not train.any():
+                continue
+            # tables are stored in date order; shuffle within the chunk
+            order = rng.permutation(np.flatnonzero(train))
+            classifier.partial_fit(preprocessor.transform(X.iloc[order]), y[order], classes=[0, 1])
+            seen += int(train.sum())
+        print(f"  epoch {epoch + 1}/{epochs}: {seen:,} rows")
+    return Pipeline([("preprocessor", preprocessor), ("classifier", classifier)]), rows
+
+
+# ============================================================
+# TRAINING / EVALUATION
+# ============================================================
+def evaluate(model, X, y):
+    proba = model.predict_proba(X)[:, 1]
+    pred = (proba >= 0.5).astype(int)
+    return {
+        "accuracy": accuracy_score(y, pred),
+        "balanced_accuracy": balanced_accuracy_score(y, pred),
+        "f1_delayed": f1_score(y, pred, zero_division=0),
+        "roc_auc": roc_auc_score(y, proba) if len(np.unique(y)) > 1 else None,
+    }
+
+
+def _write_meta(learner, rows, metrics, path=META_PATH):
+    algorithm = {"hist": "HistGradientBoostingClassifier",
+                 "sgd": "SGDClassifier (logistic regression)"}[learner]
+    meta = json.loads(path.read_text()) if path.exists() else {}
+    meta.update({
+        "algorithm": f"{algorithm}, trained out-of-core on all rows",
+        "training_data": f"flight_delay ({rows:,} rows)",
+        "features": CATEGORICAL + NUMERIC,
+        "accuracy": f"{metrics['accuracy']:.0%}",
+        "roc_auc": None if metrics["roc_auc"] is None else round(metrics["roc_auc"], 4),
+        "last_trained": datetime.now().strftime("%Y-%m-%d"),
+    })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(meta, indent=2))
+
+
+def train_delay_incremental(learner="hist", source="sql", save_path="models/flight_delay_model.pkl",
+                            chunksize=TRAIN_CHUNKSIZE, compare=False, baseline_frac=0.1, epochs=1,
+                            eval_rows=EVAL_ROWS, save=True):
+    """
+    Streams flight_delay and trains the `learner` ("hist" / "sgd") delay
+    model on every training row; saves it to `save_path` (and its metrics
+    to models/model_info.json). With `compare`, also trains the current
+    random forest on a `baseline_frac` sample of the same training rows
+    and evaluates both on the same held-out rows.
+
+    Returns {"model", "metrics", "report"} (report: one row per model).
+    """
+    if learner not in ("hist", "sgd"):
+        raise ValueError(f"Unknown learner {learner!r}; use 'hist' or 'sgd'.")
+    print(f"🔧 Training the delay model out-of-core ({learner}, source: {source})...")
+    holdout = _Holdout(eval_rows, baseline_frac if compare else 0.0)
+
+    t0 = time.perf_counter()
+    if learner == "hist":
+        model, rows = _fit_hist(source, chunksize, holdout)
+    else:
+        model, rows = _fit_sgd(source, chunksize, holdout, epochs=epochs)
+    seconds = time.perf_counter() - t0
+    peak_mb = _peak_rss_mb()
+
+    X_test, y_test = holdout.test()
+    metrics = evaluate(model, X_test, y_test)
+    results = [{"model": learner, "train_rows": rows, "train_seconds": seconds,
+                "peak_rss_mb": peak_mb, **metrics}]
+    print(f"[SUCCESS] {learner}: {rows:,} rows in {seconds:.1f}s — accuracy {metrics['accuracy']:.4f}, "
+          f"ROC AUC {metrics['roc_auc']}")
+
+    if save:
+        save_model(model, save_path)
+        _write_meta(learner, rows, metrics)
+        print(f"[SAVED] Model → {save_path}")
+
+    if compare:
+        X_sample, y_sample = holdout.sample()
+        baseline = delay_rf_pipeline(RANDOM_STATE)
+        t1 = time.perf_counter()
+        baseline.fit(X_sample, y_sample)
+        rf_seconds = time.perf_counter() - t1
+        rf_metrics = evaluate(baseline, X_test, y_test)
+        results.append({"model": f"random forest ({baseline_frac:.0%} sample)", "train_rows": len(X_sample),
+                        "train_seconds": rf_seconds, "peak_rss_mb": None, **rf_metrics})
+        print(f"  sampled RF: {len(X_sample):,} rows in {rf_seconds:.1f}s (fit only) — "
+              f"accuracy {rf_metrics['accuracy']:.4f}, ROC AUC {rf_metrics['roc_auc']}")
+
+    report = pd.DataFrame(results)
+    report["test_rows"] = len(X_test)
+    return {"model": model, "metrics": metrics, "report": report}
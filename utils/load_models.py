@@ -1,26 +1,66 @@
 # utils/load_models.py
-import joblib
+# Models are loaded once per process and reloaded when their file changes
+# (see utils/model_registry.py).
 from pathlib import Path
 
+from utils.model_registry import get_model, preload
+from utils.tree_export import compiled_path, load_compiled
+
 MODEL_DIR = Path("models")
+MODEL_FILES = {
+    "delay": MODEL_DIR / "flight_delay_model.pkl",
+    "cancel": MODEL_DIR / "cancellation_model.pkl",
+    "revenue": MODEL_DIR / "revenue_forecast.pkl",
+}
 
 def load_delay_model(path=None):
     if path is None:
-        path = MODEL_DIR / "flight_delay_model.pkl"
+        path = MODEL_FILES["delay"]
     else:
         path = Path(path)
     if not path.exists():
         print(f"⚠️ Delay model not found at: {path}")
         return None
-    return joblib.load(path)
+    return get_model(path)
 
 
 def load_revenue_model(path=None):
     if path is None:
-        path = MODEL_DIR / "revenue_forecast.pkl"
+        path = MODEL_FILES["revenue"]
     else:
         path = Path(path)
     if not path.exists():
         print(f"⚠️ Revenue model not found at: {path}")
         return None
-    return joblib.load(path)
+    return get_model(path)
+
+
+def load_cancellation_model(path=None):
+    """
+    The cancellation bundle: {"model", "dimensions", "features"}.
+    """
+    if path is None:
+        path = MODEL_FILES["cancel"]
+    else:
+        path = Path(path)
+    if not path.exists():
+        print(f"⚠️ Cancellation model not found at: {path}")
+        return None
+    return get_model(path)
+
+
+def load_compiled_model(kind, path=None):
+    """
+    The array-based export of the "delay" pipeline or the "cancel" forest
+    (utils/tree_export.py), or None if it is missing or older than the model.
+    """
+    return load_compiled(path or MODEL_FILES[kind])
+
+
+def preload_models(names=("delay", "cancel", "revenue")):
+    """
+    Loads the models in the background at server start (once per process).
+    """
+    paths = [MODEL_FILES[name] for name in names]
+    # and the array-based exports, where they exist
+    return preload(paths + [compiled_path(p) for p in paths])
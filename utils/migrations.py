@@ -0,0 +1,119 @@
+# utils/migrations.py
+"""
+Versioned SQL migrations from sql/migrations/NNN_name.sql.
+
+Applied versions are recorded in `schema_migrations` together with a
+checksum of the file, so every migration runs exactly once per database
+and later edits to an applied file are reported.
+"""
+import hashlib
+import re
+from pathlib import Path
+
+from sqlalchemy import text
+
+from utils.db_connection import get_db_engine
+from utils.query_cache import mark_tables_changed, ALL_TABLES
+
+MIGRATIONS_DIR = Path("sql/migrations")
+MIGRATIONS_TABLE = "schema_migrations"
+
+_FILE_RE = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """
+    Returns [(version, name, path)] sorted by version.
+    """
+    found = []
+    for path in Path(directory).glob("*.sql"):
+        m = _FILE_RE.match(path.name)
+        if m:
+            found.append((int(m.group(1)), m.group(2), path))
+    return sorted(found)
+
+
+def split_statements(sql):
+    """
+    Splits a migration file into statements (drops `--` comment lines).
+    """
+    lines = [ln for ln in sql.splitlines() if not ln.strip().startswith("--")]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def _checksum(path):
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def applied_migrations(engine=None):
+    """
+    Returns {version: checksum} of migrations already applied.
+    """
+    engine = engine or get_db_engine()
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+                version INT PRIMARY KEY,
+                name VARCHAR(200) NOT NULL,
+                checksum VARCHAR(40) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        rows = conn.execute(text(f"SELECT version, checksum FROM {MIGRATIONS_TABLE}")).fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+def migration_status(engine=None, directory=MIGRATIONS_DIR):
+    """
+    Returns [(version, name, state)] with state applied / pending / changed.
+    """
+    applied = applied_migrations(engine)
+    status = []
+    for version, name, path in discover_migrations(directory):
+        if version not in applied:
+            state = "pending"
+        elif applied[version] != _checksum(path):
+            state = "changed"
+        else:
+            state = "applied"
+        status.append((version, name, state))
+    return status
+
+
+def apply_migrations(engine=None, directory=MIGRATIONS_DIR, target=None, dry_run=False):
+    """
+    Applies pending migrations in version order (up to `target` if given).
+    Returns the list of applied versions.
+
+    MySQL commits DDL implicitly, so a failing migration stops the run
+    and stays pending; fix it and re-run.
+    """
+    engine = engine or get_db_engine()
+    applied = applied_migrations(engine)
+    done = []
+
+    for version, name, path in discover_migrations(directory):
+        if version in applied or (target is not None and version > target):
+            continue
+
+        statements = split_statements(path.read_text(encoding="utf-8"))
+        print(f"[MIGRATE] {version:03d}_{name} ({len(statements)} statements)")
+        if dry_run:
+            for stmt in statements:
+                print("   ", stmt.splitlines()[0], "...")
+            continue
+
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.exec_driver_sql(stmt)
+            conn.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (version, name, checksum) "
+                     "VALUES (:version, :name, :checksum)"),
+                {"version": version, "name": name, "checksum": _checksum(path)},
+            )
+        done.append(version)
+
+    if done:
+        # a migration may change any table: move every cached watermark
+        mark_tables_changed(engine, [ALL_TABLES])
+    return done
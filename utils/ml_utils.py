@@ -1,8 +1,6 @@
 # utils/ml_utils.py
 import pandas as pd
 import numpy as np
-import joblib
-from pathlib import Path
 
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
@@ -11,6 +9,9 @@ from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
 
+from utils.model_registry import save_model
+from utils.tree_export import export_model, save_compiled
+
 try:
     from prophet import Prophet
 except Exception:
@@ -53,66 +54,55 @@ def extract_hour(value):
 
 
 # ============================================================
-# TRAIN FLIGHT DELAY MODEL — FINAL CONSISTENT VERSION
+# DELAY FEATURES (shared by training and batch scoring)
 # ============================================================
-def train_delay_model(
-    df,
-    sample_frac=0.1,
-    save_path="models/flight_delay_model.pkl",
-    random_state=42
-):
-
-    print("🔧 Training flight delay prediction model...")
-
+def prepare_delay_frame(df):
+    """
+    Copy of `df` with typed inputs and the derived columns the delay model
+    uses (crs_dep_hour, month, dayofweek). Missing inputs become NaN.
+    """
     df = df.copy()
-
-    # -------------------------------------
-    # FIX: Clean + create consistent columns
-    # -------------------------------------
     df["flight_date"] = pd.to_datetime(df["flight_date"], errors="coerce")
 
     df["airline"] = df["airline"].astype(str)
     df["origin"] = df["origin"].astype(str)
     df["destination"] = df["destination"].astype(str)
 
-    df["arr_delay"] = pd.to_numeric(df["arr_delay"], errors="coerce")
-    df["dep_delay"] = pd.to_numeric(df["dep_delay"], errors="coerce")
-    df["distance"] = pd.to_numeric(df["distance"], errors="coerce")
-    df["taxi_out"] = pd.to_numeric(df["taxi_out"], errors="coerce")
+    for col in ["dep_delay", "distance", "taxi_out"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else np.nan
 
-    # Hour extraction
+    # Hour extraction (HHMM → HH, as extract_hour)
     if "crs_dep_hour" not in df.columns:
         if "CRSDepTime" in df.columns:
-            df["crs_dep_hour"] = df["CRSDepTime"].apply(extract_hour)
+            df["crs_dep_hour"] = np.trunc(pd.to_numeric(df["CRSDepTime"], errors="coerce")) // 100
         else:
             df["crs_dep_hour"] = np.nan
 
     df["month"] = df["flight_date"].dt.month
     df["dayofweek"] = df["flight_date"].dt.weekday
+    return df
 
-    # Drop rows with no arrival delay (target missing)
-    df = df.dropna(subset=["arr_delay"])
-    df["is_delayed"] = (df["arr_delay"] > 15).astype(int)
-
-    # Optional sampling
-    if 0 < sample_frac < 1:
-        df = df.sample(frac=sample_frac, random_state=random_state)
 
-    # -------------------------------------
-    # FIX: Use EXACT COLUMNS ALWAYS
-    # -------------------------------------
+def delay_feature_matrix(df):
+    """
+    The model's input columns (CATEGORICAL + NUMERIC) with missing values
+    filled as in training.
+    """
     X = df[CATEGORICAL + NUMERIC].copy()
-    y = df["is_delayed"]
-
-    # Fill missing
     for col in CATEGORICAL:
         X[col] = X[col].fillna("UNK")
     for col in NUMERIC:
         X[col] = X[col].fillna(-1)
+    return X
 
-    # -------------------------------------
-    # Preprocessor
-    # -------------------------------------
+
+# ============================================================
+# TRAIN FLIGHT DELAY MODEL — FINAL CONSISTENT VERSION
+# ============================================================
+def delay_rf_pipeline(random_state=42):
+    """
+    Unfitted delay model: one-hot + scaling, then the random forest.
+    """
     preprocessor = ColumnTransformer([
         ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL),
         ("num", StandardScaler(), NUMERIC)
@@ -125,11 +115,43 @@ def train_delay_model(
         class_weight="balanced"
     )
 
-    pipeline = Pipeline([
+    return Pipeline([
         ("preprocessor", preprocessor),
         ("classifier", model)
     ])
 
+
+def train_delay_model(
+    df,
+    sample_frac=0.1,
+    save_path="models/flight_delay_model.pkl",
+    random_state=42
+):
+
+    print("🔧 Training flight delay prediction model...")
+
+    # -------------------------------------
+    # FIX: Clean + create consistent columns
+    # -------------------------------------
+    df = prepare_delay_frame(df)
+
+    # Drop rows with no arrival delay (target missing)
+    df["arr_delay"] = pd.to_numeric(df["arr_delay"], errors="coerce")
+    df = df.dropna(subset=["arr_delay"])
+    df["is_delayed"] = (df["arr_delay"] > 15).astype(int)
+
+    # Optional sampling
+    if 0 < sample_frac < 1:
+        df = df.sample(frac=sample_frac, random_state=random_state)
+
+    # -------------------------------------
+    # FIX: Use EXACT COLUMNS ALWAYS
+    # -------------------------------------
+    X = delay_feature_matrix(df)
+    y = df["is_delayed"]
+
+    pipeline = delay_rf_pipeline(random_state)
+
     # Split + train
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=random_state, stratify=y
@@ -142,11 +164,13 @@ def train_delay_model(
     print("\nConfusion Matrix:")
     print(confusion_matrix(y_test, pipeline.predict(X_test)))
 
-    # Save model
-    Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(pipeline, save_path)
+    # Save model (atomic rename: running app processes hot-swap to it)
+    save_model(pipeline, save_path)
+    print(f"\n[SAVED] Model → {save_path}")
 
-    print(f"\n[SAVED] Model → {save_path}\n")
+    # array-based copy for fast single predictions (utils/tree_export.py)
+    compiled = save_compiled(export_model(pipeline, CATEGORICAL + NUMERIC), save_path)
+    print(f"[SAVED] Compiled model → {compiled}\n")
 
 
 # ============================================================
@@ -176,7 +200,6 @@ def train_revenue_prophet(df, save_path="models/revenue_forecast.pkl"):
     model = Prophet(yearly_seasonality=True)
     model.fit(df_daily)
 
-    Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, save_path)
+    save_model(model, save_path)
 
     print(f"[SAVED] Revenue Model → {save_path}")
@@ -0,0 +1,220 @@
+# utils/model_registry.py
+"""
+Process-wide cache of fitted model artifacts.
+
+Each file is loaded once per process and shared by every session and
+thread; the entry is keyed by the file's path and version (mtime, size),
+so writing a new model to the same path swaps it in on the next get().
+While the new version loads, other callers keep getting the old one.
+
+    model = get_model("models/flight_delay_model.pkl")
+    preload(["models/flight_delay_model.pkl", ...])   # background thread
+    save_model(pipeline, "models/flight_delay_model.pkl")
+
+Artifacts are opened with joblib.load(mmap_mode="r"): NumPy arrays stored
+by an uncompressed joblib.dump (see save_model) are mapped read-only from
+the file instead of copied, so worker processes share the same pages of
+the OS page cache. Plain pickles load normally. Because of the mapping,
+replace model files (save_model, or write + rename) rather than
+overwriting them in place.
+"""
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import joblib
+
+
+# ============================================================
+# CONFIG (override through .env)
+# ============================================================
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "1") != "0"
+
+
+def file_version(path):
+    """
+    (mtime_ns, size) of `path`; raises FileNotFoundError.
+    """
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def save_model(model, path):
+    """
+    Writes `model` with an uncompressed joblib.dump (so its arrays can be
+    memory-mapped) to a temporary file and renames it over `path`: loaders
+    never see a half-written file, and running processes hot-swap to it.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        joblib.dump(model, tmp)
+        os.replace(tmp, path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+class _Entry:
+    __slots__ = ("model", "version", "loaded_at", "seconds")
+
+    def __init__(self, model, version, seconds):
+        self.model = model
+        self.version = version
+        self.loaded_at = time.time()
+        self.seconds = seconds
+
+
+class ModelRegistry:
+    """
+    Loaded models by resolved path. A get() costs one stat() when the file
+    is unchanged; only the first caller of a new version loads it.
+    """
+
+    def __init__(self, mmap_mode=MODEL_MMAP_MODE):
+        self.mmap_mode = mmap_mode
+        self._entries = {}
+        self._loading = {}             # path -> lock held while it loads
+        self._failed = {}              # path -> version that failed to load
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+        self.swaps = 0
+        self.failures = 0
+
+    def _load(self, path):
+        t0 = time.perf_counter()
+        try:
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+        except ValueError:
+            # files that cannot be mapped (e.g. compressed dumps)
+            model = joblib.load(path)
+        return model, time.perf_counter() - t0
+
+    def get(self, path):
+        """
+        The model stored at `path`, loading it if the file is new or has
+        changed; raises FileNotFoundError.
+        """
+        path = Path(path).resolve()
+        version = file_version(path)
+        entry = self._entries.get(path)
+        if entry is not None and (entry.version == version or self._failed.get(path) == version):
+            self.hits += 1
+            return entry.model
+
+        with self._lock:
+            loading = self._loading.setdefault(path, threading.Lock())
+        if entry is not None and not loading.acquire(blocking=False):
+            # another thread is loading the new version
+            self.hits += 1
+            return entry.model
+        if entry is None:
+            loading.acquire()
+
+        try:
+            entry = self._entries.get(path)
+            version = file_version(path)
+            if entry is not None and (entry.version == version or self._failed.get(path) == version):
+                self.hits += 1
+                return entry.model
+            try:
+                model, seconds = self._load(path)
+            except Exception as e:
+                if entry is None:
+                    raise
+                # e.g. a file still being written: keep the version we have
+                self.failures += 1
+                self._failed[path] = version
+                print(f"⚠️ Could not reload {path.name}, keeping the loaded version: {e}")
+                return entry.model
+
+            self.loads += 1
+            if entry is not None:
+                self.swaps += 1
+                print(f"[SUCCESS] Reloaded {path.name} ({seconds:.2f}s)")
+            self._entries[path] = _Entry(model, version, seconds)
+            return model
+        finally:
+            loading.release()
+
+    def preload(self, paths):
+        """
+        Loads the existing files among `paths` on a daemon thread; returns
+        the thread. get() on a model that is still loading waits for it.
+        """
+        def run():
+            for path in paths:
+                try:
+                    self.get(path)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"⚠️ Could not preload {path}: {e}")
+
+        thread = threading.Thread(target=run, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def evict(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(path).resolve(), None)
+
+    def stats(self):
+        return {
+            "models": {
+                str(path): {
+                    "mtime_ns": entry.version[0],
+                    "size_mb": round(entry.version[1] / 1024 ** 2, 1),
+                    "load_seconds": round(entry.seconds, 3),
+                    "loaded_at": entry.loaded_at,
+                }
+                for path, entry in list(self._entries.items())
+            },
+            "hits": self.hits,
+            "loads": self.loads,
+            "swaps": self.swaps,
+            "failures": self.failures,
+            "mmap_mode": self.mmap_mode,
+        }
+
+
+# ============================================================
+# SHARED REGISTRY
+# ============================================================
+_registry = ModelRegistry()
+_preloaded = False
+
+
+def get_model(path):
+    return _registry.get(path)
+
+
+def preload(paths):
+    """
+    Starts loading `paths` in the background once per process (later calls,
+    e.g. on every Streamlit rerun, do nothing). Disabled by MODEL_PRELOAD=0.
+    """
+    global _preloaded
+    with _registry._lock:
+        if _preloaded or not MODEL_PRELOAD:
+            return None
+        _preloaded = True
+    return _registry.preload(list(paths))
+
+
+def get_registry_stats():
+    return _registry.stats()
+
+
+def clear_models(path=None):
+    _registry.evict(path)
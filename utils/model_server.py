@@ -0,0 +1,443 @@
+# utils/model_server.py
+"""
+Local HTTP prediction server for the delay and cancellation models.
+
+Requests carry one flight (or a few); concurrent requests for the same
+model are coalesced into micro-batches of at most MAX_BATCH rows, waiting
+at most MAX_WAIT_MS for a batch to fill, and each batch is scored with one
+predict_proba call on an inference thread so the event loop keeps
+accepting requests. The array-based exports (utils/tree_export.py) are
+used when present. Models come from the shared registry
+(utils/model_registry.py), so a retrained model file is picked up live.
+
+    POST /predict/delay   {"flight_date": "2015-06-01", "airline": "AA", "origin": "JFK",
+                           "destination": "LAX", "dep_delay": 5, "distance": 2475}
+      -> {"probability": 0.31, "model_version": "flight_delay_model.pkl@2026-..."}
+    POST /predict/cancel  {"rows": [{...}, {...}]}  -> {"probabilities": [...], ...}
+    GET  /metrics         latency percentiles and batch-size histograms per model
+    GET  /health
+
+Inputs use the flight_delay column names (see utils/batch_scoring.py);
+start it with `python -m scripts.serve_models`.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import CANCEL_INPUTS, MODEL_FILES, load_scoring_model, model_version, score_frame
+from utils.dimensions import bundle_dimensions
+from utils.tree_export import load_compiled
+
+
+# ============================================================
+# CONFIG (override through .env)
+# ============================================================
+SERVER_HOST = os.getenv("MODEL_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("MODEL_SERVER_PORT", "8600"))
+MAX_BATCH = int(os.getenv("MODEL_SERVER_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.getenv("MODEL_SERVER_MAX_WAIT_MS", "5"))
+INFERENCE_THREADS = int(os.getenv("MODEL_SERVER_THREADS", "1"))
+# latencies kept per model for the percentiles
+LATENCY_WINDOW = int(os.getenv("MODEL_SERVER_LATENCY_WINDOW", "10000"))
+MAX_BODY_BYTES = 1024 * 1024
+
+# fields a row must have, per model (any one of each list)
+REQUIRED = {
+    "delay": [["flight_date"], ["airline"], ["origin"], ["destination"]],
+    "cancel": [CANCEL_INPUTS["Airline"], CANCEL_INPUTS["Origin"], CANCEL_INPUTS["Dest"]],
+}
+
+# optional fields that must parse when given
+NUMERIC_FIELDS = ["dep_delay", "distance", "taxi_out", "CRSDepTime", "Month", "DayOfWeek",
+                  "DepDelayMinutes", "Distance"]
+DATE_FIELDS = ["flight_date", "FlightDate"]
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# ============================================================
+# METRICS
+# ============================================================
+class ServingStats:
+    """
+    Per-model HTTP request latency (the last LATENCY_WINDOW requests),
+    per-row latency (queued to scored), queue wait, inference time and
+    batch sizes.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latency_ms = deque(maxlen=window)
+        self.row_latency_ms = deque(maxlen=window)
+        self.wait_ms = deque(maxlen=window)
+        self.batch_ms = deque(maxlen=window)
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def record_batch(self, size, inference_ms, waits_ms):
+        self.batch_sizes[size] += 1
+        self.rows += size
+        self.batch_ms.append(inference_ms)
+        self.wait_ms.extend(waits_ms)
+
+    def record_request(self, latency_ms):
+        """
+        One HTTP request, however many rows it carried.
+        """
+        self.requests += 1
+        self.latency_ms.append(latency_ms)
+
+    def record_row(self, latency_ms):
+        self.row_latency_ms.append(latency_ms)
+
+    @staticmethod
+    def _percentiles(values, percentiles=(50, 90, 99)):
+        values = np.fromiter(values, dtype=float)
+        if len(values) == 0:
+            return {f"p{p}": None for p in percentiles}
+        return {f"p{p}": round(float(np.percentile(values, p)), 3) for p in percentiles}
+
+    def to_dict(self):
+        batches = sum(self.batch_sizes.values())
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "errors": self.errors,
+            "batches": batches,
+            "mean_batch_size": round(self.rows / batches, 2) if batches else None,
+            "latency_ms": self._percentiles(self.latency_ms),
+            "row_latency_ms": self._percentiles(self.row_latency_ms),
+            "queue_wait_ms": self._percentiles(self.wait_ms),
+            "inference_ms": self._percentiles(self.batch_ms),
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+        }
+
+
+# ============================================================
+# MICRO-BATCHING
+# ============================================================
+class MicroBatcher:
+    """
+    Queues single rows for one model and scores them in batches: a batch
+    closes when it has `max_batch` rows or `max_wait_ms` after its first
+    row arrived. While a batch is being scored new rows keep queueing, so
+    under load batches fill without waiting.
+    """
+
+    def __init__(self, kind, executor, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, model_path=None):
+        self.kind = kind
+        self.executor = executor
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.model_path = Path(model_path or MODEL_FILES[kind])
+        self.stats = ServingStats()
+        self._queue = asyncio.Queue()
+        self._dimensions = (None, None)      # (model id, dimensions) for the cancel bundle
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def predict(self, row):
+        """
+        Probability for one row (a dict of input fields) and the model version.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            batch = [item for item in batch if not item[1].done()]     # client went away
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                proba, version = await loop.run_in_executor(self.executor, self.score, [b[0] for b in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._fail(batch[0], e)
+                    continue
+                # one bad row must not fail the other requests: retry row by row
+                await self._score_each(batch)
+                continue
+            done = time.perf_counter()
+            self.stats.record_batch(len(batch), (done - started) * 1000,
+                                    [(started - t0) * 1000 for _, _, t0 in batch])
+            for item, p in zip(batch, proba):
+                self._resolve(item, float(p), version, done)
+
+    def _resolve(self, item, probability, version, done):
+        _, future, t0 = item
+        if not future.done():
+            future.set_result((probability, version))
+        self.stats.record_row((done - t0) * 1000)
+
+    def _fail(self, item, error):
+        self.stats.errors += 1
+        if not item[1].done():
+            item[1].set_exception(error)
+
+    async def _score_each(self, batch):
+        loop = asyncio.get_running_loop()
+        for item in batch:
+            started = time.perf_counter()
+            try:
+                proba, version = await loop.run_in_executor(self.executor, self.score, [item[0]])
+            except Exception as e:
+                self._fail(item, e)
+                continue
+            done = time.perf_counter()
+            self.stats.record_batch(1, (done - started) * 1000, [(started - item[2]) * 1000])
+            self._resolve(item, float(proba[0]), version, done)
+
+    def load(self):
+        """
+        The current model (reloaded by the registry when its file changes).
+        """
+        return load_scoring_model(self.kind, self.model_path)
+
+    def score(self, rows):
+        """
+        One vectorized predict_proba over `rows`; runs on the inference thread.
+        """
+        model = self.load()
+        # micro-batches are small: the array-based export is much faster there
+        compiled = load_compiled(self.model_path)
+        dimensions = None
+        if self.kind == "cancel":
+            if self._dimensions[0] != id(model):
+                self._dimensions = (id(model), bundle_dimensions(model))
+            dimensions = self._dimensions[1]
+            if compiled is not None:
+                model = dict(model, model=compiled)
+        elif compiled is not None:
+            model = compiled
+        scored = score_frame(pd.DataFrame(rows), self.kind, model, dimensions)
+        return scored[f"{self.kind}_probability"].to_numpy(), model_version(self.model_path)
+
+
+# ============================================================
+# HTTP
+# ============================================================
+def _validate(kind, row):
+    if not isinstance(row, dict):
+        raise BadRequest("each row must be a JSON object")
+    missing = [names[-1] for names in REQUIRED[kind] if all(row.get(n) in (None, "") for n in names)]
+    if missing:
+        raise BadRequest(f"missing field(s): {', '.join(missing)}")
+    # scoring would coerce these to NaN / NaT and still return a probability
+    for name in NUMERIC_FIELDS:
+        value = row.get(name)
+        if value in (None, ""):
+            continue
+        try:
+            float(value)
+        except (TypeError, ValueError):
+            raise BadRequest(f"{name} is not a number: {value!r}")
+    for name in DATE_FIELDS:
+        value = row.get(name)
+        if value in (None, ""):
+            continue
+        try:
+            pd.Timestamp(value)
+        except (TypeError, ValueError):
+            raise BadRequest(f"{name} is not a date: {value!r}")
+    return row
+
+
+def _content_length(headers):
+    """
+    Content-Length as an int, or None when it is not a non-negative number.
+    """
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+class ModelServer:
+    """
+    Minimal HTTP/1.1 server (keep-alive, JSON bodies) on asyncio streams,
+    with one MicroBatcher per model.
+    """
+
+    def __init__(self, kinds=("delay", "cancel"), host=SERVER_HOST, port=SERVER_PORT,
+                 max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, threads=INFERENCE_THREADS):
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="inference")
+        self.kinds = list(kinds)
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.batchers = {}
+        self._server = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for kind in self.kinds:
+            batcher = MicroBatcher(kind, self.executor, self.max_batch, self.max_wait_ms)
+            await loop.run_in_executor(self.executor, batcher.load)   # preload; fails fast if missing
+            batcher.start()
+            self.batchers[kind] = batcher
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"[SUCCESS] Serving {', '.join(self.kinds)} on http://{self.host}:{self.port} "
+              f"(max batch {self.max_batch}, max wait {self.max_wait_ms} ms)")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    def metrics(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_ms,
+            "models": {kind: b.stats.to_dict() for kind, b in self.batchers.items()},
+        }
+
+    async def _route(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok", "models": list(self.batchers)}
+        if path == "/metrics":
+            return 200, self.metrics()
+        if not path.startswith("/predict/"):
+            return 404, {"error": f"unknown path {path}"}
+        kind = path[len("/predict/"):]
+        if kind not in self.batchers:
+            return 404, {"error": f"unknown model {kind!r}; serving {sorted(self.batchers)}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise BadRequest("body is not valid JSON")
+        batcher = self.batchers[kind]
+        started = time.perf_counter()
+        if isinstance(payload, dict) and "rows" in payload:
+            rows = payload["rows"] or []
+            if not isinstance(rows, list):
+                raise BadRequest("rows must be a JSON array")
+            rows = [_validate(kind, row) for row in rows]
+            results = await asyncio.gather(*(batcher.predict(row) for row in rows))
+            result = {"probabilities": [p for p, _ in results],
+                      "model_version": results[0][1] if results else None}
+        else:
+            probability, version = await batcher.predict(_validate(kind, payload))
+            result = {"probability": probability, "model_version": version}
+        batcher.stats.record_request((time.perf_counter() - started) * 1000)
+        return 200, result
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = _content_length(headers)
+                if length is None:
+                    # the body cannot be framed, so the connection cannot be reused
+                    status, result = 400, {"error": "invalid Content-Length"}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, result = 413, {"error": "body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  and version.upper() == "HTTP/1.1")
+                    try:
+                        status, result = await self._route(method.upper(), target.split("?")[0], body)
+                    except BadRequest as e:
+                        status, result = 400, {"error": str(e)}
+                    except FileNotFoundError as e:
+                        status, result = 503, {"error": f"model file not found: {e}"}
+                    except Exception as e:
+                        status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(result).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def serve(kinds=("delay", "cancel"), host=SERVER_HOST, port=SERVER_PORT, max_batch=MAX_BATCH,
+          max_wait_ms=MAX_WAIT_MS, threads=INFERENCE_THREADS):
+    """
+    Runs the server until interrupted.
+    """
+    server = ModelServer(kinds, host, port, max_batch, max_wait_ms, threads)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Server stopped.")
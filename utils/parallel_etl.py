@@ -0,0 +1,219 @@
+# utils/parallel_etl.py
+"""
+Sharded, multi-process ETL over raw CSV files.
+
+Inputs are split into shards: one per file, and large files further into
+byte ranges that start and end on line boundaries (every shard re-reads
+the file header, so pandas sees a normal CSV). Shards run in a process
+pool; results come back in shard order, so outputs merged from them are
+the same whatever the worker count.
+
+    shards = plan_shards(["data/raw/flight.csv"], n_shards=8)
+    results = run_sharded(process_shard, shards, workers=8,
+                          initializer=load_lookups, initargs=(names,))
+
+Byte-range splitting assumes records never span lines (true for the BTS
+exports; quoted fields with embedded newlines are not supported).
+"""
+import io
+import os
+import shutil
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pyarrow as pa
+except Exception:
+    pa = None
+
+ETL_WORKERS = int(os.getenv("ETL_WORKERS", str(os.cpu_count() or 1)))
+MIN_SHARD_MB = float(os.getenv("ETL_MIN_SHARD_MB", "32"))
+
+Shard = namedtuple("Shard", ["index", "path", "start", "end"])
+
+
+# ============================================================
+# SHARD PLANNING
+# ============================================================
+def _header_end(path):
+    with open(path, "rb") as f:
+        f.readline()
+        return f.tell()
+
+
+def _next_line_start(f, offset):
+    """
+    First line start at or after `offset`.
+    """
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def plan_shards(paths, n_shards=None, min_shard_bytes=None):
+    """
+    Splits `paths` (one path or a list) into about `n_shards` shards of
+    similar size, never smaller than `min_shard_bytes` (ETL_MIN_SHARD_MB).
+    Shards are numbered in file, then byte, order.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    n_shards = n_shards or ETL_WORKERS
+    min_shard_bytes = int(MIN_SHARD_MB * 1024 * 1024) if min_shard_bytes is None else min_shard_bytes
+
+    sizes = {p: os.path.getsize(p) for p in paths}
+    target = max(sum(sizes.values()) // max(n_shards, 1), min_shard_bytes, 1)
+
+    shards = []
+    for path in paths:
+        start, size = _header_end(path), sizes[path]
+        if start >= size:
+            continue
+        pieces = max(1, round((size - start) / target))
+        step = (size - start) / pieces
+        bounds = [start]
+        with open(path, "rb") as f:
+            for i in range(1, pieces):
+                cut = _next_line_start(f, start + int(i * step))
+                if bounds[-1] < cut < size:
+                    bounds.append(cut)
+        bounds.append(size)
+        for lo, hi in zip(bounds, bounds[1:]):
+            shards.append(Shard(len(shards), str(path), lo, hi))
+    return shards
+
+
+# ============================================================
+# READING ONE SHARD
+# ============================================================
+class _ShardReader(io.RawIOBase):
+    """
+    The file header followed by bytes [start, end) of the file.
+    """
+
+    def __init__(self, shard):
+        self._file = open(shard.path, "rb")
+        self._prefix = self._file.readline()
+        self._file.seek(shard.start)
+        self._remaining = shard.end - shard.start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        view = memoryview(buf)
+        if self._prefix:
+            n = min(len(view), len(self._prefix))
+            view[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        if self._remaining <= 0:
+            return 0
+        n = self._file.readinto(view[:min(len(view), self._remaining)])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_shard(shard):
+    """
+    Binary file object over one shard, header included:
+
+        with open_shard(shard) as f:
+            for chunk in pd.read_csv(f, chunksize=100000): ...
+    """
+    return io.BufferedReader(_ShardReader(shard), buffer_size=1024 * 1024)
+
+
+# ============================================================
+# PROCESS POOL
+# ============================================================
+def _init_worker(initializer, initargs):
+    # one process per core already; keep Arrow from starting its own pools
+    if pa is not None:
+        pa.set_cpu_count(1)
+        pa.set_io_thread_count(1)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def run_sharded(fn, shards, workers=None, initializer=None, initargs=(), on_result=None):
+    """
+    Runs fn(shard) for every shard on `workers` processes (ETL_WORKERS)
+    and returns the results in shard order. `initializer(*initargs)` runs
+    once per process (e.g. to install the small lookups). workers=1 runs
+    in this process. on_result(shard, result) is called as shards finish,
+    in order.
+    """
+    workers = max(1, min(workers or ETL_WORKERS, len(shards)))
+    results = []
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for shard in shards:
+            results.append(fn(shard))
+            if on_result:
+                on_result(shard, results[-1])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(initializer, initargs)) as pool:
+        for shard, result in zip(shards, pool.map(fn, shards)):
+            results.append(result)
+            if on_result:
+                on_result(shard, result)
+    return results
+
+
+def imap_ordered(fn, items, workers=None, initializer=None, initargs=(), max_pending=None):
+    """
+    Lazily runs fn(item) over an iterable (e.g. DataFrame chunks read by
+    the caller) on `workers` processes and yields the results in input
+    order. At most `max_pending` items (default 2 per worker) are in
+    flight, so memory stays bounded whatever the input size. workers=1
+    runs in this process.
+    """
+    workers = max(1, workers or ETL_WORKERS)
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield fn(item)
+        return
+
+    max_pending = max_pending or 2 * workers
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(initializer, initargs)) as pool:
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ============================================================
+# MERGING
+# ============================================================
+def concat_csv_parts(parts, out_path):
+    """
+    Concatenates per-shard CSV files (each with a header) into `out_path`
+    in the given order, keeping only the first header. The output is
+    written to a .partial file and renamed into place.
+    """
+    tmp_path = str(out_path) + ".partial"
+    os.makedirs(os.path.dirname(str(out_path)) or ".", exist_ok=True)
+    with open(tmp_path, "wb") as out:
+        for i, part in enumerate(parts):
+            with open(part, "rb") as f:
+                header = f.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out, 1024 * 1024)
+    os.replace(tmp_path, out_path)
+    return out_path
@@ -0,0 +1,560 @@
+# utils/partitions.py
+"""
+Monthly date partitioning for flight facts.
+
+MySQL: flight_delay is RANGE COLUMNS(flight_date) partitioned with one
+partition per month (pYYYY_MM) plus a catch-all pmax. Old months can be
+detached into an archive table with EXCHANGE PARTITION (no table rewrite).
+
+Embedded backend: the same layout as Parquet files under
+data/partitions/<table>/year=YYYY/month=MM/, where detaching a month is a
+directory rename.
+
+Pages always go through window_clause(), so every query carries a
+flight_date range the database (or file scan) can prune on.
+"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import text
+
+from utils.db_connection import get_db_engine
+from utils.query_cache import mark_tables_changed
+from utils.run_query import run_query
+
+from utils.schemas import get_schema, CATEGORY, DATE
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+    ds = None
+    pq = None
+
+PARTITION_ROOT = Path(os.getenv("PARTITION_ROOT", "data/partitions"))
+ARCHIVE_ROOT = Path(os.getenv("PARTITION_ARCHIVE_ROOT", "data/archive"))
+DEFAULT_WINDOW_DAYS = int(os.getenv("DEFAULT_WINDOW_DAYS", "90"))
+ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "131072"))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+READ_BATCH_SIZE = 100000
+
+
+# ============================================================
+# DATE WINDOWS (partition pruning for page queries)
+# ============================================================
+def default_window(table="flight_delay", days=DEFAULT_WINDOW_DAYS):
+    """
+    Returns (start, end) covering the most recent `days` of `table`,
+    or (None, None) if it is empty.
+    """
+    df = run_query(f"SELECT MAX(flight_date) AS max_date FROM {table}")
+    if df.empty or pd.isna(df.loc[0, "max_date"]):
+        return None, None
+    end = pd.to_datetime(df.loc[0, "max_date"]).date()
+    start = (pd.Timestamp(end) - pd.Timedelta(days=days - 1)).date()
+    return start, end
+
+
+def window_clause(start=None, end=None, column="flight_date", table="flight_delay", extra=None):
+    """
+    Returns (WHERE clause, params) that always bounds `column` to a date
+    window; a missing start/end falls back to default_window(table).
+    """
+    if start is None or end is None:
+        d_start, d_end = default_window(table)
+        start = start if start is not None else d_start
+        end = end if end is not None else d_end
+
+    clauses = list(extra or [])
+    params = {}
+    if start is not None and end is not None:
+        clauses.insert(0, f"{column} BETWEEN :start AND :end")
+        params = {"start": str(start), "end": str(end)}
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+
+# ============================================================
+# MYSQL RANGE PARTITIONS
+# ============================================================
+def month_starts(start, end):
+    """
+    First day of every month from `start`'s month through `end`'s month.
+    """
+    first = pd.Timestamp(start).to_period("M").to_timestamp()
+    last = pd.Timestamp(end).to_period("M").to_timestamp()
+    return list(pd.date_range(first, last, freq="MS"))
+
+
+def partition_name(month):
+    return f"p{pd.Timestamp(month):%Y_%m}"
+
+
+def _partition_defs(months):
+    defs = []
+    for m in months:
+        upper = (pd.Timestamp(m) + pd.offsets.MonthBegin(1)).date()
+        defs.append(f"PARTITION {partition_name(m)} VALUES LESS THAN ('{upper}')")
+    defs.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return defs
+
+
+def partition_table_ddl(table, start, end, column="flight_date"):
+    """
+    ALTER TABLE statement that range-partitions `table` by month.
+    """
+    defs = ",\n    ".join(_partition_defs(month_starts(start, end)))
+    return f"ALTER TABLE {table}\nPARTITION BY RANGE COLUMNS({column}) (\n    {defs}\n)"
+
+
+def list_partitions(table="flight_delay", engine=None):
+    """
+    Returns the table's partitions with row estimates (MySQL only).
+    """
+    engine = engine or get_db_engine()
+    q = """
+    SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS upper_bound, TABLE_ROWS AS est_rows
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+    """
+    with engine.connect() as conn:
+        return pd.read_sql(text(q), conn, params={"table": table})
+
+
+def add_month_partitions(table, through, engine=None, allow_copy=False):
+    """
+    Splits month partitions out of pmax up to `through`'s month.
+
+    REORGANIZE PARTITION copies every row pmax holds, so this is only a
+    metadata change while pmax is empty. Rows there (a late or far-future
+    load) raise unless `allow_copy`, which accepts the copy.
+    """
+    engine = engine or get_db_engine()
+    existing = set(list_partitions(table, engine)["name"])
+    last = max((n for n in existing if n != "pmax"), default=None)
+    if last is None:
+        raise RuntimeError(f"{table} is not partitioned yet.")
+
+    start = pd.Timestamp(f"{last[1:5]}-{last[6:8]}-01") + pd.offsets.MonthBegin(1)
+    months = [m for m in month_starts(start, through) if partition_name(m) not in existing]
+    if not months:
+        return []
+
+    with engine.connect() as conn:
+        # exact count, reading only pmax (TABLE_ROWS is an estimate)
+        in_pmax = conn.execute(text(f"SELECT COUNT(*) FROM {table} PARTITION (pmax)")).scalar()
+    if in_pmax and not allow_copy:
+        raise RuntimeError(
+            f"pmax of {table} holds {in_pmax:,} rows; splitting it copies them "
+            "(pass allow_copy=True / --allow-copy to go ahead)."
+        )
+
+    defs = ",\n    ".join(_partition_defs(months))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO (\n    {defs}\n)")
+    return [partition_name(m) for m in months]
+
+
+def detach_partition(table, month, archive_table=None, engine=None):
+    """
+    Moves one month out of `table` into `archive_table` (default
+    <table>_<pYYYY_MM>) with EXCHANGE PARTITION, then drops the now-empty
+    partition. Rows are swapped, not copied.
+    """
+    engine = engine or get_db_engine()
+    name = partition_name(month)
+    archive_table = archive_table or f"{table}_{name}"
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE TABLE {archive_table} LIKE {table}")
+        conn.exec_driver_sql(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+        conn.exec_driver_sql(f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive_table}")
+        conn.exec_driver_sql(f"ALTER TABLE {table} DROP PARTITION {name}")
+    mark_tables_changed(engine, [table])
+    return archive_table
+
+
+# ============================================================
+# PARTITIONED FILES (embedded backend)
+# ============================================================
+def _require_pyarrow():
+    if pq is None:
+        raise RuntimeError("pyarrow is not installed.")
+
+
+def partition_dir(table, month, root=PARTITION_ROOT):
+    month = pd.Timestamp(month)
+    return Path(root) / table / f"year={month.year}" / f"month={month.month:02d}"
+
+
+def arrow_type(dtype):
+    """
+    Arrow type for a utils/schemas.py dtype: categoricals become
+    dictionary-encoded strings, dates date32, nullable ints keep their width.
+    """
+    if dtype == CATEGORY:
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype == DATE:
+        return pa.date32()
+    return {
+        "string": pa.string(), "boolean": pa.bool_(), "float64": pa.float64(), "float32": pa.float32(),
+        "Int8": pa.int8(), "Int16": pa.int16(), "Int32": pa.int32(), "Int64": pa.int64(),
+    }[dtype]
+
+
+def to_arrow(df, table):
+    """
+    Converts a frame to an Arrow table typed by the `table` schema
+    (columns the schema does not know keep their inferred type).
+    """
+    arrow = pa.Table.from_pandas(df, preserve_index=False)
+    schema = get_schema(table) if table in ("flight_delay", "sales_data") else {}
+    fields = [
+        pa.field(f.name, arrow_type(schema[f.name])) if f.name in schema else f
+        for f in arrow.schema
+    ]
+    return arrow.cast(pa.schema(fields))
+
+
+class PartitionedWriter:
+    """
+    Streams frames into the monthly Parquet layout: one file per month per
+    writer, one row group (up to ROW_GROUP_SIZE rows) per write, dictionary
+    encoded strings and min/max statistics on every column.
+
+    Files are staged under <table>/_staging-*/ (ignored by readers) and
+    moved into place by close(). With replace=True each written month
+    directory replaces the existing one; otherwise files are added to it.
+
+        with PartitionedWriter("flight_delay", replace=True) as w:
+            for chunk in chunks:
+                w.write(chunk)
+
+    Several writers (e.g. one per ETL worker process) can share one
+    `staging` directory; each calls finish() and the coordinator publishes
+    once with publish_staged(). File names start with `prefix`, so files
+    of one month sort in prefix order when read back.
+    """
+
+    def __init__(self, table, root=PARTITION_ROOT, column="flight_date", replace=False,
+                 staging=None, prefix="part"):
+        _require_pyarrow()
+        self.table = table
+        self.root = Path(root)
+        self.column = column
+        self.replace = replace
+        self.staging = Path(staging) if staging else staging_dir(table, root)
+        self.prefix = prefix
+        self.schema = None
+        self.writers = {}
+        self.buffers = {}
+        self.rows = 0
+        self.rows_without_date = 0
+
+    def write(self, df):
+        dates = pd.to_datetime(df[self.column], errors="coerce")
+        self.rows_without_date += int(dates.isna().sum())
+        for month, part in df.groupby(dates.dt.to_period("M"), sort=True):
+            arrow = to_arrow(part, self.table)
+            if self.schema is None:
+                self.schema = arrow.schema
+            arrow = arrow.select(self.schema.names).cast(self.schema)
+
+            month = month.to_timestamp()
+            if month not in self.writers:
+                out_dir = partition_dir(self.table, month, self.staging)
+                out_dir.mkdir(parents=True, exist_ok=True)
+                self.writers[month] = pq.ParquetWriter(
+                    out_dir / f"{self.prefix}-{uuid.uuid4().hex}.parquet", self.schema,
+                    compression=PARQUET_COMPRESSION, use_dictionary=True, write_statistics=True,
+                )
+                self.buffers[month] = []
+            # small per-chunk slices are buffered into full row groups
+            self.buffers[month].append(arrow)
+            if sum(len(t) for t in self.buffers[month]) >= ROW_GROUP_SIZE:
+                self._flush(month)
+            self.rows += len(part)
+
+    def _flush(self, month):
+        if self.buffers.get(month):
+            self.writers[month].write_table(pa.concat_tables(self.buffers[month]), row_group_size=ROW_GROUP_SIZE)
+            self.buffers[month] = []
+
+    def finish(self):
+        """
+        Finishes every file without publishing. Returns the months written.
+        """
+        for month, writer in self.writers.items():
+            self._flush(month)
+            writer.close()
+        months = sorted(self.writers)
+        self.writers = {}
+        return months
+
+    def close(self):
+        """
+        Finishes every file and publishes the staged months.
+        Returns the months written.
+        """
+        months = self.finish()
+        publish_staged(self.table, self.staging, months, self.root, self.replace)
+        return months
+
+    def abort(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def staging_dir(table, root=PARTITION_ROOT):
+    """
+    A fresh staging directory for `table` (readers skip `_`-prefixed dirs).
+    """
+    return Path(root) / table / f"_staging-{uuid.uuid4().hex}"
+
+
+def publish_staged(table, staging, months, root=PARTITION_ROOT, replace=False):
+    """
+    Moves the staged `months` of `table` into place and removes `staging`.
+    """
+    staging = Path(staging)
+    for month in sorted(set(months)):
+        staged = partition_dir(table, month, staging)
+        target = partition_dir(table, month, root)
+        if replace:
+            _swap_dir(staged, target, partition_dir(table, month, staging / "_old"))
+        else:
+            target.mkdir(parents=True, exist_ok=True)
+            for f in staged.glob("*.parquet"):
+                os.replace(f, target / f.name)
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def replace_source_files(table, staging, months, sources, root=PARTITION_ROOT):
+    """
+    Incremental publish: in every month of `months`, files whose names
+    start with one of the `sources` prefixes are replaced by the staged
+    files, and files written from other inputs are kept (hard-linked into
+    the staged month). Each month is then swapped in with renames, so
+    readers see either the old or the new month. A month left without
+    files is removed.
+    """
+    staging = Path(staging)
+    sources = tuple(sources)
+    for month in sorted(set(months)):
+        staged = partition_dir(table, month, staging)
+        target = partition_dir(table, month, root)
+        trash = partition_dir(table, month, staging / "_old")
+        staged.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            for f in target.glob("*.parquet"):
+                if not f.name.startswith(sources):
+                    _link_or_copy(f, staged / f.name)
+        if any(staged.glob("*.parquet")):
+            _swap_dir(staged, target, trash)
+        elif target.exists():
+            trash.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(target, trash)
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def month_label(month):
+    return f"{pd.Timestamp(month):%Y-%m}"
+
+
+def _swap_dir(new, target, trash):
+    """
+    Replaces directory `target` with `new` using renames only, so readers
+    see either the old or the new month, never a half-written one.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if not target.exists():
+        os.replace(new, target)
+        return
+    trash.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(target, trash)
+    os.replace(new, target)
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+def write_partitioned(df, table, root=PARTITION_ROOT, column="flight_date", replace=False):
+    """
+    Writes `df` to the monthly file layout as one new Parquet part per
+    month present in the frame. Returns the directories written.
+    """
+    writer = PartitionedWriter(table, root, column, replace=replace)
+    try:
+        writer.write(df)
+    except Exception:
+        writer.abort()
+        raise
+    return [partition_dir(table, m, root) for m in writer.close()]
+
+
+def list_file_partitions(table, root=PARTITION_ROOT):
+    """
+    Returns the months (Timestamp) present in the file layout.
+    """
+    months = []
+    for year_dir in sorted((Path(root) / table).glob("year=*")):
+        for month_dir in sorted(year_dir.glob("month=*")):
+            months.append(pd.Timestamp(f"{year_dir.name[5:]}-{month_dir.name[6:]}-01"))
+    return months
+
+
+def partition_files(table, start=None, end=None, root=PARTITION_ROOT):
+    """
+    Parquet files whose month overlaps [start, end] — the file-level
+    equivalent of MySQL partition pruning.
+    """
+    lo = pd.Timestamp(start).to_period("M") if start is not None else None
+    hi = pd.Timestamp(end).to_period("M") if end is not None else None
+    files = []
+    for month in list_file_partitions(table, root):
+        p = month.to_period("M")
+        if (lo is None or p >= lo) and (hi is None or p <= hi):
+            files += sorted(partition_dir(table, month, root).glob("*.parquet"))
+    return files
+
+
+def drop_file_partition(table, month, root=PARTITION_ROOT):
+    """
+    Removes one month directory: renamed aside first, so readers never
+    see a half-deleted month.
+    """
+    target = partition_dir(table, month, root)
+    if not target.exists():
+        return
+    trash = Path(root) / table / f"_drop-{uuid.uuid4().hex}"
+    os.replace(target, trash)
+    shutil.rmtree(trash, ignore_errors=True)
+    try:
+        target.parent.rmdir()       # year directory, once empty
+    except OSError:
+        pass
+
+
+def detach_file_partition(table, month, root=PARTITION_ROOT, archive_root=ARCHIVE_ROOT):
+    """
+    Moves one month directory into the archive tree (a rename, no rewrite).
+    """
+    src = partition_dir(table, month, root)
+    dst = partition_dir(table, month, archive_root)
+    if not src.exists():
+        raise FileNotFoundError(src)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(src), str(dst))
+    return dst
+
+
+# ============================================================
+# DATASET READERS (column projection + date pushdown)
+# ============================================================
+def has_dataset(table, root=PARTITION_ROOT):
+    return bool(list_file_partitions(table, root))
+
+
+def dataset_files(table, root=PARTITION_ROOT):
+    """
+    All published Parquet files of `table` in a stable order.
+    """
+    return [f for m in list_file_partitions(table, root) for f in sorted(partition_dir(table, m, root).glob("*.parquet"))]
+
+
+def _date_filter(start, end, column):
+    """
+    Prunes year=/month= directories first, then row groups by the
+    column's min/max statistics.
+    """
+    expr = None
+    if start is not None:
+        start = pd.Timestamp(start)
+        expr = ((ds.field("year") > start.year)
+                | ((ds.field("year") == start.year) & (ds.field("month") >= start.month)))
+        expr = expr & (ds.field(column) >= pa.scalar(start.date(), pa.date32()))
+    if end is not None:
+        end = pd.Timestamp(end)
+        upper = ((ds.field("year") < end.year)
+                 | ((ds.field("year") == end.year) & (ds.field("month") <= end.month)))
+        upper = upper & (ds.field(column) <= pa.scalar(end.date(), pa.date32()))
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+def _scanner(table, columns, start, end, root, column, not_null, batch_size):
+    _require_pyarrow()
+    dataset = ds.dataset(
+        [str(f) for f in dataset_files(table, root)], format="parquet",
+        partitioning=ds.partitioning(flavor="hive"), partition_base_dir=str(Path(root) / table),
+    )
+    if columns is None:
+        columns = [n for n in dataset.schema.names if n not in ("year", "month")]
+    expr = _date_filter(start, end, column)
+    for col in not_null or ():
+        expr = ds.field(col).is_valid() if expr is None else expr & ds.field(col).is_valid()
+    return dataset.scanner(columns=list(columns), filter=expr, batch_size=batch_size)
+
+
+def read_partitioned(table, columns=None, start=None, end=None, root=PARTITION_ROOT,
+                     column="flight_date", not_null=None):
+    """
+    Reads `columns` of `table` for [start, end] from the Parquet layout;
+    months and row groups outside the window are never read.
+    """
+    scanner = _scanner(table, columns, start, end, root, column, not_null, READ_BATCH_SIZE)
+    return _to_pandas(scanner.to_table())
+
+
+def iter_partitioned(table, columns=None, start=None, end=None, root=PARTITION_ROOT,
+                     column="flight_date", not_null=None, batch_size=READ_BATCH_SIZE):
+    """
+    Like read_partitioned but yields DataFrames of at most `batch_size`
+    rows, in file order, so memory stays bounded.
+    """
+    # batches end at row-group boundaries; regroup them into batch_size frames
+    pending, rows = [], 0
+    for batch in _scanner(table, columns, start, end, root, column, not_null, batch_size).to_batches():
+        if not batch.num_rows:
+            continue
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= batch_size:
+            combined = pa.Table.from_batches(pending)
+            for offset in range(0, rows - rows % batch_size, batch_size):
+                yield _to_pandas(combined.slice(offset, batch_size))
+            rest = combined.slice(rows - rows % batch_size)
+            pending, rows = rest.to_batches(), len(rest)
+    if rows:
+        yield _to_pandas(pa.Table.from_batches(pending))
+
+
+def _to_pandas(arrow):
+    # keep the registry dtypes: nullable small ints stay Int16 / Int8, not float64
+    nullable = {
+        pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(),
+        pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype(),
+    }
+    return arrow.to_pandas(date_as_object=False, types_mapper=nullable.get)
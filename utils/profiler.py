@@ -0,0 +1,454 @@
+# utils/profiler.py
+"""
+Streaming data-quality profile for ETL loads.
+
+A DataProfile is updated once per chunk inside the ETL loop and keeps only
+mergeable, fixed-size state per column, so shard profiles from the worker
+processes merge into one profile per load:
+
+- row / null counts, min / max, mean
+- approximate quantiles: a DDSketch (relative error SKETCH_ALPHA)
+- approximate distinct counts: a HyperLogLog (2**HLL_PRECISION registers)
+- top values of categorical columns
+- drop reasons (rows removed, and why) and check counters
+
+    profile = DataProfile("flight_delay")
+    for chunk in chunks:
+        profile.update(chunk)
+    profile.drop("missing flight_date", n)
+    write_profile(profile)               # reports/profiles/flight_delay_<ts>.json / .html
+
+The prepare / ingest scripts profile every load unless ETL_PROFILE=0.
+
+All per-chunk work is vectorized (bincount / hash_array); categoricals are
+sketched per category rather than per row.
+"""
+import html
+import json
+import math
+import os
+import time
+from collections import Counter
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "reports/profiles")
+ETL_PROFILE = os.getenv("ETL_PROFILE", "1") != "0"
+SKETCH_ALPHA = 0.01
+HLL_PRECISION = 12
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+TOP_VALUES = 10
+HISTOGRAM_SPAN = 1 << 16
+
+
+# ============================================================
+# SKETCHES
+# ============================================================
+class QuantileSketch:
+    """
+    DDSketch: values fall into logarithmic buckets of relative width
+    SKETCH_ALPHA, so any quantile is returned within that relative error.
+    Buckets are dense count arrays (a few hundred for delay-like ranges).
+    """
+
+    def __init__(self, alpha=SKETCH_ALPHA):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.stores = {1: (0, np.zeros(0, dtype=np.int64)), -1: (0, np.zeros(0, dtype=np.int64))}
+        self.zeros = 0
+        self.count = 0
+
+    def _add_to(self, sign, keys, counts=None):
+        offset, bins = self.stores[sign]
+        lo, hi = int(keys.min()), int(keys.max())
+        if len(bins) == 0:
+            offset = lo
+        new_lo, new_hi = min(lo, offset), max(hi, offset + len(bins) - 1)
+        if new_lo < offset or new_hi >= offset + len(bins):
+            grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            grown[offset - new_lo:offset - new_lo + len(bins)] = bins
+            offset, bins = new_lo, grown
+        bins += np.bincount(keys - offset, weights=counts, minlength=len(bins)).astype(np.int64)
+        self.stores[sign] = (offset, bins)
+
+    def add(self, values, counts=None):
+        """
+        Adds a float array without NaNs (each value `counts` times if given).
+        """
+        if len(values) == 0:
+            return
+        counts = np.ones(len(values), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.count += int(counts.sum())
+        self.zeros += int(counts[values == 0].sum())
+        for sign in (1, -1):
+            keep = values * sign > 0
+            if keep.any():
+                keys = np.ceil(np.log(values[keep] * sign) / self._log_gamma).astype(np.int64)
+                self._add_to(sign, keys, counts[keep])
+
+    def merge(self, other):
+        self.count += other.count
+        self.zeros += other.zeros
+        for sign in (1, -1):
+            offset, bins = other.stores[sign]
+            nz = np.flatnonzero(bins)
+            if len(nz):
+                self._add_to(sign, nz + offset, bins[nz])
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        neg_offset, neg = self.stores[-1]
+        for i in range(len(neg) - 1, -1, -1):        # most negative first
+            seen += neg[i]
+            if seen > rank:
+                return -self._value(i + neg_offset)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        pos_offset, pos = self.stores[1]
+        for i in range(len(pos)):
+            seen += pos[i]
+            if seen > rank:
+                return self._value(i + pos_offset)
+        return self._value(len(pos) - 1 + pos_offset)
+
+
+class DistinctSketch:
+    """
+    HyperLogLog over 64-bit pandas hashes (standard error ~1.04 / sqrt(m)).
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # rank = leading zeros in the remaining 64-p bits + 1
+        bit_length = np.frexp(rest.astype(np.float64))[1]
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def add(self, values):
+        self.add_hashes(pd.util.hash_array(np.asarray(values)))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return int(round(m * math.log(m / empty)))     # linear counting for small sets
+        return int(round(raw))
+
+
+# ============================================================
+# COLUMN PROFILE
+# ============================================================
+def column_kind(series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "categorical"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    first = series.first_valid_index()
+    if first is not None and isinstance(series[first], date):
+        return "datetime"            # datetime.date objects (flight_date after .dt.date)
+    return "text"
+
+
+class ColumnProfile:
+    def __init__(self, kind):
+        self.kind = kind
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.total = 0.0
+        self.sketch = QuantileSketch() if kind == "numeric" else None
+        self.distinct = DistinctSketch()
+        self.top = Counter() if kind in ("categorical", "boolean") else None
+
+    def _bounds(self, lo, hi):
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    def _add_values(self, values):
+        """
+        Integer-valued data (delays, flags, days) is reduced to a histogram
+        first, so the sketches only see each distinct value once.
+        """
+        lo, hi = values.min(), values.max()
+        if values.dtype.kind in "iu" and hi - lo < HISTOGRAM_SPAN:
+            hist = np.bincount((values - lo).astype(np.int64))
+            present = np.flatnonzero(hist)
+            counts = hist[present]
+            values = present + lo
+        else:
+            counts = None
+        if self.kind == "numeric":
+            floats = values.astype(np.float64)
+            self.total += float(floats @ counts) if counts is not None else float(floats.sum())
+            self.sketch.add(floats, counts)
+        self.distinct.add(values)
+        return lo, hi
+
+    def update(self, series):
+        self.count += len(series)
+        if self.kind in ("categorical", "text"):
+            if self.kind == "categorical":
+                codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, uniques = pd.factorize(series)
+            counts = np.bincount(codes + 1, minlength=len(uniques) + 1)
+            self.nulls += int(counts[0])
+            present = np.flatnonzero(counts[1:])
+            labels = np.asarray(uniques[present]).astype(str).astype(object)
+            self.distinct.add(labels)
+            if self.top is not None:
+                self.top.update(dict(zip(labels, counts[1:][present].tolist())))
+            return
+
+        missing = series.isna().to_numpy()
+        self.nulls += int(missing.sum())
+        if missing.all():
+            return
+        if self.kind == "boolean":
+            values = series.to_numpy(dtype=bool, na_value=False)[~missing]
+            trues = int(values.sum())
+            self.top.update({k: v for k, v in (("True", trues), ("False", len(values) - trues)) if v})
+            return
+        if self.kind == "datetime":
+            if series.dtype == object:
+                codes, uniques = pd.factorize(series)
+                days = pd.to_datetime(uniques).to_numpy(dtype="datetime64[D]").astype(np.int64)[codes[~missing]]
+            else:
+                days = series.to_numpy(dtype="datetime64[D]")[~missing].astype(np.int64)
+            lo, hi = self._add_values(days)
+            self._bounds(np.datetime64(int(lo), "D"), np.datetime64(int(hi), "D"))
+            return
+        if pd.api.types.is_integer_dtype(series.dtype):
+            values = series.to_numpy(dtype=np.int64, na_value=0)[~missing]
+        else:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)[~missing]
+        lo, hi = self._add_values(values)
+        self._bounds(lo.item(), hi.item())
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        if other.min is not None:
+            self._bounds(other.min, other.max)
+        self.total += other.total
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        self.distinct.merge(other.distinct)
+        if self.top is not None and other.top is not None:
+            self.top.update(other.top)
+        return self
+
+    def to_dict(self):
+        present = self.count - self.nulls
+        out = {
+            "kind": self.kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "null_pct": round(100.0 * self.nulls / self.count, 3) if self.count else 0.0,
+            "distinct_approx": len(self.top) if self.kind == "boolean" else self.distinct.estimate(),
+        }
+        if self.min is not None:
+            out["min"] = str(self.min) if self.kind == "datetime" else self.min
+            out["max"] = str(self.max) if self.kind == "datetime" else self.max
+        if self.kind == "numeric" and present:
+            out["mean"] = self.total / present
+            out["quantiles"] = {f"p{round(q * 100)}": self.sketch.quantile(q) for q in QUANTILES}
+        if self.top:
+            out["top"] = dict(self.top.most_common(TOP_VALUES))
+        return out
+
+
+# ============================================================
+# DATASET PROFILE
+# ============================================================
+class DataProfile:
+    """
+    Profile of one load of one table; update() per chunk, merge() across
+    shards, drop() / check() for rows removed and rule counters.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.rows = 0
+        self.columns = {}
+        self.drops = Counter()
+        self.checks = Counter()
+        self.seconds = 0.0
+        self.etl_seconds = 0.0
+
+    def update(self, df):
+        t0 = time.perf_counter()
+        self.rows += len(df)
+        for col in df.columns:
+            series = df[col]
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(column_kind(series))
+            self.columns[col].update(series)
+        self.seconds += time.perf_counter() - t0
+        return self
+
+    def drop(self, reason, n):
+        if n:
+            self.drops[reason] += int(n)
+
+    def check(self, name, n):
+        self.checks[name] += int(n)
+
+    def record_checks(self, counts):
+        """
+        Adds an ETL transform's Counter (everything but "rows") as checks.
+        """
+        for name, n in counts.items():
+            if name != "rows":
+                self.check(name, n)
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, prof in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(prof)
+            else:
+                self.columns[col] = prof
+        self.drops.update(other.drops)
+        self.checks.update(other.checks)
+        self.seconds += other.seconds
+        self.etl_seconds += other.etl_seconds
+        return self
+
+    def to_dict(self):
+        return {
+            "table": self.table,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": self.rows,
+            "rows_dropped": sum(self.drops.values()),
+            "drop_reasons": dict(self.drops),
+            "checks": dict(self.checks),
+            "profile_seconds": round(self.seconds, 3),
+            "etl_seconds": round(self.etl_seconds, 3),
+            "profile_overhead_pct": round(100.0 * self.seconds / self.etl_seconds, 2) if self.etl_seconds else None,
+            "columns": {col: prof.to_dict() for col, prof in self.columns.items()},
+        }
+
+
+def merge_profiles(profiles, table=None):
+    """
+    Merges shard profiles (in order) into one.
+    """
+    profiles = [p for p in profiles if p is not None]
+    merged = DataProfile(table or (profiles[0].table if profiles else None))
+    for p in profiles:
+        merged.merge(p)
+    return merged
+
+
+# ============================================================
+# OUTPUT
+# ============================================================
+def _json_default(value):
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating,)):
+        return float(value)
+    return str(value)
+
+
+def profile_html(data):
+    """
+    Self-contained HTML report for a profile dict.
+    """
+    rows = []
+    for col, c in data["columns"].items():
+        q = c.get("quantiles", {})
+        rows.append({
+            "column": col, "kind": c["kind"], "nulls": c["nulls"], "null %": c["null_pct"],
+            "distinct ≈": c["distinct_approx"], "min": c.get("min"), "p50": q.get("p50"),
+            "p95": q.get("p95"), "p99": q.get("p99"), "max": c.get("max"), "mean": c.get("mean"),
+            "top": ", ".join(f"{k} ({v})" for k, v in list(c.get("top", {}).items())[:5]),
+        })
+    columns = pd.DataFrame(rows).to_html(index=False, float_format=lambda x: f"{x:,.2f}", na_rep="")
+
+    def counter_table(title, counts, label):
+        if not counts:
+            return f"<h2>{html.escape(title)}</h2><p>None</p>"
+        body = "".join(f"<tr><td>{html.escape(str(k))}</td><td>{v:,}</td></tr>" for k, v in counts.items())
+        return f"<h2>{html.escape(title)}</h2><table><tr><th>{label}</th><th>rows</th></tr>{body}</table>"
+
+    overhead = data.get("profile_overhead_pct")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(data['table'])} profile</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; font-size: 0.9em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+th {{ background: #f0f0f0; }}
+</style></head><body>
+<h1>{html.escape(data['table'])} — data profile</h1>
+<p>Generated {data['generated_at']} · {data['rows']:,} rows profiled · {data['rows_dropped']:,} rows dropped
+{f"· profiling {overhead}% of ETL time" if overhead is not None else ""}</p>
+{counter_table("Drop reasons", data["drop_reasons"], "reason")}
+{counter_table("Checks", data["checks"], "check")}
+<h2>Columns</h2>
+{columns}
+</body></html>
+"""
+
+
+def write_profile(profile, out_dir=PROFILE_DIR):
+    """
+    Writes <table>_<timestamp>.json and .html under `out_dir`.
+    Returns (json path, html path).
+    """
+    data = profile.to_dict()
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.join(out_dir, f"{profile.table}_{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}")
+    with open(stem + ".json", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=_json_default)
+    with open(stem + ".html", "w", encoding="utf-8") as f:
+        f.write(profile_html(data))
+    return stem + ".json", stem + ".html"
+
+
+def save_profiles(profiles, table, out_dir=PROFILE_DIR):
+    """
+    Merges the shard profiles of one load, writes them and prints where.
+    Returns the merged DataProfile (None when profiling was off).
+    """
+    profiles = [p for p in profiles if p is not None]
+    if not profiles:
+        return None
+    profile = merge_profiles(profiles, table)
+    json_path, html_path = write_profile(profile, out_dir)
+    overhead = profile.to_dict()["profile_overhead_pct"]
+    print(f"[SAVED] {table} profile → {json_path} / {html_path}"
+          + (f" (profiling {overhead}% of ETL time)" if overhead is not None else ""))
+    return profile
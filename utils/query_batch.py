@@ -0,0 +1,188 @@
+# utils/query_batch.py
+"""
+Runs a batch of independent queries concurrently on the shared pool.
+
+    frames = run_queries({
+        "revenue": REVENUE_SQL,
+        "seats": SEATS_SQL,
+    }, params)
+
+Latency becomes the slowest query rather than the sum. Simple grouped
+aggregates over the same table, filter and GROUP BY keys
+(`SELECT keys, AGG(x) AS a FROM t [WHERE ...] GROUP BY keys`) are merged
+into one query so the table is scanned once, and each caller still gets
+its own frame back.
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.db_connection import POOL_SIZE
+from utils.run_query import run_query, _capture
+from utils.query_stats import attributed_to, calling_page
+
+MAX_WORKERS = int(os.getenv("QUERY_BATCH_WORKERS", str(POOL_SIZE)))
+
+_AGG_QUERY_RE = re.compile(
+    r"^\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<table>[A-Za-z_][A-Za-z0-9_]*)"
+    r"(?:\s+(?P<where>WHERE\s+.+?))?\s+GROUP\s+BY\s+(?P<group>[A-Za-z0-9_,\s]+?)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_AGG_ITEM_RE = re.compile(
+    r"^(?P<expr>(?:SUM|AVG|MIN|MAX|COUNT)\s*\(.+\))\s+AS\s+(?P<alias>[A-Za-z_][A-Za-z0-9_]*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+# ============================================================
+# CONCURRENT EXECUTION
+# ============================================================
+def run_concurrently(tasks, max_workers=None):
+    """
+    Runs {name: zero-arg callable} on a thread pool and returns
+    {name: result}. Exceptions are re-raised in the caller.
+    Queries issued inside tasks are still seen by capture_queries() and
+    attributed to the calling page in utils/query_stats.py.
+    """
+    if not tasks:
+        return {}
+    workers = max(1, min(len(tasks), max_workers or MAX_WORKERS))
+    stack = list(getattr(_capture, "stack", ()))
+    page = calling_page()
+
+    def call(fn):
+        _capture.stack = list(stack)
+        try:
+            with attributed_to(page):
+                return fn()
+        finally:
+            _capture.stack = []
+
+    if workers == 1:
+        return {name: fn() for name, fn in tasks.items()}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-batch") as pool:
+        futures = {name: pool.submit(call, fn) for name, fn in tasks.items()}
+        return {name: f.result() for name, f in futures.items()}
+
+
+# ============================================================
+# AGGREGATE MERGING
+# ============================================================
+def _split_select(select):
+    """
+    Splits a select list on top-level commas (not inside parentheses).
+    """
+    items, depth, current = [], 0, ""
+    for ch in select:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            items.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    items.append(current.strip())
+    return items
+
+
+def parse_aggregate(sql):
+    """
+    Returns (table, where, keys, [(expr, alias)]) for a simple grouped
+    aggregate, or None if the query has any other shape.
+    """
+    m = _AGG_QUERY_RE.match(sql)
+    if not m:
+        return None
+    keys = [k.strip() for k in m.group("group").split(",")]
+    if not all(keys):
+        return None
+
+    items = _split_select(m.group("select"))
+    if items[:len(keys)] != keys:
+        return None
+
+    aggs = []
+    for item in items[len(keys):]:
+        a = _AGG_ITEM_RE.match(item)
+        if not a:
+            return None
+        aggs.append((" ".join(a.group("expr").split()), a.group("alias")))
+    if not aggs:
+        return None
+
+    where = " ".join((m.group("where") or "").split())
+    return m.group("table").lower(), where, tuple(keys), aggs
+
+
+def plan_batch(queries):
+    """
+    Groups mergeable queries. Returns a list of
+    (sql, params, {name: [columns]}) — one entry per query actually run.
+    """
+    plans = []
+    groups = {}
+    for name, (sql, params) in queries.items():
+        parsed = parse_aggregate(sql)
+        if parsed is None:
+            plans.append((sql, params, {name: None}))
+            continue
+        table, where, keys, aggs = parsed
+        signature = (table, where, keys, repr(sorted((params or {}).items())))
+        groups.setdefault(signature, []).append((name, sql, params, aggs))
+
+    for (table, where, keys, _), members in groups.items():
+        if len(members) == 1:
+            name, sql, params, _ = members[0]
+            plans.append((sql, params, {name: None}))
+            continue
+
+        exprs = {}
+        outputs = {}
+        for name, m_sql, m_params, aggs in members:
+            if any(exprs.get(alias, expr) != expr for expr, alias in aggs):
+                # alias already used for a different expression: run alone
+                plans.append((m_sql, m_params, {name: None}))
+                continue
+            exprs.update((alias, expr) for expr, alias in aggs)
+            outputs[name] = list(keys) + [alias for _, alias in aggs]
+
+        if not outputs:
+            continue
+        key_list = ", ".join(keys)
+        agg_list = ", ".join(f"{expr} AS {alias}" for alias, expr in exprs.items())
+        sql = f"SELECT {key_list}, {agg_list} FROM {table} {where} GROUP BY {key_list}"
+        plans.append((" ".join(sql.split()), members[0][2], outputs))
+    return plans
+
+
+def run_queries(queries, params=None, merge=True, use_cache=True, max_workers=None):
+    """
+    Runs {name: sql} (or {name: (sql, params)}) concurrently and returns
+    {name: DataFrame}. `params` applies to queries given as plain SQL.
+    With `merge`, compatible grouped aggregates share one scan.
+    """
+    normalized = {}
+    for name, q in queries.items():
+        sql, q_params = q if isinstance(q, tuple) else (q, params)
+        normalized[name] = (sql, dict(q_params or {}))
+
+    if merge:
+        plans = plan_batch(normalized)
+    else:
+        plans = [(sql, p, {name: None}) for name, (sql, p) in normalized.items()]
+
+    tasks = {
+        i: (lambda sql=sql, p=p: run_query(sql, p, use_cache=use_cache))
+        for i, (sql, p, _) in enumerate(plans)
+    }
+    results = run_concurrently(tasks, max_workers)
+
+    frames = {}
+    for i, (_, _, outputs) in enumerate(plans):
+        df = results[i]
+        for name, cols in outputs.items():
+            frames[name] = df if cols is None else df[cols].copy()
+    return {name: frames[name] for name in queries}
@@ -0,0 +1,297 @@
+# utils/query_cache.py
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+
+# ============================================================
+# CACHE CONFIG (override through .env)
+# ============================================================
+CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+CACHE_MAX_MB = float(os.getenv("QUERY_CACHE_MAX_MB", "512"))
+CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "900"))
+# how often (seconds) a table's watermark is re-read from the database
+WATERMARK_INTERVAL = float(os.getenv("QUERY_CACHE_WATERMARK_INTERVAL", "30"))
+
+# every write path bumps a per-table counter here (mark_tables_changed);
+# information_schema / COUNT(*) is only the fallback for tables without one
+VERSION_TABLE = "table_versions"
+# bumped by migrations: moves every table's watermark
+ALL_TABLES = "*"
+
+VERSION_DDL = f"""
+CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL
+)
+"""
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?([A-Za-z_][\w.]*)`?", re.IGNORECASE)
+_QUOTED_RE = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses whitespace outside string literals and drops the trailing ';'
+    so formatting differences between pages map to the same cache key.
+    """
+    parts = _QUOTED_RE.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = " ".join(parts[i].split())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def tables_in(sql: str):
+    """
+    Returns the table names referenced after FROM / JOIN.
+    """
+    return sorted({name.lower() for name in _TABLE_RE.findall(sql)})
+
+
+def make_key(sql: str, params=None):
+    frozen = tuple(sorted((k, repr(v)) for k, v in (params or {}).items()))
+    return normalize_sql(sql), frozen
+
+
+class QueryCache:
+    """
+    Size-bounded LRU of query results.
+
+    Each entry remembers the watermark of the tables it read (their
+    table_versions counters; tables never written through
+    mark_tables_changed fall back to information_schema or COUNT(*)); an
+    entry is only dropped when that watermark moves, its TTL expires, or
+    it is evicted to stay under the size limits.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_mb=CACHE_MAX_MB,
+                 ttl=CACHE_TTL, watermark_interval=WATERMARK_INTERVAL):
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl = ttl
+        self.watermark_interval = watermark_interval
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._watermarks = {}          # table -> (checked_at, watermark)
+        self._no_stats_expiry = False  # server has no information_schema_stats_expiry
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.expirations = 0
+
+    # ----------------------------
+    # Watermarks
+    # ----------------------------
+    def _read_watermark(self, engine, table):
+        try:
+            with engine.connect() as conn:
+                versions = dict(conn.execute(
+                    text(f"SELECT table_name, version FROM {VERSION_TABLE} WHERE table_name IN (:table, :all)"),
+                    {"table": table, "all": ALL_TABLES},
+                ).fetchall())
+        except Exception:
+            versions = {}       # no write has recorded a version yet
+        if table in versions:
+            return ("version", versions.get(ALL_TABLES), versions[table])
+        return (versions.get(ALL_TABLES),) + self._read_metadata_watermark(engine, table)
+
+    def _read_metadata_watermark(self, engine, table):
+        if engine.dialect.name in ("mysql", "mariadb"):
+            return self._read_mysql_watermark(engine, table)
+        # embedded backends (DuckDB over Parquet): counts come from metadata
+        with engine.connect() as conn:
+            row = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).fetchone()
+            return (row[0], None)
+
+    def _read_mysql_watermark(self, engine, table):
+        """
+        (last write time, next AUTO_INCREMENT) from information_schema, so
+        no table or index is scanned; COUNT(*) on flight_delay would read a
+        whole index every interval.
+        """
+        with engine.connect() as conn:
+            if not self._no_stats_expiry:
+                try:
+                    # MySQL 8 caches these columns for a day by default
+                    conn.execute(text("SET SESSION information_schema_stats_expiry = 0"))
+                except Exception:
+                    # older MySQL / MariaDB: always live
+                    conn.rollback()
+                    self._no_stats_expiry = True
+            row = conn.execute(text(
+                "SELECT TABLE_TYPE, UPDATE_TIME, AUTO_INCREMENT FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+            ), {"table": table}).fetchone()
+            if row is None:
+                raise LookupError(table)
+            if row[0] == "VIEW":
+                # views have no write time; the summary views are small
+                count = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).fetchone()
+                return (count[0], None)
+        return (row[1], row[2])
+
+    def watermark(self, engine, table, refresh=False):
+        """
+        Returns the current watermark of `table`, re-reading it from the
+        database at most once every `watermark_interval` seconds (always
+        with refresh=True).
+        """
+        now = time.monotonic()
+        cached = self._watermarks.get(table)
+        if not refresh and cached is not None and now - cached[0] < self.watermark_interval:
+            return cached[1]
+
+        try:
+            mark = self._read_watermark(engine, table)
+        except Exception:
+            # unknown table / alias / CTE name: never cache-invalidating
+            mark = None
+        self._watermarks[table] = (now, mark)
+        return mark
+
+    def watermarks(self, engine, tables):
+        return {t: self.watermark(engine, t) for t in tables}
+
+    # ----------------------------
+    # Entries
+    # ----------------------------
+    def get(self, key, engine):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            df, size, created, marks = entry
+            if time.monotonic() - created > self.ttl:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+        if self.watermarks(engine, marks.keys()) != marks:
+            with self._lock:
+                if key in self._entries:
+                    self._drop(key)
+                    self.invalidations += 1
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        # callers mutate frames freely (e.g. pd.to_datetime in place)
+        return df.copy()
+
+    def put(self, key, df, marks):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (df.copy(), size, time.monotonic(), marks)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate_table(self, table):
+        """
+        Drops every cached result that reads `table` (e.g. after an upload).
+        """
+        table = table.lower()
+        with self._lock:
+            self._watermarks.pop(table, None)
+            stale = [k for k, e in self._entries.items() if table in e[3]]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._watermarks.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "expirations": self.expirations,
+            }
+
+
+# one cache per process, shared by every Streamlit session
+_CACHE = QueryCache()
+
+
+def bump_table_versions(engine, tables):
+    """
+    Increments the version of each of `tables` in table_versions. Call it
+    after the write committed: bumping first would let a reader cache the
+    old rows under the new version.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(VERSION_DDL))
+    with engine.begin() as conn:
+        for table in tables:
+            params = {"table": table.lower()}
+            # not rowcount: DuckDB reports -1 for UPDATE
+            known = conn.execute(
+                text(f"SELECT 1 FROM {VERSION_TABLE} WHERE table_name = :table"), params,
+            ).fetchone()
+            if known:
+                conn.execute(text(f"UPDATE {VERSION_TABLE} SET version = version + 1 WHERE table_name = :table"),
+                             params)
+            else:
+                conn.execute(text(f"INSERT INTO {VERSION_TABLE} (table_name, version) VALUES (:table, 1)"), params)
+
+
+def mark_tables_changed(engine, tables):
+    """
+    Records a committed write to `tables`: bumps their versions, so every
+    process's cache sees it, and drops this process's cached results now.
+    """
+    tables = list(tables)
+    try:
+        bump_table_versions(engine, tables)
+    except Exception as e:
+        print(f"⚠️ Could not bump {VERSION_TABLE} for {', '.join(tables)}: {e}")
+    for table in tables:
+        _CACHE.invalidate_table(table)
+
+
+def get_query_cache():
+    return _CACHE
+
+
+def get_cache_stats():
+    return _CACHE.stats()
+
+
+def clear_query_cache():
+    _CACHE.clear()
@@ -0,0 +1,243 @@
+# utils/query_stats.py
+"""
+Per-query instrumentation for run_query.
+
+Every query records wall time, database time (execute + fetch), DataFrame
+construction time, rows, approximate bytes and the page that issued it.
+Records live in an in-memory ring buffer; queries slower than
+SLOW_QUERY_MS are also written to a rotating log under logs/.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+import pandas as pd
+
+from utils.query_cache import normalize_sql
+
+
+# ============================================================
+# CONFIG (override through .env)
+# ============================================================
+STATS_BUFFER_SIZE = int(os.getenv("QUERY_STATS_BUFFER", "2000"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.log")
+SLOW_LOG_MAX_MB = float(os.getenv("SLOW_QUERY_LOG_MAX_MB", "5"))
+SLOW_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "3"))
+
+_SAMPLE_ROWS = 100
+
+_records = deque(maxlen=STATS_BUFFER_SIZE)
+_records_lock = threading.Lock()
+_page = threading.local()
+_slow_logger = None
+_slow_logger_lock = threading.Lock()
+
+
+# ============================================================
+# CALLER ATTRIBUTION
+# ============================================================
+@contextmanager
+def attributed_to(page):
+    """
+    Attributes queries run in this thread to `page`, e.g. inside worker
+    threads that no longer have the page on their call stack.
+    """
+    previous = getattr(_page, "name", None)
+    _page.name = page
+    try:
+        yield
+    finally:
+        _page.name = previous
+
+
+def calling_page():
+    """
+    Name of the app page (or script) that issued the current query,
+    found by walking the call stack.
+    """
+    override = getattr(_page, "name", None)
+    if override:
+        return override
+
+    utils_dir = os.path.dirname(os.path.abspath(__file__))
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if "app_pages" in filename:
+            return os.path.splitext(os.path.basename(filename))[0]
+        if fallback is None and not filename.startswith(utils_dir) and "site-packages" not in filename \
+                and not filename.startswith("<"):
+            fallback = os.path.splitext(os.path.basename(filename))[0]
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+# ============================================================
+# RECORDING
+# ============================================================
+def approx_nbytes(df):
+    """
+    Approximate in-memory size: exact for numeric columns, object columns
+    estimated from a sample of their values.
+    """
+    total = int(df.memory_usage(index=False, deep=False).sum())
+    n = len(df)
+    if n == 0:
+        return total
+    for col in df.columns[df.dtypes == object]:
+        sample = df[col].iloc[:_SAMPLE_ROWS]
+        total += int(sum(sys.getsizeof(v) for v in sample) / len(sample) * n)
+    return total
+
+
+def _get_slow_logger():
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            logger = logging.getLogger("airline.slow_queries")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            os.makedirs(os.path.dirname(SLOW_QUERY_LOG) or ".", exist_ok=True)
+            handler = RotatingFileHandler(
+                SLOW_QUERY_LOG, maxBytes=int(SLOW_LOG_MAX_MB * 1024 * 1024), backupCount=SLOW_LOG_BACKUPS
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            _slow_logger = logger
+    return _slow_logger
+
+
+def record_query(sql, params=None, wall_ms=0.0, db_ms=None, frame_ms=None,
+                 rows=0, nbytes=0, cached=False, page=None, error=None):
+    """
+    Appends one query record to the ring buffer and logs it if slow.
+    """
+    rec = {
+        "ts": time.time(),
+        "sql": normalize_sql(sql),
+        "params": dict(params or {}),
+        "page": page or calling_page(),
+        "wall_ms": wall_ms,
+        "db_ms": db_ms,
+        "frame_ms": frame_ms,
+        "rows": rows,
+        "bytes": nbytes,
+        "cached": cached,
+        "error": error,
+    }
+    with _records_lock:
+        _records.append(rec)
+
+    if wall_ms >= SLOW_QUERY_MS and not cached:
+        split = f" (db {db_ms:.0f}ms, frame {frame_ms:.0f}ms)" if db_ms is not None else ""
+        _get_slow_logger().info(
+            f"{wall_ms:.0f}ms{split} "
+            f"rows={rows} bytes={nbytes} page={rec['page']} params={rec['params']} "
+            f"{'error=' + error + ' ' if error else ''}sql={rec['sql']}"
+        )
+    return rec
+
+
+class QueryTimer:
+    """
+    Collects timings around one query:
+
+        timer = QueryTimer(sql, params)
+        ... timer.mark_db() after fetch, timer.done(df) after building the frame
+    """
+
+    def __init__(self, sql, params=None):
+        self.sql = sql
+        self.params = params
+        self.page = calling_page()
+        self.t0 = time.perf_counter()
+        self.t_db = None
+
+    def mark_db(self):
+        self.t_db = time.perf_counter()
+
+    def done(self, df=None, rows=None, nbytes=None, cached=False, error=None):
+        end = time.perf_counter()
+        db_ms = (self.t_db - self.t0) * 1000 if self.t_db else None
+        frame_ms = (end - self.t_db) * 1000 if self.t_db else None
+        if df is not None:
+            rows = len(df) if rows is None else rows
+            nbytes = approx_nbytes(df) if nbytes is None else nbytes
+        return record_query(
+            self.sql, self.params, (end - self.t0) * 1000, db_ms, frame_ms,
+            rows or 0, nbytes or 0, cached, self.page, error
+        )
+
+
+# ============================================================
+# SUMMARIES
+# ============================================================
+def get_query_records():
+    """
+    Snapshot of the ring buffer as a DataFrame (oldest first).
+    """
+    with _records_lock:
+        records = list(_records)
+    df = pd.DataFrame(records, columns=[
+        "ts", "sql", "params", "page", "wall_ms", "db_ms", "frame_ms", "rows", "bytes", "cached", "error"
+    ])
+    df["ts"] = pd.to_datetime(df["ts"], unit="s")
+    return df
+
+
+def latency_percentiles(df=None, percentiles=(50, 90, 95, 99)):
+    """
+    Wall-time percentiles (ms) over database queries (cache hits excluded).
+    """
+    df = get_query_records() if df is None else df
+    times = df.loc[~df["cached"].astype(bool), "wall_ms"].to_numpy(dtype=float)
+    if len(times) == 0:
+        return {f"p{p}": None for p in percentiles}
+    return {f"p{p}": float(np.percentile(times, p)) for p in percentiles}
+
+
+def query_summary(df=None, sort_by="total_ms"):
+    """
+    One row per distinct SQL: calls, cache hits, wall-time percentiles,
+    mean db / frame time, rows, bytes and the pages that issued it.
+    """
+    df = get_query_records() if df is None else df
+    if df.empty:
+        return pd.DataFrame(columns=[
+            "sql", "calls", "cache_hits", "p50_ms", "p95_ms", "max_ms", "total_ms",
+            "avg_db_ms", "avg_frame_ms", "avg_rows", "avg_bytes", "pages"
+        ])
+
+    db = df[~df["cached"].astype(bool)]
+    rows = []
+    for sql, g in df.groupby("sql", sort=False):
+        q = db[db["sql"] == sql]
+        wall = q["wall_ms"].to_numpy(dtype=float)
+        rows.append({
+            "sql": sql,
+            "calls": len(g),
+            "cache_hits": int(g["cached"].astype(bool).sum()),
+            "p50_ms": float(np.percentile(wall, 50)) if len(wall) else None,
+            "p95_ms": float(np.percentile(wall, 95)) if len(wall) else None,
+            "max_ms": float(wall.max()) if len(wall) else None,
+            "total_ms": float(wall.sum()),
+            "avg_db_ms": q["db_ms"].astype(float).mean(),
+            "avg_frame_ms": q["frame_ms"].astype(float).mean(),
+            "avg_rows": g["rows"].mean(),
+            "avg_bytes": g["bytes"].mean(),
+            "pages": ", ".join(sorted(set(g["page"]))),
+        })
+    return pd.DataFrame(rows).sort_values(sort_by, ascending=False).reset_index(drop=True)
+
+
+def clear_query_stats():
+    with _records_lock:
+        _records.clear()
@@ -0,0 +1,55 @@
+# utils/raw_flights.py
+"""
+Shared parsing of the raw BTS flight.csv.
+
+The flight_delay and sales_data preparations derive from the same raw
+columns: stripped airline / airport codes and the flight date. They are
+built here once per chunk (shared_columns) so a single pass over the raw
+file can feed both outputs (scripts/ingest_raw_flights.py). Codes are
+resolved against the dimension indexes in utils/dimensions.py.
+"""
+import pandas as pd
+
+from utils.schemas import strip_categories
+
+# only these raw columns are ever used, so nothing else is parsed
+RAW_COLUMNS = {
+    "YEAR", "MONTH", "DAY", "FLIGHT_DATE", "DATE", "SCHEDULED_DEPARTURE_DATE",
+    "AIRLINE", "FLIGHT_NUMBER", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT",
+    "DEPARTURE_DELAY", "ARRIVAL_DELAY", "DISTANCE", "CANCELLED", "DIVERTED",
+    "AIR_SYSTEM_DELAY", "SECURITY_DELAY", "AIRLINE_DELAY", "LATE_AIRCRAFT_DELAY", "WEATHER_DELAY",
+}
+
+
+# ============================================================
+# SHARED COLUMNS
+# ============================================================
+def make_flight_date(df):
+    if {"YEAR", "MONTH", "DAY"}.issubset(df.columns):
+        # create date, coerce invalid to NaT
+        return pd.to_datetime(df.loc[:, ["YEAR", "MONTH", "DAY"]], errors="coerce")
+    # fallback to any date-like column
+    for col in ["FLIGHT_DATE", "DATE", "SCHEDULED_DEPARTURE_DATE"]:
+        if col in df.columns:
+            return pd.to_datetime(df[col], errors="coerce")
+    return pd.Series(pd.NaT, index=df.index)
+
+
+def stripped(flights, col):
+    if col in flights.columns:
+        return strip_categories(flights[col])
+    return pd.Series(None, index=flights.index, dtype="category")
+
+
+def shared_columns(flights):
+    """
+    Columns every output derives from one raw chunk: stripped airline /
+    origin / destination codes (categoricals) and flight_date (datetime64).
+    """
+    flights.columns = flights.columns.str.strip()
+    return {
+        "airline_code": stripped(flights, "AIRLINE"),
+        "origin": stripped(flights, "ORIGIN_AIRPORT"),
+        "destination": stripped(flights, "DESTINATION_AIRPORT"),
+        "flight_date": make_flight_date(flights),
+    }
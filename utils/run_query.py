@@ -1,6 +1,201 @@
-from utils.db_connection import get_db_engine
+from utils.db_connection import get_db_engine, reattach_missing_views
+from utils.query_cache import get_query_cache, make_key, tables_in
+from utils.query_stats import QueryTimer
+from sqlalchemy import text, inspect
+from contextlib import contextmanager
 import pandas as pd
+import re
+import threading
 
-def run_query(sql):
+DEFAULT_CHUNKSIZE = 50000
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_capture = threading.local()
+
+
+@contextmanager
+def capture_queries():
+    """
+    Records every (sql, params) passed to run_query in this thread, e.g. so
+    scripts/explain_queries.py can EXPLAIN exactly what a page issues.
+    """
+    captured = []
+    stack = getattr(_capture, "stack", None)
+    if stack is None:
+        stack = _capture.stack = []
+    stack.append(captured)
+    try:
+        yield captured
+    finally:
+        stack.pop()
+
+
+def run_query(sql, params=None, use_cache=True, chunksize=None, dtype=None, parse_dates=None):
+    """
+    Runs `sql` (with optional bound `params`, e.g. :start) on the shared
+    pooled engine and returns a DataFrame.
+
+    Results are served from the process-wide query cache until the tables
+    they read change (see utils/query_cache.py). Pass use_cache=False for
+    queries that must always hit the database.
+
+    With `chunksize`, returns an iterator of DataFrames read through a
+    server-side cursor instead (never cached), so full-table reads keep
+    memory bounded. `dtype` / `parse_dates` are applied to every chunk.
+    """
+    for captured in getattr(_capture, "stack", ()):
+        captured.append((sql, dict(params or {})))
+
+    engine = get_db_engine()
+
+    if chunksize:
+        return iter_query(sql, params=params, chunksize=chunksize, dtype=dtype, parse_dates=parse_dates)
+
+    if not use_cache:
+        return _read(engine, sql, params, dtype, parse_dates)
+
+    cache = get_query_cache()
+    key = make_key(sql, params)
+
+    timer = QueryTimer(sql, params)
+    df = cache.get(key, engine)
+    if df is not None:
+        timer.done(rows=len(df), cached=True)
+        return df
+
+    # read watermarks before the query so a concurrent load invalidates it
+    marks = cache.watermarks(engine, tables_in(sql))
+    df = _read(engine, sql, params, dtype, parse_dates, timer)
+    cache.put(key, df, marks)
+    return df
+
+
+def _read(engine, sql, params=None, dtype=None, parse_dates=None, timer=None):
+    """
+    Executes and fetches (database time), then builds the DataFrame
+    (frame time) — timed separately for utils/query_stats.py. `timer`:
+    the QueryTimer of a cache miss, so it is recorded once.
+    """
+    timer = timer or QueryTimer(sql, params)
+    try:
+        try:
+            columns, rows = _fetch(engine, sql, params)
+        except Exception as e:
+            if not reattach_missing_views(engine, e):
+                raise
+            columns, rows = _fetch(engine, sql, params)
+        timer.mark_db()
+        df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        df = _apply_dtypes(_parse_dates(df, parse_dates), dtype)
+    except Exception as e:
+        timer.done(error=str(e).splitlines()[0] if str(e) else type(e).__name__)
+        raise
+    timer.done(df)
+    return df
+
+
+def _fetch(engine, sql, params):
+    with engine.connect() as conn:
+        result = conn.execute(text(sql), params or {})
+        return list(result.keys()), result.fetchall()
+
+
+def _parse_dates(df, parse_dates):
+    # same contract as read_sql(parse_dates=[...]) for the columns present
+    if isinstance(parse_dates, str):
+        parse_dates = [parse_dates]
+    for col in parse_dates or ():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+# ============================================================
+# STREAMING READS
+# ============================================================
+def iter_query(sql, params=None, chunksize=DEFAULT_CHUNKSIZE, dtype=None, parse_dates=None):
+    """
+    Yields DataFrame chunks of `chunksize` rows using a server-side
+    (unbuffered) cursor, so only one chunk is held in memory at a time.
+    """
     engine = get_db_engine()
-    return pd.read_sql(sql, engine)
+    chunks = _stream(engine, sql, params, chunksize, dtype, parse_dates)
+    try:
+        first = next(chunks, None)
+    except Exception as e:
+        if not reattach_missing_views(engine, e):
+            raise
+        chunks = _stream(engine, sql, params, chunksize, dtype, parse_dates)
+        first = next(chunks, None)
+    if first is None:
+        return
+    yield first
+    yield from chunks
+
+
+def _stream(engine, sql, params, chunksize, dtype, parse_dates):
+    timer = QueryTimer(sql, params)
+    rows = nbytes = 0
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+        for chunk in pd.read_sql(
+            text(sql), conn, params=params, chunksize=chunksize, parse_dates=parse_dates
+        ):
+            chunk = _apply_dtypes(chunk, dtype)
+            rows += len(chunk)
+            nbytes += int(chunk.memory_usage(index=False).sum())
+            yield chunk
+    # whole stream, including time the consumer spent between chunks
+    timer.done(rows=rows, nbytes=nbytes)
+
+
+def build_select(table, columns=None, where=None, order_by=None):
+    """
+    Builds `SELECT <columns> FROM <table> [WHERE ...] [ORDER BY ...]`.
+    Column and table names must be plain identifiers; `where` may use
+    bound parameters (:name) supplied separately.
+    """
+    for name in [table] + list(columns or []):
+        if not _IDENTIFIER_RE.match(name):
+            raise ValueError(f"Invalid identifier: {name!r}")
+
+    cols = ", ".join(columns) if columns else "*"
+    sql = f"SELECT {cols} FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return sql
+
+
+def stream_table(table, columns=None, where=None, params=None,
+                 chunksize=DEFAULT_CHUNKSIZE, dtype=None, parse_dates=None):
+    """
+    Streams `table` in typed chunks, reading only `columns` and only rows
+    matching `where`.
+
+    Example:
+        for chunk in stream_table("flight_delay",
+                                  columns=["flight_date", "arr_delay"],
+                                  where="flight_date >= :start",
+                                  params={"start": "2015-06-01"}):
+            ...
+    """
+    sql = build_select(table, columns, where)
+    return iter_query(sql, params=params, chunksize=chunksize, dtype=dtype, parse_dates=parse_dates)
+
+
+def table_columns(table):
+    """
+    Returns the column names of `table` as reported by the database.
+    """
+    return [c["name"] for c in inspect(get_db_engine()).get_columns(table)]
+
+
+def _apply_dtypes(chunk, dtype):
+    # pandas read_sql rejects dtypes for columns that were not selected,
+    # so only the ones present in the result are applied
+    if not dtype:
+        return chunk
+    present = {c: t for c, t in dtype.items() if c in chunk.columns}
+    return chunk.astype(present) if present else chunk
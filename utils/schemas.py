@@ -0,0 +1,220 @@
+# utils/schemas.py
+"""
+Column dtype registry for raw and cleaned flight data.
+
+One place declares how every column is parsed: low-cardinality codes as
+categoricals, delays / flags as small nullable ints, dates as dates.
+Readers pass read_csv_options(...) to pandas so columns are typed at
+parse time instead of loaded as Python strings and converted later.
+
+    df = pd.read_csv(path, **read_csv_options("flight_delay"))
+    df = apply_schema(df, "flight_delay")        # frames from SQL / other sources
+"""
+import pandas as pd
+
+CATEGORY = "category"
+DATE = "date"
+
+# delays fit comfortably in Int16 (about ±32k minutes)
+DELAY = "Int16"
+FLAG = "Int8"
+
+_BOOL_TEXT = {"true": True, "false": False, "1": True, "0": False}
+
+
+# ============================================================
+# SCHEMAS
+# ============================================================
+SCHEMAS = {
+    # BTS flight.csv as downloaded
+    "raw_flights": {
+        "YEAR": "Int16",
+        "MONTH": "Int8",
+        "DAY": "Int8",
+        "DAY_OF_WEEK": "Int8",
+        "AIRLINE": CATEGORY,
+        "FLIGHT_NUMBER": "Int32",
+        "TAIL_NUMBER": CATEGORY,
+        "ORIGIN_AIRPORT": CATEGORY,
+        "DESTINATION_AIRPORT": CATEGORY,
+        "SCHEDULED_DEPARTURE": "Int16",
+        "DEPARTURE_TIME": "Int16",
+        "DEPARTURE_DELAY": DELAY,
+        "TAXI_OUT": DELAY,
+        "WHEELS_OFF": "Int16",
+        "SCHEDULED_TIME": DELAY,
+        "ELAPSED_TIME": DELAY,
+        "AIR_TIME": DELAY,
+        "DISTANCE": "Int16",
+        "WHEELS_ON": "Int16",
+        "TAXI_IN": DELAY,
+        "SCHEDULED_ARRIVAL": "Int16",
+        "ARRIVAL_TIME": "Int16",
+        "ARRIVAL_DELAY": DELAY,
+        "DIVERTED": FLAG,
+        "CANCELLED": FLAG,
+        "CANCELLATION_REASON": CATEGORY,
+        "AIR_SYSTEM_DELAY": DELAY,
+        "SECURITY_DELAY": DELAY,
+        "AIRLINE_DELAY": DELAY,
+        "LATE_AIRCRAFT_DELAY": DELAY,
+        "WEATHER_DELAY": DELAY,
+    },
+    "raw_airlines": {
+        "IATA_CODE": "string",
+        "AIRLINE": "string",
+    },
+    "raw_airports": {
+        "IATA_CODE": "string",
+        "AIRPORT": "string",
+        "CITY": "string",
+        "STATE": CATEGORY,
+        "COUNTRY": CATEGORY,
+        "LATITUDE": "float64",
+        "LONGITUDE": "float64",
+    },
+    # cleaned table (data/raw/flight_delay.csv and SQL flight_delay)
+    "flight_delay": {
+        "flight_date": DATE,
+        "airline": CATEGORY,
+        "flight_number": "string",
+        "origin": CATEGORY,
+        "destination": CATEGORY,
+        "route": CATEGORY,
+        "dep_delay": DELAY,
+        "arr_delay": DELAY,
+        "distance": "Int16",
+        "cancelled": FLAG,
+        "diverted": FLAG,
+        "air_system_delay": DELAY,
+        "security_delay": DELAY,
+        "airline_delay": DELAY,
+        "late_aircraft_delay": DELAY,
+        "weather_delay": DELAY,
+        "scheduled_time": DELAY,
+        "elapsed_time": DELAY,
+        "air_time": DELAY,
+        "taxi_out": DELAY,
+        "taxi_in": DELAY,
+        "airport_name": CATEGORY,
+        "origin_city": CATEGORY,
+        "origin_state": CATEGORY,
+        "country": CATEGORY,
+        "dest_city": CATEGORY,
+        "dest_state": CATEGORY,
+        "_missing_dep_delay": "boolean",
+        "_missing_arr_delay": "boolean",
+        "_missing_date": "boolean",
+    },
+    "sales_data": {
+        "flight_date": DATE,
+        "date": DATE,
+        "airline": CATEGORY,
+        "flight_number": "string",
+        "origin": CATEGORY,
+        "destination": CATEGORY,
+        "route": CATEGORY,
+        "seats_sold": "Int32",
+        "tickets_sold": "Int32",
+        "ticket_price": "float64",
+        "avg_ticket_price": "float64",
+        "revenue": "float64",
+        "class": CATEGORY,
+        "travel_class": CATEGORY,
+    },
+}
+
+
+def get_schema(name):
+    if name not in SCHEMAS:
+        raise KeyError(f"Unknown schema: {name}")
+    return SCHEMAS[name]
+
+
+# ============================================================
+# PARSE-TIME OPTIONS
+# ============================================================
+def read_csv_options(name, columns=None):
+    """
+    dtype / parse_dates kwargs for pd.read_csv. Pass the file's
+    `columns` (or the usecols list) when not every schema column is
+    present, since read_csv rejects parse_dates for missing columns.
+    """
+    schema = get_schema(name)
+    if columns is not None:
+        schema = {c: t for c, t in schema.items() if c in set(columns)}
+    return {
+        "dtype": {c: t for c, t in schema.items() if t != DATE},
+        "parse_dates": [c for c, t in schema.items() if t == DATE],
+    }
+
+
+def csv_columns(path):
+    """
+    Header of a CSV file (stripped), without reading any rows.
+    """
+    return [c.strip() for c in pd.read_csv(path, nrows=0).columns]
+
+
+# ============================================================
+# COERCION OF LOADED FRAMES
+# ============================================================
+def _coerce(series, dtype):
+    if dtype == DATE:
+        return pd.to_datetime(series, errors="coerce")
+    if dtype == CATEGORY:
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype(CATEGORY)
+    if dtype == "string":
+        return series.astype(dtype)
+    if dtype == "boolean":
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            return series.astype(dtype)
+        text = series.astype("string").str.strip().str.lower()
+        return text.map(_BOOL_TEXT).astype(dtype)
+    numeric = pd.to_numeric(series, errors="coerce")
+    if dtype.startswith("Int"):
+        # SQL FLOAT / DECIMAL delays may carry fractions; ints round
+        numeric = numeric.round()
+    return numeric.astype(dtype)
+
+
+def apply_schema(df, name, columns=None):
+    """
+    Casts the columns of `df` that appear in schema `name` (optionally
+    only `columns`) in place of per-column astype(str) / to_numeric.
+    """
+    schema = get_schema(name)
+    for col, dtype in schema.items():
+        if col in df.columns and (columns is None or col in columns):
+            df[col] = _coerce(df[col], dtype)
+    return df
+
+
+def strip_categories(series):
+    """
+    Strips whitespace from a categorical's categories (cheap: touches
+    each distinct value once, not every row).
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype("string").str.strip()
+    stripped = series.cat.categories.astype(str).str.strip()
+    if stripped.is_unique:
+        return series.cat.rename_categories(stripped)
+    return series.astype(str).str.strip().astype(CATEGORY)
+
+
+def map_categories(series, mapping, keep_unmapped=False):
+    """
+    Dictionary-joins `mapping` onto a categorical via its categories.
+    Unmapped values become NaN, or keep their code with keep_unmapped.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(CATEGORY)
+    cats = series.cat.categories
+    if keep_unmapped:
+        new = [mapping.get(c, c) for c in cats]
+    else:
+        new = [mapping.get(c) for c in cats]
+    if pd.Index(new).is_unique and not any(pd.isna(v) for v in new):
+        return series.cat.rename_categories(new)
+    return series.map(dict(zip(cats, new))).astype(CATEGORY)
@@ -0,0 +1,372 @@
+# utils/snapshot.py
+"""
+Memory-mapped columnar snapshots of flight_delay and sales_data.
+
+A snapshot is one uncompressed Arrow IPC file per table, sorted by
+flight_date, under data/snapshots/<table>/<version>.arrow. Pages map it
+read-only instead of querying MySQL: every session of a Streamlit process
+shares the same mapped table, and every process shares the same pages of
+the OS page cache, so nothing is copied per session.
+
+    snap = get_snapshot("flight_delay")          # None until one is published
+    window = snap.slice(start, end)               # zero-copy Arrow slice
+    delays = snap.column("arr_delay", start, end) # NumPy view where possible
+    df = snap.to_pandas(start, end, columns=["flight_date", "airline"])
+
+scripts/refresh_snapshots.py rebuilds them from the Parquet layout (or
+SQL). A new version is written next to the old one and published by
+atomically replacing the CURRENT pointer; open readers keep their mapping
+of the previous file and pick up the new one on their next get_snapshot().
+
+Each snapshot records the version of its source (the Parquet files' count
+and newest mtime, or the SQL table's watermark). Once the source moves on,
+get_snapshot() returns None and the pages query the database again until
+the next refresh.
+"""
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.db_connection import get_db_engine
+from utils.partitions import (
+    PARTITION_ROOT, has_dataset, list_file_partitions, partition_files, dataset_files, to_arrow, _to_pandas,
+)
+from utils.query_cache import get_query_cache
+from utils.run_query import iter_query, build_select
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except Exception:
+    pa = None
+    ds = None
+
+SNAPSHOT_ROOT = Path(os.getenv("SNAPSHOT_ROOT", "data/snapshots"))
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "2"))
+SNAPSHOT_BATCH_ROWS = int(os.getenv("SNAPSHOT_BATCH_ROWS", "131072"))
+USE_SNAPSHOTS = os.getenv("USE_SNAPSHOTS", "1") != "0"
+# how often (seconds) a snapshot is compared with its source
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv("SNAPSHOT_CHECK_INTERVAL", "30"))
+SNAPSHOT_TABLES = ("flight_delay", "sales_data")
+DATE_COLUMN = "flight_date"
+CURRENT = "CURRENT"
+
+_open = {}
+_local = threading.local()
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed.")
+
+
+def _days(value):
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+def source_version(table, source, partition_root=PARTITION_ROOT, refresh=False):
+    """
+    Version of `table` in `source`: "<files>:<newest mtime>" of its Parquet
+    layout, or its SQL watermark (utils/query_cache.py).
+    """
+    if source == "parquet":
+        files = dataset_files(table, partition_root)
+        return f"{len(files)}:{max((f.stat().st_mtime_ns for f in files), default=0)}"
+    return str(get_query_cache().watermark(get_db_engine(), table, refresh=refresh))
+
+
+# ============================================================
+# READER
+# ============================================================
+class Snapshot:
+    """
+    One published snapshot, memory-mapped read-only. Rows are sorted by
+    flight_date, so a date window is a contiguous, zero-copy slice.
+    """
+
+    def __init__(self, table, path):
+        _require_pyarrow()
+        self.table = table
+        self.path = Path(path)
+        self.version = self.path.stem
+        self._source = pa.memory_map(str(self.path), "r")
+        self.data = pa.ipc.open_file(self._source).read_all()
+        self.metadata = {k.decode(): v.decode() for k, v in (self.data.schema.metadata or {}).items()}
+
+        # per-batch date arrays, viewed in place (date32 is int32 days)
+        self._day_chunks = [c.view(pa.int32()).to_numpy(zero_copy_only=False)
+                            for c in self.data.column(DATE_COLUMN).chunks]
+        self._day_chunks = [c for c in self._day_chunks if len(c)]
+        self._offsets = np.cumsum([0] + [len(c) for c in self._day_chunks])
+        self._last_days = np.array([c[-1] for c in self._day_chunks], dtype=np.int64)
+        self._checked_at, self._current = None, None
+
+    def __len__(self):
+        return self.data.num_rows
+
+    @property
+    def columns(self):
+        return self.data.column_names
+
+    def is_current(self):
+        """
+        True while the source still has the version the snapshot was built
+        from. Snapshots without one (older builds) count as stale.
+        """
+        recorded = self.metadata.get("source_version")
+        if recorded is None:
+            return False
+        try:
+            partition_root = self.metadata.get("partition_root", PARTITION_ROOT)
+            return source_version(self.table, self.metadata.get("source"), partition_root) == recorded
+        except Exception:
+            return False
+
+    def date_range(self):
+        """
+        (min date, max date), or (None, None) for an empty snapshot.
+        """
+        if not self._day_chunks:
+            return None, None
+        first = np.datetime64(int(self._day_chunks[0][0]), "D")
+        last = np.datetime64(int(self._day_chunks[-1][-1]), "D")
+        return pd.Timestamp(first).date(), pd.Timestamp(last).date()
+
+    def _position(self, day, side):
+        i = int(np.searchsorted(self._last_days, day, side=side))
+        if i == len(self._day_chunks):
+            return len(self)
+        return int(self._offsets[i] + np.searchsorted(self._day_chunks[i], day, side=side))
+
+    def bounds(self, start=None, end=None):
+        """
+        Row range [lo, hi) of flight_date in [start, end].
+        """
+        lo = 0 if start is None else self._position(_days(start), "left")
+        hi = len(self) if end is None else self._position(_days(end), "right")
+        return lo, max(lo, hi)
+
+    def slice(self, start=None, end=None, columns=None):
+        """
+        Arrow table of the rows in [start, end]; shares the mapped buffers.
+        """
+        lo, hi = self.bounds(start, end)
+        data = self.data.select(list(columns)) if columns else self.data
+        return data.slice(lo, hi - lo)
+
+    def column(self, name, start=None, end=None):
+        """
+        NumPy array of one column in [start, end]: a view of the mapping for
+        a numeric column without nulls inside one batch, else a copy (nulls
+        become NaN).
+        """
+        chunked = self.slice(start, end, [name]).column(0)
+        if chunked.num_chunks == 1:
+            return chunked.chunk(0).to_numpy(zero_copy_only=False)
+        return chunked.to_numpy()
+
+    def to_pandas(self, start=None, end=None, columns=None):
+        """
+        DataFrame with the registry dtypes (utils/partitions._to_pandas).
+        """
+        return _to_pandas(self.slice(start, end, columns))
+
+    def tail(self, n, start=None, end=None, columns=None):
+        """
+        The latest `n` rows in [start, end], newest first (like ORDER BY
+        flight_date DESC LIMIT n).
+        """
+        window = self.slice(start, end, columns)
+        df = _to_pandas(window.slice(max(0, window.num_rows - n)))
+        return df.iloc[::-1].reset_index(drop=True)
+
+
+def current_path(table, root=SNAPSHOT_ROOT):
+    """
+    Path of the published snapshot of `table`, or None.
+    """
+    pointer = Path(root) / table / CURRENT
+    try:
+        name = pointer.read_text().strip()
+    except FileNotFoundError:
+        return None
+    path = pointer.parent / name
+    return path if path.exists() else None
+
+
+def get_snapshot(table, root=SNAPSHOT_ROOT):
+    """
+    The current snapshot of `table` (shared per process), or None when
+    none is published, it is behind its source, pyarrow is missing,
+    USE_SNAPSHOTS=0 or inside snapshots_disabled().
+    """
+    if pa is None or not USE_SNAPSHOTS or getattr(_local, "disabled", 0):
+        return None
+    path = current_path(table, root)
+    if path is None:
+        return None
+    key = (table, str(Path(root).resolve()))
+    snap = _open.get(key)
+    if snap is None or snap.path != path:
+        snap = Snapshot(table, path)
+        _open[key] = snap
+
+    now = time.monotonic()
+    if snap._checked_at is None or now - snap._checked_at >= SNAPSHOT_CHECK_INTERVAL:
+        current = snap.is_current()
+        if snap._current is not False and not current:
+            print(f"⚠️ {table} snapshot {snap.version} is behind its {snap.metadata.get('source')} source; "
+                  "querying the database until scripts.refresh_snapshots runs")
+        snap._checked_at, snap._current = now, current
+    return snap if snap._current else None
+
+
+@contextmanager
+def snapshots_disabled():
+    """
+    get_snapshot() returns None in this thread, so callers take their SQL
+    path (e.g. scripts/explain_queries.py capturing the page queries).
+    """
+    _local.disabled = getattr(_local, "disabled", 0) + 1
+    try:
+        yield
+    finally:
+        _local.disabled -= 1
+
+
+# ============================================================
+# WRITER (refresh job)
+# ============================================================
+class _DictionaryUnifier:
+    """
+    Re-encodes dictionary columns batch by batch against one growing
+    dictionary per column. New values are only ever appended, so the IPC
+    writer can emit them as dictionary deltas (the file format does not
+    allow replacing a dictionary).
+    """
+
+    def __init__(self):
+        self.dictionaries = {}
+
+    def encode(self, name, column):
+        known = self.dictionaries.get(name, pd.Index([], dtype=object))
+        chunks = []
+        for chunk in column.chunks:
+            values = pd.Index(chunk.dictionary.to_pandas().astype(object))
+            unseen = values[~values.isin(known)].unique()
+            if len(unseen):
+                known = known.append(pd.Index(unseen, dtype=object))
+            mapping = pa.array(known.get_indexer(values).astype(np.int32))
+            chunks.append(pa.DictionaryArray.from_arrays(
+                mapping.take(chunk.indices), pa.array(known.to_numpy(), type=pa.string())))
+        self.dictionaries[name] = known
+        return pa.chunked_array(chunks, type=pa.dictionary(pa.int32(), pa.string()))
+
+    def apply(self, arrow):
+        for i, field in enumerate(arrow.schema):
+            if pa.types.is_dictionary(field.type):
+                arrow = arrow.set_column(i, field.name, self.encode(field.name, arrow.column(i)))
+        return arrow
+
+
+def _iter_parquet(table, root):
+    # month by month, each sorted by date, so memory stays at one month
+    for month in list_file_partitions(table, root):
+        files = partition_files(table, month, month, root)
+        if not files:
+            continue
+        dataset = ds.dataset([str(f) for f in files], format="parquet",
+                             partitioning=ds.partitioning(flavor="hive"),
+                             partition_base_dir=str(Path(root) / table))
+        columns = [n for n in dataset.schema.names if n not in ("year", "month")]
+        arrow = dataset.to_table(columns=columns, filter=ds.field(DATE_COLUMN).is_valid())
+        yield arrow.sort_by(DATE_COLUMN)
+
+
+def _iter_sql(table, chunksize):
+    sql = build_select(table, where=f"{DATE_COLUMN} IS NOT NULL", order_by=DATE_COLUMN)
+    for chunk in iter_query(sql, chunksize=chunksize, parse_dates=[DATE_COLUMN]):
+        yield to_arrow(chunk, table)
+
+
+def build_snapshot(table, source="auto", root=SNAPSHOT_ROOT, partition_root=PARTITION_ROOT,
+                   chunksize=SNAPSHOT_BATCH_ROWS):
+    """
+    Writes a new snapshot version of `table` and publishes it.
+    source: "parquet" (the monthly layout), "sql", or "auto" (Parquet when
+    present). Returns the published Path.
+    """
+    _require_pyarrow()
+    if source == "auto":
+        source = "parquet" if has_dataset(table, partition_root) else "sql"
+    # read before the rows, so writes made during the build leave it stale
+    source_mark = source_version(table, source, partition_root, refresh=True)
+    parts = _iter_parquet(table, partition_root) if source == "parquet" else _iter_sql(table, chunksize)
+
+    out_dir = Path(root) / table
+    out_dir.mkdir(parents=True, exist_ok=True)
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    tmp = out_dir / f".{version}.arrow.tmp"
+    unifier = _DictionaryUnifier()
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    writer, schema, rows, last_day = None, None, 0, None
+
+    try:
+        with pa.OSFile(str(tmp), "wb") as sink:
+            for part in parts:
+                if not part.num_rows:
+                    continue
+                part = unifier.apply(part)
+                if writer is None:
+                    schema = part.schema.with_metadata({
+                        "table": table, "source": source, "created_at": datetime.now().isoformat(timespec="seconds"),
+                        "source_version": source_mark, "partition_root": str(partition_root),
+                    })
+                    writer = pa.ipc.new_file(sink, schema, options=options)
+                part = part.select(schema.names).cast(schema)
+                first = part.column(DATE_COLUMN)[0].as_py()
+                if last_day is not None and first < last_day:
+                    raise ValueError(f"{table} rows are not sorted by {DATE_COLUMN}.")
+                last_day = part.column(DATE_COLUMN)[-1].as_py()
+                writer.write_table(part, max_chunksize=chunksize)
+                rows += part.num_rows
+            if writer is None:
+                raise ValueError(f"No {table} rows to snapshot from {source}.")
+            writer.close()
+        path = out_dir / f"{version}.arrow"
+        os.replace(tmp, path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    publish_snapshot(table, path, root)
+    print(f"[SUCCESS] {table} snapshot {version}: {rows:,} rows, {path.stat().st_size / 1024 ** 2:,.1f} MB")
+    return path
+
+
+def publish_snapshot(table, path, root=SNAPSHOT_ROOT, keep=SNAPSHOT_KEEP):
+    """
+    Points CURRENT at `path` with an atomic rename, then removes all but
+    the `keep` newest versions.
+    """
+    out_dir = Path(root) / table
+    pointer = out_dir / CURRENT
+    tmp = out_dir / f".{CURRENT}.{uuid.uuid4().hex}"
+    tmp.write_text(Path(path).name)
+    os.replace(tmp, pointer)
+
+    versions = sorted(out_dir.glob("*.arrow"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in versions[keep:]:
+        if old.name == Path(path).name:
+            continue
+        try:
+            old.unlink()            # open mappings stay valid on POSIX
+        except OSError:
+            pass                    # still mapped (Windows); removed on a later refresh
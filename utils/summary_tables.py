@@ -0,0 +1,307 @@
+# utils/summary_tables.py
+"""
+Incrementally maintained summaries of `flight_delay`.
+
+Each summary stores mergeable partial aggregates (sums, counts, delayed
+and cancelled counts) per flight_date plus its group keys. After a load,
+only the dates it touched are deleted and re-aggregated, and the
+reporting views (daily_delay_summary, monthly_airline_performance,
+airport_delay_rank, route_performance) merge the partials on read.
+
+Pages only read the partials once a full rebuild has covered every date
+(recorded in summary_state); until then a refresh rebuilds everything.
+"""
+from datetime import timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+from utils.db_connection import get_db_engine
+from utils.query_cache import mark_tables_changed
+from utils.run_query import run_query
+
+
+# partial table -> group keys (flight_date is always the first key)
+SUMMARIES = {
+    "daily_delay_partials": ["flight_date"],
+    "airline_daily_partials": ["flight_date", "airline"],
+    "airport_daily_partials": ["flight_date", "origin"],
+    "route_daily_partials": ["flight_date", "origin", "destination"],
+}
+
+KEY_TYPES = {
+    "flight_date": "DATE",
+    "airline": "VARCHAR(100)",
+    "origin": "VARCHAR(10)",
+    "destination": "VARCHAR(10)",
+}
+
+# measure -> aggregate over flight_delay (all mergeable by SUM)
+MEASURES = {
+    "total_flights": "COUNT(*)",
+    "dep_delay_sum": "COALESCE(SUM(dep_delay), 0)",
+    "dep_delay_count": "COUNT(dep_delay)",
+    "arr_delay_sum": "COALESCE(SUM(arr_delay), 0)",
+    "arr_delay_count": "COUNT(arr_delay)",
+    "delayed_flights": "SUM(CASE WHEN arr_delay > 15 THEN 1 ELSE 0 END)",
+    "cancelled_flights": "COALESCE(SUM(cancelled), 0)",
+}
+
+MEASURE_TYPES = {
+    "total_flights": "BIGINT",
+    "dep_delay_sum": "DOUBLE",
+    "dep_delay_count": "BIGINT",
+    "arr_delay_sum": "DOUBLE",
+    "arr_delay_count": "BIGINT",
+    "delayed_flights": "BIGINT",
+    "cancelled_flights": "BIGINT",
+}
+
+# one row per summarized table once a full rebuild has covered it
+STATE_TABLE = "summary_state"
+# reporting views that older schema.sql versions created as tables
+VIEWS = ["daily_delay_summary", "monthly_airline_performance", "airport_delay_rank", "route_performance"]
+
+
+# ============================================================
+# DDL
+# ============================================================
+def _month_expr(engine):
+    if engine.dialect.name == "mysql":
+        return "DATE_FORMAT(flight_date, '%Y-%m')"
+    return "strftime(flight_date, '%Y-%m')"
+
+
+def summary_ddl(engine):
+    """
+    Returns the CREATE TABLE / CREATE VIEW statements for all summaries.
+    """
+    statements = []
+    for table, keys in SUMMARIES.items():
+        cols = [f"{k} {KEY_TYPES[k]} NOT NULL" for k in keys]
+        cols += [f"{m} {MEASURE_TYPES[m]} NOT NULL DEFAULT 0" for m in MEASURES]
+        cols.append(f"PRIMARY KEY ({', '.join(keys)})")
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {table} (\n    " + ",\n    ".join(cols) + "\n)"
+        )
+
+    statements.append(
+        f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (\n"
+        "    source VARCHAR(64) NOT NULL PRIMARY KEY,\n"
+        "    built_at TIMESTAMP NOT NULL\n)"
+    )
+
+    month = _month_expr(engine)
+    statements += [
+        """
+        CREATE OR REPLACE VIEW daily_delay_summary AS
+        SELECT
+            flight_date,
+            total_flights,
+            dep_delay_sum / NULLIF(dep_delay_count, 0) AS avg_dep_delay,
+            arr_delay_sum / NULLIF(arr_delay_count, 0) AS avg_arr_delay
+        FROM daily_delay_partials
+        """,
+        f"""
+        CREATE OR REPLACE VIEW monthly_airline_performance AS
+        SELECT
+            airline,
+            {month} AS month,
+            SUM(total_flights) AS total_flights,
+            SUM(arr_delay_sum) / NULLIF(SUM(arr_delay_count), 0) AS avg_arr_delay,
+            SUM(delayed_flights) AS delayed_flights
+        FROM airline_daily_partials
+        GROUP BY airline, {month}
+        """,
+        """
+        CREATE OR REPLACE VIEW airport_delay_rank AS
+        SELECT
+            origin AS airport,
+            SUM(dep_delay_sum) / NULLIF(SUM(dep_delay_count), 0) AS avg_dep_delay,
+            SUM(arr_delay_sum) / NULLIF(SUM(arr_delay_count), 0) AS avg_arr_delay,
+            SUM(total_flights) AS total_flights
+        FROM airport_daily_partials
+        GROUP BY origin
+        """,
+        """
+        CREATE OR REPLACE VIEW route_performance AS
+        SELECT
+            origin,
+            destination,
+            SUM(total_flights) AS total_flights,
+            SUM(dep_delay_sum) / NULLIF(SUM(dep_delay_count), 0) AS avg_dep_delay,
+            SUM(arr_delay_sum) / NULLIF(SUM(arr_delay_count), 0) AS avg_arr_delay
+        FROM route_daily_partials
+        GROUP BY origin, destination
+        """,
+    ]
+    return statements
+
+
+def legacy_summary_tables(conn):
+    """
+    Reporting view names that still exist as base tables (databases
+    created from the old schema.sql, before migration 004).
+    """
+    rows = conn.execute(text(
+        "SELECT table_name FROM information_schema.tables "
+        "WHERE table_type = 'BASE TABLE' AND table_schema = " +
+        ("DATABASE()" if conn.dialect.name == "mysql" else "current_schema()")
+    )).fetchall()
+    return [name for name in VIEWS if name in {r[0] for r in rows}]
+
+
+def ensure_summary_tables(engine=None):
+    """
+    Creates the partial tables and reporting views if they do not exist.
+    Old summary tables with the views' names are renamed to <name>_legacy
+    first, as sql/migrations/004_summary_views.sql does.
+    """
+    engine = engine or get_db_engine()
+    with engine.begin() as conn:
+        for table in legacy_summary_tables(conn):
+            conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_legacy"))
+            print(f"⚠️ Renamed the old {table} table to {table}_legacy")
+        for stmt in summary_ddl(engine):
+            conn.execute(text(stmt))
+
+
+# ============================================================
+# REFRESH
+# ============================================================
+def date_ranges(dates, max_days=31):
+    """
+    Collapses a set of dates into sorted, inclusive (start, end) runs of
+    consecutive days (at most `max_days` long), so a month of new flights
+    becomes one range.
+    """
+    days = sorted({pd.Timestamp(d).date() for d in dates if pd.notna(d)})
+    ranges = []
+    for day in days:
+        if (ranges and day - ranges[-1][1] == timedelta(days=1)
+                and (day - ranges[-1][0]).days < max_days):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(r) for r in ranges]
+
+
+def _refresh_sql(table, keys):
+    select_keys = [
+        k if k == "flight_date" else f"COALESCE({k}, 'UNK') AS {k}"
+        for k in keys
+    ]
+    group_keys = [k if k == "flight_date" else f"COALESCE({k}, 'UNK')" for k in keys]
+    measures = [f"{agg} AS {name}" for name, agg in MEASURES.items()]
+    columns = keys + list(MEASURES)
+
+    delete = f"DELETE FROM {table} WHERE flight_date BETWEEN :start AND :end"
+    insert = f"""
+    INSERT INTO {table} ({', '.join(columns)})
+    SELECT {', '.join(select_keys + measures)}
+    FROM flight_delay
+    WHERE flight_date BETWEEN :start AND :end
+    GROUP BY {', '.join(group_keys)}
+    """
+    return delete, insert
+
+
+def _refresh_ranges(ranges, engine):
+    for start, end in ranges:
+        params = {"start": str(start), "end": str(end)}
+        with engine.begin() as conn:
+            for table, keys in SUMMARIES.items():
+                delete, insert = _refresh_sql(table, keys)
+                conn.execute(text(delete), params)
+                conn.execute(text(insert), params)
+        print(f"[SUMMARY] Refreshed {start} → {end}")
+
+
+def _invalidate_cache(engine):
+    mark_tables_changed(engine, list(SUMMARIES) + VIEWS + [STATE_TABLE])
+
+
+def summaries_built(engine=None):
+    """
+    True once a full rebuild has covered every flight_delay date.
+    """
+    engine = engine or get_db_engine()
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                text(f"SELECT COUNT(*) FROM {STATE_TABLE} WHERE source = 'flight_delay'")
+            ).fetchone()
+        return bool(row[0])
+    except Exception:
+        return False
+
+
+def refresh_summaries(dates, engine=None):
+    """
+    Re-aggregates only the flight_date partitions in `dates` for every
+    summary. Each date range is replaced in a single transaction, so
+    readers never see a half-refreshed day. If the summaries were never
+    fully built, the other dates would be missing, so everything is
+    rebuilt instead.
+
+    Returns the list of refreshed (start, end) ranges.
+    """
+    engine = engine or get_db_engine()
+    ranges = date_ranges(dates)
+    if not ranges:
+        return []
+
+    ensure_summary_tables(engine)
+    if not summaries_built(engine):
+        print("⚠️ Summaries were never fully built — rebuilding every date.")
+        return rebuild_summaries(engine)
+
+    _refresh_ranges(ranges, engine)
+    _invalidate_cache(engine)
+    return ranges
+
+
+def rebuild_summaries(engine=None):
+    """
+    Full rebuild over every date present in flight_delay; marks the
+    summaries as built, which switches the pages over to them.
+    """
+    engine = engine or get_db_engine()
+    ensure_summary_tables(engine)
+    with engine.connect() as conn:
+        start, end = conn.execute(
+            text("SELECT MIN(flight_date), MAX(flight_date) FROM flight_delay")
+        ).fetchone()
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {STATE_TABLE} WHERE source = 'flight_delay'"))
+        # dates no longer in flight_delay
+        for table in SUMMARIES:
+            if start is None:
+                conn.execute(text(f"DELETE FROM {table}"))
+            else:
+                conn.execute(text(f"DELETE FROM {table} WHERE flight_date < :start OR flight_date > :end"),
+                             {"start": str(start), "end": str(end)})
+
+    ranges = []
+    if start is not None:
+        ranges = date_ranges(pd.date_range(start, end, freq="D"))
+        _refresh_ranges(ranges, engine)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {STATE_TABLE} (source, built_at) VALUES ('flight_delay', CURRENT_TIMESTAMP)"))
+    _invalidate_cache(engine)
+    return ranges
+
+
+def summaries_available():
+    """
+    True once the summaries were fully built (cached through run_query,
+    so pages can call it on every rerun). Before that they may only
+    cover the dates of the last incremental load.
+    """
+    try:
+        df = run_query(f"SELECT COUNT(*) AS n FROM {STATE_TABLE} WHERE source = 'flight_delay'")
+        return bool(df.loc[0, "n"])
+    except Exception:
+        return False
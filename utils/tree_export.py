@@ -0,0 +1,304 @@
+# utils/tree_export.py
+"""
+Array-based inference for the fitted random forests.
+
+export_model() flattens a RandomForestClassifier (or a Pipeline of a
+ColumnTransformer of OneHotEncoder / StandardScaler and a forest, like the
+delay model) into one set of contiguous NumPy node arrays. CompiledForest
+then scores a whole batch by walking every tree at once, one level per
+step, with no per-row or per-tree Python, and gives the same probabilities
+as the sklearn model:
+
+    compiled = export_model(pipeline, columns=CATEGORICAL + NUMERIC)
+    proba = compiled.predict_proba(X)        # == pipeline.predict_proba(X)
+    save_compiled(compiled, "models/flight_delay_model.pkl")   # → .compiled.pkl
+
+One-hot splits are kept as tests on a per-column code (left when
+code != k, right when code == k), so rows are never expanded to the
+one-hot width; numeric columns are scaled exactly as StandardScaler does
+and compared in float32 like sklearn trees.
+It is several times faster than the sklearn pipeline for single rows and
+small batches; large batch jobs keep using sklearn (utils/batch_scoring.py).
+"""
+import numpy as np
+import pandas as pd
+
+from utils.model_registry import file_version, get_model, save_model
+
+try:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+except Exception:
+    ColumnTransformer = Pipeline = OneHotEncoder = StandardScaler = None
+
+COMPILED_SUFFIX = ".compiled.pkl"
+# rows walked together; bounds the (rows x trees) index arrays
+BLOCK_ROWS = 2048
+
+
+def compiled_path(path):
+    """
+    Where the compiled form of the model at `path` is stored.
+    """
+    path = str(path)
+    return path[:-4] + COMPILED_SUFFIX if path.endswith(".pkl") else path + COMPILED_SUFFIX
+
+
+# ============================================================
+# COMPILED MODEL
+# ============================================================
+class CompiledForest:
+    """
+    Flattened tree ensemble plus the column preprocessing in front of it.
+
+    Nodes of all trees live in shared arrays (tree t starts at roots[t]);
+    leaves point to themselves, so every row takes exactly max_depth
+    steps. A node on prepared column c < n_columns goes left when
+    value <= split; a one-hot node (feature = n_columns + c) goes left
+    when the category code != split, as x <= 0.5 does on the one-hot bit.
+    children[2 * node + went_left] is the next node.
+    """
+
+    def __init__(self, columns, encoders, feature, split, children, missing_left, value, roots,
+                 max_depth, classes):
+        self.columns = columns              # input columns, or None for positional arrays
+        self.encoders = encoders            # per column: ("category", categories) / ("scale", mean, scale) / None
+        self.feature = feature
+        self.split = split
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_columns = len(encoders)
+        self.has_categories = bool((feature >= self.n_columns).any())
+        self.source = None                  # {"path", "version"} of the exported model file
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def prepare(self, X):
+        """
+        float32 matrix, one column per input column: category codes (-1 =
+        unknown) or values scaled as in training.
+        """
+        if isinstance(X, pd.DataFrame):
+            names = self.columns if self.columns is not None else list(X.columns)
+            if all(enc is None for enc in self.encoders):
+                return X[names].to_numpy(dtype=np.float32)
+            values = [X[name].to_numpy() for name in names]
+        else:
+            X = np.asarray(X)
+            if all(enc is None for enc in self.encoders):
+                return X.astype(np.float32)
+            values = [X[:, i] for i in range(X.shape[1])]
+
+        out = np.zeros((len(values[0]) if values else 0, self.n_columns), dtype=np.float32)
+        for i, enc in enumerate(self.encoders):
+            if enc is None:
+                out[:, i] = np.asarray(values[i], dtype=np.float64)
+            elif enc[0] == "scale":
+                # as StandardScaler: in float64, then float32 like the trees
+                out[:, i] = (np.asarray(values[i], dtype=np.float64) - enc[1]) / enc[2]
+            elif enc[0] == "category":
+                out[:, i] = enc[1].get_indexer(np.asarray(values[i], dtype=object))
+        return out
+
+    def apply(self, F):
+        """
+        Leaf node index per (row, tree) for a prepared matrix.
+        """
+        n_rows, n_columns = F.shape
+        # one-hot nodes read the second copy of each column
+        flat = np.concatenate([F, F], axis=1).ravel()
+        offsets = (np.arange(n_rows) * 2 * n_columns)[:, None]
+        has_nan = bool(np.isnan(F).any())
+
+        idx = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[idx]
+            v = flat[offsets + feature]
+            split = self.split[idx]
+            if self.has_categories:
+                go_left = np.where(feature >= n_columns, v != split, v <= split)
+            else:
+                go_left = v <= split
+            if has_nan:
+                go_left = np.where(np.isnan(v), self.missing_left[idx], go_left)
+            idx = self.children[2 * idx + go_left]
+        return idx
+
+    def predict_proba(self, X):
+        F = self.prepare(X)
+        out = np.empty((len(F), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(F), BLOCK_ROWS):
+            leaves = self.apply(F[start:start + BLOCK_ROWS])
+            # summed tree by tree, in order, like RandomForestClassifier
+            out[start:start + BLOCK_ROWS] = np.cumsum(self.value[leaves], axis=1)[:, -1]
+        out /= self.n_estimators
+        return out
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def predict_with_proba(model, X):
+    """
+    (labels, probabilities) from a single predict_proba call, for the
+    sklearn model and the compiled one alike.
+    """
+    proba = model.predict_proba(X)
+    return model.classes_[np.argmax(proba, axis=1)], proba
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+def _column_encoders(preprocessor, columns):
+    """
+    Per input column encoder, plus {transformed feature: (column, category)}.
+    Columns the preprocessor drops get ("drop",).
+    """
+    encoders = [("drop",)] * len(columns)
+    features = {}
+    position = {name: i for i, name in enumerate(columns)}
+
+    for name, transformer, cols in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == "drop":
+            continue
+        cols = [columns[c] for c in cols] if np.issubdtype(np.asarray(cols).dtype, np.integer) else list(cols)
+        out = preprocessor.output_indices_[name]
+        if isinstance(transformer, str) and transformer == "passthrough":
+            for k, col in enumerate(cols):
+                encoders[position[col]] = None
+                features[out.start + k] = (position[col], -1)
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+                raise ValueError("OneHotEncoder with drop / infrequent categories is not supported.")
+            k = out.start
+            for col, categories in zip(cols, transformer.categories_):
+                encoders[position[col]] = ("category", pd.Index(categories))
+                for code in range(len(categories)):
+                    features[k] = (position[col], code)
+                    k += 1
+        elif isinstance(transformer, StandardScaler):
+            n = len(cols)
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(n)
+            scale = transformer.scale_ if transformer.with_std else np.ones(n)
+            for k, col in enumerate(cols):
+                encoders[position[col]] = ("scale", float(mean[k]), float(scale[k]))
+                features[out.start + k] = (position[col], -1)
+        else:
+            raise ValueError(f"Cannot export transformer {name!r} ({type(transformer).__name__}).")
+    return encoders, features
+
+
+def export_model(model, columns=None):
+    """
+    CompiledForest of a fitted forest classifier, or of a Pipeline of a
+    ColumnTransformer (OneHotEncoder / StandardScaler / passthrough) and a
+    forest. `columns`: the pipeline's input columns (default: the names
+    it was fitted on).
+    """
+    preprocessor = None
+    forest = model
+    if Pipeline is not None and isinstance(model, Pipeline):
+        if len(model.steps) > 2:
+            raise ValueError("Only preprocessor + forest pipelines can be exported.")
+        preprocessor = model.steps[0][1] if len(model.steps) == 2 else None
+        forest = model.steps[-1][1]
+    if not hasattr(forest, "estimators_"):
+        raise ValueError(f"{type(forest).__name__} is not a fitted tree ensemble.")
+    if getattr(forest, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be exported.")
+
+    if preprocessor is not None:
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise ValueError(f"Cannot export preprocessor {type(preprocessor).__name__}.")
+        columns = list(columns if columns is not None else preprocessor.feature_names_in_)
+        encoders, features = _column_encoders(preprocessor, columns)
+    else:
+        names = getattr(forest, "feature_names_in_", None)
+        columns = list(columns) if columns is not None else (list(names) if names is not None else None)
+        encoders = [None] * forest.n_features_in_
+        features = {k: (k, -1) for k in range(forest.n_features_in_)}
+    # transformed feature → (prepared column, category code or -1)
+    lookup = np.array([features[k] for k in range(len(features))], dtype=np.int64).reshape(-1, 2)
+
+    n_classes = len(forest.classes_)
+    n_columns = len(encoders)
+    parts = {k: [] for k in ("feature", "split", "children", "missing_left", "value")}
+    roots, offset, max_depth = [], 0, 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        nodes = np.arange(n)
+        column, category = lookup[np.where(leaf, 0, tree.feature)].T
+        onehot = ~leaf & (category >= 0)
+        if ((tree.threshold[onehot] < 0) | (tree.threshold[onehot] >= 1)).any():
+            raise ValueError("One-hot split thresholds must lie in [0, 1).")
+
+        children = np.empty((n, 2), dtype=np.int64)
+        children[:, 0] = np.where(leaf, nodes, tree.children_right) + offset
+        children[:, 1] = np.where(leaf, nodes, tree.children_left) + offset
+        parts["feature"].append(np.where(onehot, n_columns + column, column))
+        parts["split"].append(np.where(onehot, category, np.where(leaf, 0.0, tree.threshold)))
+        parts["children"].append(children.ravel())
+        parts["missing_left"].append(
+            np.asarray(getattr(tree, "missing_go_to_left", np.zeros(n, dtype=np.uint8)), dtype=bool))
+        # class fractions; scikit-learn < 1.4 stores weighted counts instead
+        value = tree.value[:, 0, :n_classes]
+        totals = value.sum(axis=1, keepdims=True)
+        parts["value"].append(np.divide(value, totals, out=np.zeros_like(value, dtype=np.float64),
+                                        where=totals > 0))
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    index_type = np.int32 if 2 * offset < 2 ** 31 else np.int64
+    return CompiledForest(
+        columns=columns,
+        encoders=encoders,
+        feature=np.concatenate(parts["feature"]).astype(np.int32),
+        split=np.concatenate(parts["split"]).astype(np.float64),
+        children=np.concatenate(parts["children"]).astype(index_type),
+        missing_left=np.concatenate(parts["missing_left"]),
+        value=np.ascontiguousarray(np.concatenate(parts["value"]), dtype=np.float64),
+        roots=np.asarray(roots, dtype=index_type),
+        max_depth=max_depth,
+        classes=np.asarray(forest.classes_),
+    )
+
+
+def save_compiled(compiled, source_path, path=None):
+    """
+    Saves `compiled` next to the model file it was exported from,
+    recording that file's version so stale exports are ignored.
+    """
+    compiled.source = {"path": str(source_path), "version": file_version(source_path)}
+    return save_model(compiled, path or compiled_path(source_path))
+
+
+def load_compiled(source_path):
+    """
+    The compiled export of the model at `source_path` (memory-mapped,
+    shared via utils/model_registry.py), or None when there is none or it
+    was exported from an older version of the file.
+    """
+    path = compiled_path(source_path)
+    try:
+        compiled = get_model(path)
+        current = file_version(source_path)
+    except FileNotFoundError:
+        return None
+    if compiled.source is None or tuple(compiled.source["version"]) != tuple(current):
+        return None
+    return compiled
@@ -1,6 +1,10 @@
 # utils/ui.py
 import streamlit as st
+import pandas as pd
 from importlib import import_module
+from utils.run_query import run_query
+from utils.partitions import default_window, DEFAULT_WINDOW_DAYS
+from utils.snapshot import get_snapshot
 
 def premium_sidebar_nav(pages_dict):
     """
@@ -109,4 +113,32 @@ def glass_card_end():
 
 def download_df_button(df, filename="data.csv", label="Download CSV"):
     csv = df.to_csv(index=False).encode('utf-8')
-    st.download_button(label=label, data=csv, file_name=filename, mime='text/csv')
\ No newline at end of file
+    st.download_button(label=label, data=csv, file_name=filename, mime='text/csv')
+
+
+def date_window_picker(table="flight_delay", key="date_window", label="Date window"):
+    """
+    Date range picker bounded by the table's flight_date range, defaulting
+    to the most recent DEFAULT_WINDOW_DAYS. Returns (start, end), or
+    (None, None) when the table is empty.
+    """
+    snap = get_snapshot(table)
+    if snap is not None:
+        # bounds of the mapped snapshot (utils/snapshot.py), no query
+        min_date, max_date = snap.date_range()
+        if max_date is None:
+            return None, None
+        start, end = (pd.Timestamp(max_date) - pd.Timedelta(days=DEFAULT_WINDOW_DAYS - 1)).date(), max_date
+    else:
+        bounds = run_query(f"SELECT MIN(flight_date) AS min_date, MAX(flight_date) AS max_date FROM {table}")
+        if bounds.empty or pd.isna(bounds.loc[0, "max_date"]):
+            return None, None
+        min_date = pd.to_datetime(bounds.loc[0, "min_date"]).date()
+        max_date = pd.to_datetime(bounds.loc[0, "max_date"]).date()
+        start, end = default_window(table)
+    start = max(start, min_date)
+
+    window = st.date_input(label, (start, end), min_value=min_date, max_value=max_date, key=key)
+    if isinstance(window, (list, tuple)) and len(window) == 2:
+        return window[0], window[1]
+    return start, end
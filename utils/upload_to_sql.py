@@ -1,14 +1,17 @@
 import pandas as pd
-from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 
+from utils.db_connection import get_db_engine
+from utils.query_cache import mark_tables_changed
+
 
 def get_engine(user="root", password="admin", host="localhost", port=3306, db="airline_analytics"):
     """
-    Creates a SQLAlchemy engine for MySQL.
+    Returns the pooled SQLAlchemy engine for MySQL.
+    Engines are shared per URL through utils.db_connection.
     """
     url = f"mysql+pymysql://{user}:{password}@{host}:{port}/{db}"
-    return create_engine(url)
+    return get_db_engine(url)
 
 
 def upload_dataframe(df: pd.DataFrame, table_name: str, engine=None, if_exists="append"):
@@ -28,7 +31,10 @@ def upload_dataframe(df: pd.DataFrame, table_name: str, engine=None, if_exists="
         raise ValueError("Engine cannot be None")
 
     try:
-        df.to_sql(table_name, con=engine, if_exists=if_exists, index=False)
+        # multi-row INSERTs instead of one statement per row
+        df.to_sql(table_name, con=engine, if_exists=if_exists, index=False,
+                  method="multi", chunksize=1000)
+        mark_tables_changed(engine, [table_name])
         print(f"[SUCCESS] Uploaded {len(df)} rows to '{table_name}' table.")
         return True
 